@@ -40,15 +40,8 @@ def collect_config_files(spc, output_dir):
     Get all device config files from Space in batches of 500 each.
     Then collect all versions of each file.
     """
-    start = 0
-    config_files = []
-    while True:
-        page = spc.config_file_management.config_files.get(
-                                paging={'start': start, 'limit': 500})
-        config_files.extend(page)
-        start += len(page)
-        if len(page) < 500:
-            break
+    config_files = list(
+        spc.config_file_management.config_files.iter_all(page_size=500))
 
     print("There are %d config files to process" % len(config_files))
     for cf in config_files:
@@ -16,6 +16,3 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-
-import requests.packages.urllib3
-requests.packages.urllib3.disable_warnings()
\ No newline at end of file
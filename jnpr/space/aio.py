@@ -0,0 +1,567 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+This module defines the AsyncSpace class and the asyncio variants of the
+Service, Collection, Resource and Method classes. It requires Python 3.6 or
+later and the ``aiohttp`` package.
+"""
+import asyncio
+from collections import deque
+import datetime
+import ssl
+import time
+
+from jnpr.space import rest, pipeline, service, collection, resource, method
+
+class _Unsupported(object):
+    """
+    Hides a method inherited from the sync API which has no asyncio variant,
+    so that looking it up raises ``AttributeError`` as if it did not exist.
+    """
+
+    def __init__(self, reason):
+        self.reason = reason
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        raise AttributeError("'%s' object has no attribute '%s'. %s" %
+                             (owner.__name__, self.name, self.reason))
+
+class AsyncSpace(rest.Space):
+    """An asyncio variant of ``jnpr.space.rest.Space``. It reads the same
+    descriptions and builds the same tree of services, collections, resources
+    and methods, but the methods which send requests to Space (``get()``,
+    ``post()``, ``put()`` and ``delete()``) are coroutines.
+
+    For example, the snippet below gets the devices collection and then the
+    state of all devices concurrently:
+
+        >>> async def main():
+                async with aio.AsyncSpace(url='https://1.1.1.1',
+                                          user='super',
+                                          passwd='password') as s:
+                    devs = await s.device_management.devices.get()
+                    states = await asyncio.gather(*[d.get() for d in devs])
+
+    Collections can also be iterated using ``async for``:
+
+        >>> async for d in s.device_management.devices:
+                print(d.name)
+
+    Large collections can be paged through with ``iter_pages()`` and
+    ``iter_all()``, which are async generators, or fetched with concurrent
+    requests using ``get_all()``.
+
+    .. note::
+        Session based login is not supported by this class. All requests are
+        individually authenticated and sent over a pool of keep-alive
+        connections. An instance of this class must be used from a single
+        event loop.
+    """
+
+    _node_classes = {'service': 'jnpr.space.aio.AsyncService',
+                     'collection': 'jnpr.space.aio.AsyncCollection',
+                     'resource': 'jnpr.space.aio.AsyncResource',
+                     'method': 'jnpr.space.aio.AsyncMethod'}
+
+    def __init__(self,
+                 url,
+                 user=None,
+                 passwd=None,
+                 cert=None,
+                 profile_file=None,
+                 pool_size=100):
+        """Creates an instance of this class to represent a Junos Space cluster.
+
+        :param url: URL of the Junos Space cluster using its VIP address.
+                    E.g. https://<VIP>
+        :type url: str
+        :param str user: A valid userid for invoking APIs on this Space cluster.
+            Can be omitted if ``cert`` is provided for X.509 certificate based
+            authentication to Junos Space.
+        :param str passwd: Password for the userid.
+        :param tuple cert: X.509 certificate details for authentication. See
+            ``jnpr.space.rest.Space`` for details.
+        :param str profile_file: Full pathname of a file where response times
+            for each API call is to be recorded. This parameter is ``None``
+            by default.
+        :param int pool_size: The maximum number of connections opened to the
+            Space cluster. Requests beyond this many are queued until a
+            connection is free. It is 100 by default.
+
+        :returns:  An instance of this class encapsulating the Junos Space
+                   cluster whose **url** was given as a parameter.
+        """
+        self._pool_size = pool_size
+        self._session = None
+        super(AsyncSpace, self).__init__(url, user, passwd, cert,
+                                         use_session=False,
+                                         profile_file=profile_file,
+                                         pool_size=pool_size)
+
+    def _create_transport(self, pool_size):
+        """
+        The aiohttp session is created on first use, from within the event
+        loop.
+        """
+        return None
+
+    def _get_session(self):
+        """
+        Returns the aiohttp client session used for all requests, creating
+        it if needed.
+        """
+        if self._session is None:
+            import aiohttp
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+            if self.cert is not None:
+                ctx.load_cert_chain(self.cert[0], self.cert[1])
+            connector = aiohttp.TCPConnector(limit=self._pool_size, ssl=ctx)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar())
+        return self._session
+
+    async def request(self, method, url, headers=None, body=None):
+        """Sends an HTTP request to Space through the request pipeline of this
+        instance. The stages of the pipeline are the same as for
+        ``jnpr.space.rest.Space``.
+
+        :returns: An ``AsyncResponse`` object for the request.
+        """
+        req = pipeline.Request(method, url, headers, body)
+        return await self.pipeline.execute_async(req, self._send)
+
+    async def _send(self, request):
+        """
+        Sends a request to Space and reads the complete response. The URL is
+        quoted as by ``requests`` (e.g. spaces in a filter as ``%20``, not
+        ``+``) and passed to aiohttp as already encoded.
+        """
+        import yarl
+        from requests.utils import requote_uri
+        req_url = yarl.URL(requote_uri(self.space_url + request.url),
+                           encoded=True)
+        headers = dict((k, str(v)) for k, v in request.headers.items())
+        start = time.time()
+        async with self._get_session().request(request.method, req_url,
+                                               headers=headers,
+                                               data=request.body) as resp:
+            content = await resp.read()
+        elapsed = datetime.timedelta(seconds=time.time() - start)
+        return AsyncResponse(resp, content, elapsed)
+
+    async def get(self, url, headers={}):
+        """Performs an HTTP GET on the given url.
+
+        :param str url: URL for performing GET
+        :param dict headers: A dict with the headers that need to be sent with
+            the GET request. Defaults to ``{}``.
+
+        :returns: An ``AsyncResponse`` object for the GET request.
+        """
+        return await self.request('GET', url, headers)
+
+    async def head(self, url, headers={}):
+        """Performs an HTTP HEAD on the given url.
+
+        :param str url: URL for performing HEAD
+        :param dict headers: A dict with the headers that need to be sent with
+            the HEAD request. Defaults to ``{}``.
+
+        :returns: An ``AsyncResponse`` object for the HEAD request.
+        """
+        return await self.request('HEAD', url, headers)
+
+    async def post(self, url, headers, body):
+        """Performs an HTTP POST on the given url.
+
+        :param str url: URL for performing POST
+        :param dict headers: A dict with the headers that need to be sent with
+            the POST request.
+        :param str body: A string that forms the body of the POST request.
+
+        :returns: An ``AsyncResponse`` object for the POST request.
+        """
+        return await self.request('POST', url, headers, body)
+
+    async def put(self, put_url, headers, body):
+        """Performs an HTTP PUT on the given url.
+
+        :param str url: URL for performing PUT
+        :param dict headers: A dict with the headers that need to be sent with
+            the PUT request.
+        :param str body: A string that forms the body of the PUT request.
+
+        :returns: An ``AsyncResponse`` object for the PUT request.
+        """
+        return await self.request('PUT', put_url, headers, body)
+
+    async def delete(self, delete_url, headers=None):
+        """Performs an HTTP DELETE on the given url.
+
+        :param str url: URL for performing DELETE
+        :param dict headers: A dict with the headers that need to be sent with
+            the DELETE request. Defaults to ``None``.
+
+        :returns: An ``AsyncResponse`` object for the DELETE request.
+        """
+        return await self.request('DELETE', delete_url, headers)
+
+    async def close(self):
+        """Closes all the connections held by this instance.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    login = _Unsupported('Session based login is not supported.')
+    logout = _Unsupported('Session based login is not supported.')
+
+async def execute(steps, request, send):
+    """
+    Runs the steps of ``pipeline.Pipeline.execute_async()``, awaiting
+    ``send`` to send the request.
+    """
+    action, value = next(steps)
+    while action != 'done':
+        outcome = None
+        try:
+            if action == 'send':
+                try:
+                    outcome = await send(request), None
+                except Exception as ex:
+                    outcome = None, ex
+            else:
+                await asyncio.sleep(value)
+        except BaseException as ex:
+            # E.g. asyncio.CancelledError. The stages still learn about it.
+            steps.throw(ex)
+            raise
+        action, value = steps.send(outcome)
+    return value
+
+class AsyncResponse(object):
+    """
+    Holds a completely read aiohttp response and exposes it with the
+    attributes of `requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_
+    that are used by this library: ``status_code``, ``headers``,
+    ``cookies``, ``content``, ``text``, ``url`` and ``elapsed``.
+    """
+
+    def __init__(self, resp, content, elapsed):
+        self.status_code = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.cookies = resp.cookies
+        self.url = str(resp.url)
+        self.encoding = resp.charset
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def text(self):
+        """
+        The body of the response decoded as a str.
+        """
+        return self.content.decode(self.encoding or 'utf-8', 'replace')
+
+    def close(self):
+        """
+        Does nothing, since the response has been read completely.
+        """
+        pass
+
+    def __repr__(self):
+        return '<AsyncResponse [%d]>' % self.status_code
+
+class _AsyncBase(object):
+    """
+    Common base class for the async variants, overriding methods inherited
+    from ``_SpaceBase`` which send requests.
+    """
+
+    async def info(self):
+        """
+        Prints info about this object onto stdout.
+        """
+        import yaml
+        info = self._get_cached_info()
+        if info is None:
+            url = '/api/info?uri=' + self.get_href()
+            response = await self._rest_end_point.get(url)
+            info = self._handle_info(url, response)
+        print('\n', yaml.safe_dump(info, indent=4, default_flow_style=False))
+
+class AsyncService(_AsyncBase, service.Service):
+    """
+    The asyncio variant of ``jnpr.space.service.Service``.
+    """
+    pass
+
+class AsyncCollection(_AsyncBase, collection.Collection):
+    """
+    The asyncio variant of ``jnpr.space.collection.Collection``. See the
+    documentation of the base class for details on the parameters and return
+    values of each coroutine. ``stream()`` and ``export()`` are not available.
+    """
+
+    async def get(self, accept=None, filter_=None,
+                  domain_id=None, paging=None, sortby=None, records=False,
+                  fields=None):
+        """Gets the contained resources of this collection from Space.
+        """
+        url, headers = self._prepare_get(accept, filter_, domain_id,
+                                         paging, sortby, fields)
+        response = await self._rest_end_point.get(url, headers)
+        if records:
+            return self._handle_get_records(url, response, fields)
+        return self._handle_get(url, response, fields)
+
+    async def count(self, filter_=None, domain_id=None):
+        """Gets the number of resources in this collection, optionally
+        matching a filter.
+        """
+        root = await self._get_root(filter_, domain_id, {'limit': 1})
+        if root is None:
+            return 0
+        total = collection._get_total(root)
+        if total is None:
+            root = await self._get_root(filter_, domain_id, None)
+            return len(root) if root is not None else 0
+        return total
+
+    async def exists(self, filter_=None, domain_id=None):
+        """Checks whether this collection has any resources, optionally
+        matching a filter.
+        """
+        root = await self._get_root(filter_, domain_id, {'limit': 1})
+        if root is None:
+            return False
+        total = collection._get_total(root)
+        if total is None:
+            return len(root) > 0
+        return total > 0
+
+    async def _get_root(self, filter_, domain_id, paging):
+        url, headers = self._prepare_get(None, filter_, domain_id,
+                                         paging, None)
+        response = await self._rest_end_point.get(url, headers)
+        return self._handle_get_root(url, response)
+
+    stream = _Unsupported('Use iter_all() instead.')
+    export = _Unsupported('Use a rest.Space instance instead.')
+
+    async def iter_pages(self, page_size=500, prefetch=2, accept=None,
+                         filter_=None, domain_id=None, sortby=None, start=0):
+        """Gets the contained resources of this collection from Space, one
+        page at a time, using ``async for``. While the caller processes a
+        page, the next ``prefetch`` pages are fetched by concurrent tasks.
+        When paging ends, or the generator is closed, those tasks are
+        cancelled.
+        """
+        def fetch(page_start):
+            paging = {'start': page_start, 'limit': page_size}
+            return self.get(accept, filter_, domain_id, paging, sortby)
+
+        if prefetch < 1:
+            while True:
+                page = await fetch(start)
+                if len(page) > 0:
+                    yield page
+                if len(page) < page_size:
+                    return
+                start += page_size
+
+        pending = deque()
+        try:
+            for _ in range(prefetch + 1):
+                pending.append(asyncio.ensure_future(fetch(start)))
+                start += page_size
+
+            while pending:
+                page = await pending.popleft()
+                if len(page) < page_size:
+                    if len(page) > 0:
+                        yield page
+                    return
+                pending.append(asyncio.ensure_future(fetch(start)))
+                start += page_size
+                yield page
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def iter_all(self, page_size=500, prefetch=2, accept=None,
+                       filter_=None, domain_id=None, sortby=None, start=0):
+        """Gets all contained resources of this collection from Space, one
+        resource at a time, using ``async for``. See ``iter_pages()``.
+        """
+        async for page in self.iter_pages(page_size, prefetch, accept,
+                                          filter_, domain_id, sortby, start):
+            for resrc in page:
+                yield resrc
+
+    async def get_all(self, parallelism=8, page_size=500, accept=None,
+                      filter_=None, domain_id=None, sortby=None):
+        """Gets all contained resources of this collection from Space, with
+        up to ``parallelism`` GET requests in progress at a time.
+        """
+        semaphore = asyncio.Semaphore(parallelism)
+
+        async def fetch(page_start):
+            paging = {'start': page_start, 'limit': page_size}
+            async with semaphore:
+                return await self.get(accept, filter_, domain_id, paging,
+                                      sortby)
+
+        first = await fetch(0)
+        resource_list = list(first)
+        if len(first) < page_size:
+            return collection.ResourceList(resource_list, first.total)
+
+        if first.total is None:
+            # Without the total, there is nothing to fan out over
+            async for page in self.iter_pages(page_size, parallelism, accept,
+                                              filter_, domain_id, sortby,
+                                              start=page_size):
+                resource_list.extend(page)
+        elif first.total > page_size:
+            starts = range(page_size, first.total, page_size)
+            for page in await asyncio.gather(*[fetch(start)
+                                               for start in starts]):
+                resource_list.extend(page)
+
+        return collection.ResourceList(resource_list, first.total)
+
+    async def post(self, new_obj=None, accept=None, content_type=None,
+                   request_body=None, xml_name=None, task_monitor=None):
+        """Sends a POST request to the Space server to create a new Resource
+        in this collection.
+        """
+        url, headers, body, saved_root_tag = \
+            self._prepare_post(new_obj, accept, content_type, request_body,
+                               xml_name, task_monitor)
+        response = await self._rest_end_point.post(url, headers, body)
+        return self._handle_post(response, new_obj, saved_root_tag,
+                                 task_monitor)
+
+    def __aiter__(self):
+        """
+        Supports ``async for`` over the resources of this collection.
+        """
+        return self._aiter()
+
+    async def _aiter(self):
+        for resrc in await self.get():
+            yield resrc
+
+class AsyncResource(_AsyncBase, resource.Resource):
+    """
+    The asyncio variant of ``jnpr.space.resource.Resource``. See the
+    documentation of the base class for details on the parameters and return
+    values of each coroutine.
+    """
+
+    async def get(self, attr=None, accept=None, fields=None):
+        """Performs an HTTP GET for this resource and gets its current state.
+        If ``attr`` is given, returns the corresponding XML attribute instead.
+        """
+        if attr is not None:
+            return self._get_xml_attr(attr)
+
+        headers = self._prepare_get(accept)
+        if fields is not None:
+            url = self._rest_end_point._select_fields(self.get_href(), fields)
+            response = await self._rest_end_point.get(url, headers)
+            return self._handle_get(response, fields=fields)
+
+        cached = self._get_cached(headers)
+        if cached is not None:
+            return cached
+        response = await self._rest_end_point.get(self.get_href(), headers)
+        return self._handle_get(response, headers)
+
+    async def put(self, new_val_obj=None, request_body=None,
+                  accept=None, content_type=None):
+        """Modifies the state of this resource on Space by sending a PUT
+        request with the new state.
+        """
+        headers, body = self._prepare_put(new_val_obj, request_body,
+                                          accept, content_type)
+        response = await self._rest_end_point.put(self.get_href(),
+                                                  headers,
+                                                  body)
+        self._handle_put(response)
+
+    async def delete(self):
+        """Deletes this resource on Space by sending a DELETE request with the
+        url of this resource.
+        """
+        url = self._prepare_delete()
+        response = await self._rest_end_point.delete(url)
+        self._handle_delete(url, response)
+
+    async def post(self, accept=None, content_type=None, request_body=None,
+                   task_monitor=None, schedule=None, *args, **kwargs):
+        """Sends a POST request to this resource.
+        """
+        url, headers, body = self._prepare_post(accept, content_type,
+                                                request_body, task_monitor,
+                                                schedule, **kwargs)
+        response = await self._rest_end_point.post(url, headers, body)
+        return self._handle_post(url, response)
+
+class AsyncMethod(_AsyncBase, method.Method):
+    """
+    The asyncio variant of ``jnpr.space.method.Method``. See the
+    documentation of the base class for details on the parameters and return
+    values of each coroutine.
+    """
+
+    async def get(self, accept=None):
+        """Performs a GET corresponding to the Method object.
+        """
+        headers = self._prepare_get(accept)
+        response = await self._rest_end_point.get(self.get_href(), headers)
+        return self._handle_get(response)
+
+    async def post(self, accept=None, content_type=None, request_body=None,
+                   task_monitor=None, schedule=None, *args, **kwargs):
+        """Sends a POST request corresponding to this Method object.
+        """
+        url, headers, body = self._prepare_post(accept, content_type,
+                                                request_body, task_monitor,
+                                                schedule, **kwargs)
+        response = await self._rest_end_point.post(url, headers, body)
+        return self._handle_post(url, response)
@@ -21,11 +21,8 @@
 This module defines the Application class.
 """
 from __future__ import unicode_literals
-from builtins import object
-import os
-import yaml
 
-from jnpr.space import base
+from jnpr.space import base, registry
 
 class Application(base._SpaceBase):
     """
@@ -81,10 +78,10 @@ class Application(base._SpaceBase):
             return self._services[attr]
 
         if attr in self._meta_object._meta_services:
-            from jnpr.space import service
             value = self._meta_object._meta_services[attr]
-            self._services[attr] = service.Service(self._rest_end_point,
-                                                   attr, value, self)
+            service_class = self._rest_end_point._node_class('service')
+            self._services[attr] = service_class(self._rest_end_point,
+                                                 attr, value, self)
             return self._services[attr]
 
         raise AttributeError("No attribute '%s'" % attr)
@@ -106,9 +103,5 @@ class MetaApplication(object):
         """
         self.url = values['url']
         self.values = values
-        path = os.path.abspath(__file__)
-        dir_path = os.path.dirname(path)
-        with open(dir_path + '/descriptions/apps/' +
-                  name + '/services.yml') as services_file:
-            contents = yaml.load(services_file)
-            self._meta_services = contents['services']
+        contents = registry.load('apps/' + name + '/services.yml')
+        self._meta_services = contents['services']
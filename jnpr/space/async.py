@@ -154,8 +154,7 @@ class TaskMonitor(object):
             self.next_msg_url = self._strip_uri(next_msg)
 
         if response.status_code == 200:
-            xml = xmlutil.get_text_from_response(response)
-            return xmlutil.xml2obj(xml)
+            return xmlutil.get_obj_from_response(response)
 
     def wait_for_task(self, task_id):
         """
@@ -211,7 +210,7 @@ class TaskMonitor(object):
         response = self._rest_end_point.get(job_pu_href)
         if response.status_code != 200:
             raise Exception("Failed in GET on %s" % job_pu_href)
-        response_txt = xmlutil.get_text_from_response(response)
+        response_txt = xmlutil.get_bytes_from_response(response)
         response_txt = xmlutil.cleanup(response_txt)
         return xmlutil.xml2obj(response_txt)
 
@@ -25,20 +25,30 @@ functionality.
 from __future__ import unicode_literals
 from __future__ import print_function
 from __future__ import absolute_import
-from builtins import object
-import yaml
+import re
 from jnpr.space import xmlutil
 
+_QUALITY = re.compile(r';\s*q=[0-9.]+')
+
+def _strip_quality(media_type):
+    """
+    Returns the given media type without its quality parameter and spaces.
+    """
+    return _QUALITY.sub('', media_type).replace(' ', '')
+
 class _SpaceBase(object):
     """
     Common base class for Service, Collection, Resource, and Method to
     contain common methods inherited by these sub-classes.
     """
 
+    __slots__ = ()
+
     def info(self):
         """
         Prints info about this object onto stdout.
         """
+        import yaml
         info = self._get_info()
         print('\n', yaml.safe_dump(info, indent=4, default_flow_style=False))
 
@@ -64,13 +74,59 @@ class _SpaceBase(object):
         self._describe_details()
 
     def _get_info(self):
-        url = '/api/info?uri=' + self.get_href()
-        response = self._rest_end_point.get(url)
+        info = self._get_cached_info()
+        if info is None:
+            url = '/api/info?uri=' + self.get_href()
+            response = self._rest_end_point.get(url)
+            info = self._handle_info(url, response)
+        return info
+
+    def _get_cached_info(self):
+        """
+        Helper method to look up the introspection result for this object in
+        the info cache of the Space instance.
+        """
+        return self._rest_end_point.info_cache.get(self.get_href())
+
+    def _negotiate_media_type(self, http_method='GET', header='Accept'):
+        """
+        Helper method to return the media type modeled for this object. If
+        several versions are modeled and the cached introspection result for
+        this object is available, the latest version that Space offers for
+        the given method and header is chosen. No request is sent to Space
+        for this.
+        """
+        meta = self._meta_object
+        if isinstance(meta.media_type, dict) and len(meta.media_type) > 1:
+            info = self._get_cached_info()
+            if info is not None:
+                offered = info['HTTP Methods'].get(http_method, {}).get(header, [])
+                offered = set(_strip_quality(mtype) for mtype in offered)
+                for version in sorted(meta.media_type, key=int, reverse=True):
+                    mtype = meta.media_type[version]
+                    if _strip_quality(mtype) in offered:
+                        return mtype
+        return meta.get_media_type(None)
+
+    def _handle_info(self, url, response):
+        """
+        Helper method to create the info dict from the response for a GET on
+        /api/info.
+        """
         if response.status_code != 200:
             from . import rest
             raise rest.RestException("GET failed on %s" % url, response)
 
-        obj = xmlutil.xml2obj(xmlutil.get_text_from_response(response))
+        info = self._parse_info(response)
+        self._rest_end_point.info_cache.put(self.get_href(), info)
+        return info
+
+    def _parse_info(self, response):
+        """
+        Helper method to create the info dict from the body of the response
+        for a GET on /api/info.
+        """
+        obj = xmlutil.get_obj_from_response(response)
         """
         Create a dict such as this:
         {
@@ -153,8 +209,13 @@ class _SpaceBase(object):
 
     def _describe(self):
         data = {'URL': self.get_href()}
-        data['collections'] = self._describe_collections()
-        data['methods'] = self._describe_methods()
+        # The rest depends only on the meta object, so compute it once
+        described = getattr(self._meta_object, '_described', None)
+        if described is None:
+            described = (self._describe_collections(),
+                         self._describe_methods())
+            self._meta_object._described = described
+        data['collections'], data['methods'] = described
         return data
 
     def _describe_collections(self):
@@ -0,0 +1,670 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+This module defines the caches that can be used with ``rest.Space``.
+"""
+from __future__ import unicode_literals
+from collections import OrderedDict
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+from jnpr.space import pipeline
+
+def _get_header(headers, name):
+    """
+    Returns the value of the given header from a dict of request headers,
+    ignoring the case of the header name.
+    """
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+
+class HttpCacheStage(pipeline.Stage):
+    """
+    A pipeline stage that caches responses to GET requests along with their
+    validators (the ``ETag`` and ``Last-Modified`` response headers), keyed
+    by the Space URL, the user, and the URL and Accept header of the
+    request. When the same GET is
+    sent again, the validators are sent in the ``If-None-Match`` and
+    ``If-Modified-Since`` headers. If Space responds with 304 (Not Modified),
+    a copy of the cached response is returned in place of it. Each caller
+    gets its own copy, so the objects parsed from it can be modified without
+    affecting the cache or other callers.
+
+    Optionally, the responses can also be saved in a persistent ``store``
+    (e.g. a ``SqliteStore``), so that a later process starts with the
+    responses cached by earlier ones and only needs to re-validate them.
+
+    Streamed requests and responses without validators are not cached.
+    """
+
+    def __init__(self, max_entries=1000, store=None, space_url=None,
+                 user=None):
+        """
+        :param int max_entries: Maximum number of responses kept in memory.
+            The least recently used ones are dropped beyond this. This
+            defaults to 1000.
+        :param store: A persistent store for the responses. This defaults to
+            ``None``.
+        :type store: jnpr.space.cache.SqliteStore
+        :param str space_url: URL of the Space cluster the requests are sent
+            to. Responses are only shared between stages (e.g. through the
+            ``store``) with the same ``space_url`` and ``user``.
+        :param str user: Name of the user the requests are sent as.
+        """
+        self.max_entries = max_entries
+        self.store = store
+        self.space_url = space_url or ''
+        self.user = user or ''
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def before(self, request):
+        if request.method != 'GET' or request.stream:
+            return None
+        key = (self.space_url, self.user, request.url,
+               _get_header(request.headers, 'accept') or '')
+        with self._lock:
+            response = self._entries.get(key)
+        if response is None and self.store is not None:
+            response = self.store.get(key)
+            if response is not None:
+                self._remember(key, response)
+        request.cache_key = key
+        request.cached_response = response
+        if response is not None:
+            etag = response.headers.get('etag')
+            if etag is not None:
+                request.headers['If-None-Match'] = etag
+            last_modified = response.headers.get('last-modified')
+            if last_modified is not None:
+                request.headers['If-Modified-Since'] = last_modified
+
+    def after(self, request, response):
+        key = getattr(request, 'cache_key', None)
+        if key is None:
+            return response
+
+        cached = request.cached_response
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self._hits += 1
+                if key in self._entries:
+                    self._entries[key] = self._entries.pop(key)
+            return CachedResponse(cached.url, cached.headers, cached.content)
+
+        with self._lock:
+            self._misses += 1
+        if response.status_code == 200 and \
+           ('etag' in response.headers or 'last-modified' in response.headers):
+            # A copy, so that neither the connection nor the objects parsed
+            # by the caller are kept alive by the cache
+            self._remember(key, CachedResponse(response.url, response.headers,
+                                               response.content))
+            if self.store is not None:
+                self.store.put(key, response)
+        else:
+            with self._lock:
+                self._entries.pop(key, None)
+            if self.store is not None and cached is not None:
+                self.store.delete(key)
+        return response
+
+    def _remember(self, key, response):
+        """
+        Adds a response to the in-memory entries.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = response
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drops all cached responses, including the ones in the persistent
+        store.
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        """
+        Returns a dict with the number of ``hits`` (304 responses answered
+        from the cache), ``misses`` (all other GET responses) and
+        ``entries`` cached in memory.
+        """
+        with self._lock:
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'entries': len(self._entries)}
+
+class CachedResponse(object):
+    """
+    A response loaded from a persistent store. It has the attributes of
+    `requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_
+    that are used by this library.
+    """
+
+    def __init__(self, url, headers, content):
+        self.status_code = 200
+        self.reason = 'OK'
+        self.url = url
+        from requests.structures import CaseInsensitiveDict
+        self.headers = CaseInsensitiveDict(headers)
+        self.cookies = {}
+        self.content = content
+        self.encoding = None
+        self.elapsed = datetime.timedelta(0)
+
+    @property
+    def text(self):
+        """
+        The body of the response decoded as a str.
+        """
+        return self.content.decode('utf-8', 'replace')
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return '<CachedResponse [%d]>' % self.status_code
+
+_KEY_MATCH = 'space_url = ? AND user = ? AND url = ? AND accept = ?'
+
+def _store_key(key):
+    """
+    Returns the given key of a response with ``None`` parts replaced by empty
+    strings, as they are saved by ``SqliteStore``.
+    """
+    return tuple(part or '' for part in key)
+
+class SqliteStore(object):
+    """
+    A persistent store for ``HttpCacheStage`` that saves responses, along
+    with their validators, in a SQLite file. Responses are keyed by the
+    Space URL, the user, and the URL and Accept header of the request, so
+    that several clusters and users can share the same file.
+    Several processes can share the same file: it is used in WAL mode so
+    that readers do not block the writer. When the total size of the saved
+    bodies exceeds ``max_bytes``, the least recently used responses are
+    deleted.
+
+    Instances of this class are thread-safe.
+    """
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, timeout=30):
+        """
+        :param str path: Full pathname of the SQLite file. It is created if
+            it does not exist.
+        :param int max_bytes: Maximum total size of the saved bodies. This
+            defaults to 256 MB.
+        :param float timeout: Seconds to wait for a lock held by another
+            process. This defaults to 30.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        import sqlite3
+        self._db = sqlite3.connect(path, timeout=timeout,
+                                   check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            # Saved by an earlier version, whose keys are not safe to share
+            self._db.execute('DROP TABLE IF EXISTS responses')
+            self._db.execute('PRAGMA user_version = %d' % self.SCHEMA_VERSION)
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                         'space_url TEXT NOT NULL, '
+                         'user TEXT NOT NULL, '
+                         'url TEXT NOT NULL, '
+                         'accept TEXT NOT NULL, '
+                         'headers TEXT NOT NULL, '
+                         'body BLOB NOT NULL, '
+                         'size INTEGER NOT NULL, '
+                         'accessed REAL NOT NULL, '
+                         'PRIMARY KEY (space_url, user, url, accept))')
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                         'ON responses (accessed)')
+
+    def get(self, key):
+        """
+        Returns the saved response for the given key as a
+        ``CachedResponse``, or ``None``.
+
+        :param tuple key: The Space URL, the user, and the URL and Accept
+            header of the request.
+        """
+        key = _store_key(key)
+        with self._lock:
+            row = self._db.execute('SELECT headers, body FROM responses '
+                                   'WHERE ' + _KEY_MATCH, key).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE responses SET accessed = ? '
+                             'WHERE ' + _KEY_MATCH, (time.time(),) + key)
+        return CachedResponse(key[2], json.loads(row[0]), bytes(row[1]))
+
+    def put(self, key, response):
+        """
+        Saves a response, replacing the one saved earlier for the same key.
+        Then deletes the least recently used responses if the size limit is
+        exceeded.
+
+        :param tuple key: The Space URL, the user, and the URL and Accept
+            header of the request.
+        :param response: The response to save.
+        """
+        headers = dict((key.lower(), response.headers[key])
+                       for key in ('content-type', 'etag', 'last-modified')
+                       if key in response.headers)
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO responses '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             _store_key(key) +
+                             (json.dumps(headers), memoryview(body),
+                              len(body), time.time()))
+            self._evict()
+
+    def _evict(self):
+        """
+        Deletes the least recently used responses until the total size is
+        within the limit.
+        """
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) '
+                                 'FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute('SELECT space_url, user, url, accept, size '
+                                'FROM responses '
+                                'ORDER BY accessed').fetchall()
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            for row in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute('DELETE FROM responses WHERE ' + _KEY_MATCH,
+                                 tuple(row[:4]))
+                total -= row[4]
+            self._db.execute('COMMIT')
+        except Exception:
+            self._db.execute('ROLLBACK')
+            raise
+
+    def delete(self, key):
+        """
+        Deletes the saved response for the given key.
+
+        :param tuple key: The Space URL, the user, and the URL and Accept
+            header of the request.
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM responses WHERE ' + _KEY_MATCH,
+                             _store_key(key))
+
+    def clear(self):
+        """
+        Deletes all saved responses.
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+
+    def stats(self):
+        """
+        Returns a dict with the number of saved ``entries`` and their total
+        size in ``bytes``.
+        """
+        with self._lock:
+            row = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) '
+                                   'FROM responses').fetchone()
+        return {'entries': row[0], 'bytes': row[1]}
+
+    def close(self):
+        """
+        Closes the SQLite file.
+        """
+        with self._lock:
+            self._db.close()
+
+def _normalize_media_type(media_type):
+    """
+    Returns the given media type in lower case, without spaces and without
+    its charset parameter, for comparing requested and returned media types.
+    """
+    params = media_type.lower().replace(' ', '').split(';')
+    return ';'.join(param for param in params
+                    if not param.startswith('charset='))
+
+class ResourceCache(object):
+    """
+    A bounded in-process cache of resource states, keyed by href. Each entry
+    holds the body (and Content-Type) of the response the state was fetched
+    with and expires after a time-to-live (TTL) that can be set per service,
+    collection or resource type. There is one entry per resource, whichever
+    way it was fetched: a lookup for a given media type only hits if the
+    entry has that media type (as requested or as returned by Space), while
+    a lookup for any media type hits in all cases. The least recently used
+    entries are evicted when the number of entries or the total size of
+    their bodies exceeds the given limits.
+
+    When set as the ``resource_cache`` of a ``rest.Space`` instance, it is
+    used by ``Resource.get()`` and ``factory.fetch_resource()``. Entries for
+    a resource are invalidated by ``Resource.put()`` and
+    ``Resource.delete()``, and entries for all resources under a collection
+    by ``Collection.post()``.
+
+    Each hit returns a new response object, from which the caller parses
+    new objects. Changes made to them are never seen by the cache or by
+    other callers.
+
+    Instances of this class are thread-safe.
+    """
+
+    def __init__(self, default_ttl=60, ttls=None,
+                 max_entries=10000, max_bytes=64 * 1024 * 1024):
+        """
+        :param float default_ttl: TTL in seconds for entries not covered by
+            ``ttls``. This defaults to 60. A TTL of 0 disables caching.
+        :param dict ttls: TTLs in seconds keyed by the dotted name of a
+            service (e.g. ``device_management``), a collection (e.g.
+            ``user_management.capabilities``) or a resource type (e.g.
+            ``device_management.device``). The most specific match is used.
+            This defaults to ``None``.
+        :param int max_entries: Maximum number of entries. This defaults to
+            10000.
+        :param int max_bytes: Maximum total size of the entries. This
+            defaults to 64 MB.
+        """
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls) if ttls else {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def ttl_for(self, names):
+        """
+        Returns the TTL for the first of the given dotted names which has one
+        set, or the default TTL.
+
+        :param list names: Dotted names, most specific first.
+        """
+        for name in names:
+            if name in self.ttls:
+                return self.ttls[name]
+        return self.default_ttl
+
+    def get(self, href, media_type):
+        """
+        Returns a ``CachedResponse`` with the cached body for the given href
+        and media type, or ``None`` if there is no fresh entry for them.
+
+        :param str href: The href of the resource.
+        :param str media_type: The media type wanted, or ``None`` for any.
+        """
+        with self._lock:
+            entry = self._entries.pop(href, None)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[1] <= time.time():
+                self._bytes -= entry[2]
+                self._misses += 1
+                return None
+            self._entries[href] = entry
+            if media_type is not None and \
+               _normalize_media_type(media_type) not in entry[0][2]:
+                self._misses += 1
+                return None
+            self._hits += 1
+        content, content_type, _ = entry[0]
+        headers = {'Content-Type': content_type} if content_type else {}
+        return CachedResponse(href, headers, content)
+
+    def put(self, href, media_type, response, names=()):
+        """
+        Adds the body of a response to the cache.
+
+        :param str href: The href of the resource.
+        :param str media_type: The media type the resource was requested
+            as, or ``None``. It replaces any entry cached for the href.
+        :param response: The response with the state of the resource.
+        :param list names: Dotted names used to look up the TTL. See
+            ``ttl_for()``.
+        """
+        ttl = self.ttl_for(names)
+        content = response.content
+        size = len(content)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        content_type = response.headers.get('content-type')
+        media_types = frozenset(_normalize_media_type(mtype)
+                                for mtype in (media_type, content_type)
+                                if mtype)
+        value = (content, content_type, media_types)
+        with self._lock:
+            old = self._entries.pop(href, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[href] = (value, time.time() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or \
+                  self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._evictions += 1
+
+    def invalidate(self, href):
+        """
+        Drops the entries for the given href and for all hrefs under it.
+        """
+        prefix = href.rstrip('/') + '/'
+        with self._lock:
+            for key in list(self._entries):
+                if key == href or key.startswith(prefix):
+                    self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        """
+        Drops all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns a dict with the number of ``hits``, ``misses`` (including
+        expired entries) and ``evictions``, and the current number of
+        ``entries`` and their total size in ``bytes``.
+        """
+        with self._lock:
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'evictions': self._evictions,
+                    'entries': len(self._entries),
+                    'bytes': self._bytes}
+
+class InfoCache(object):
+    """
+    A cache of the results of introspection (``/api/info``) calls, keyed by
+    URL template. Digits in URLs are replaced by ``{id}``, exactly as by
+    ``media_types.get_media_type()``, so that all resources of a type share
+    one entry. Introspection results do not change while a Space cluster
+    is running, so entries never expire. The cache can be saved to a JSON
+    file and loaded from it by later processes.
+
+    Each ``rest.Space`` instance has one of these as ``info_cache``. It is
+    used by ``info()`` and to negotiate media type versions.
+
+    Instances of this class are thread-safe.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param str path: Full pathname of a JSON file to load the cache from
+            (if it exists) and to save it into. This defaults to ``None``.
+        """
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def template(href):
+        """
+        Returns the URL template for the given href.
+        """
+        return re.sub(r'\d+', '{id}', href.split('?')[0])
+
+    def get(self, href):
+        """
+        Returns the cached introspection result for the given href, or
+        ``None``.
+        """
+        with self._lock:
+            return self._entries.get(self.template(href))
+
+    def put(self, href, info):
+        """
+        Caches the introspection result for the given href.
+        """
+        with self._lock:
+            self._entries[self.template(href)] = info
+
+    def load(self, path):
+        """
+        Adds the entries saved in the given JSON file to this cache.
+        """
+        with open(path) as info_file:
+            entries = json.load(info_file)
+        with self._lock:
+            self._entries.update(entries)
+
+    def save(self, path=None):
+        """
+        Saves all entries into the given JSON file, or into the file given
+        when creating this cache.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError('No path given to save the info cache into')
+        with self._lock:
+            data = json.dumps(self._entries, indent=1, sort_keys=True)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as info_file:
+            info_file.write(data)
+        os.rename(tmp_path, path)
+
+    def prewarm(self, rest_end_point, placeholder_id=1):
+        """
+        Walks the whole tree of applications, services, collections,
+        resources and methods described for the given Space instance and
+        fetches the introspection result for each of them that is not cached
+        yet. Each described type is visited once, through the first path
+        found to it. Resource URLs are formed using ``placeholder_id``. URLs
+        for which the introspection call fails are skipped.
+
+        :returns: The number of introspection calls made.
+        """
+        from jnpr.space import rest
+        nodes = []
+        for name in sorted(rest_end_point._meta_applications):
+            try:
+                nodes.append(getattr(rest_end_point, name))
+            except (IOError, OSError):
+                # Not described in this version of the library
+                pass
+        nodes.extend(getattr(rest_end_point, name)
+                     for name in sorted(rest_end_point._meta_services))
+        # The tree has cycles (e.g. roles and capabilities contain each
+        # other), so each described type is visited only once
+        seen = set()
+        count = 0
+        while nodes:
+            node = nodes.pop()
+            if node._meta_object in seen:
+                continue
+            seen.add(node._meta_object)
+            if self.get(node.get_href()) is None:
+                count += 1
+                try:
+                    node._get_info()
+                except rest.RestException:
+                    pass
+            nodes.extend(_child_nodes(node, placeholder_id))
+        return count
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+def _child_nodes(node, placeholder_id):
+    """
+    Returns the nodes directly under the given node of the tree reached
+    through a ``rest.Space`` instance.
+    """
+    meta = node._meta_object
+    names = []
+    if hasattr(meta, '_meta_services'):
+        # An application
+        names.extend(meta._meta_services)
+    elif hasattr(meta, 'resource_type'):
+        # A collection
+        names.extend(meta.methods)
+        if meta.resource_type and not meta.single_object_collection and \
+           not meta.named_members:
+            resource_class = node._rest_end_point._resource_class(
+                meta.resource_type)
+            resrc = resource_class(meta.resource_type, node._rest_end_point,
+                                   parent=node)
+            resrc.id = placeholder_id
+            return [resrc] + [getattr(node, name) for name in names]
+    elif isinstance(getattr(meta, 'values', None), dict):
+        # A service or a resource
+        for key in ('collections', 'methods'):
+            if meta.values.get(key):
+                names.extend(meta.values[key])
+    children = []
+    for name in names:
+        child = getattr(node, name)
+        if child is not None and hasattr(child, '_meta_object'):
+            children.append(child)
+    return children
@@ -0,0 +1,539 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Generates a Python module with static classes for the whole tree of
+services, applications, collections, resources and methods described under
+the descriptions directory of this package.
+
+A ``rest.Space`` instance resolves the meta data of each node on the fly:
+every attribute access walks ``__getattr__`` and the meta objects, and
+every resource created looks its meta object up by type name. The
+generated module has one class per node of the tree instead, in which:
+
+* Contained nodes are class attributes that create the node on first access
+  and keep it in the same caches that ``__getattr__`` uses.
+* Meta objects are built once, when the module is imported, from literal
+  copies of the descriptions. Resources take their meta object from their
+  class.
+* Hrefs and media types that are fixed by the descriptions are returned
+  as constants. Request templates are bound by name in the meta objects
+  and compiled on first use, as usual.
+
+The module is generated by running::
+
+    python -m jnpr.space.codegen [-o OUTPUT]
+
+which writes ``jnpr/space/generated.py`` unless another output path is
+given. The ``Space`` class of the generated module can be used in place of
+``jnpr.space.rest.Space``::
+
+    from jnpr.space.generated import Space
+    spc = Space(url, user, passwd)
+
+The module must be generated again whenever the descriptions change.
+``is_stale()`` tells whether that is needed.
+"""
+from __future__ import unicode_literals
+import argparse
+import hashlib
+import keyword
+import os
+import pprint
+import sys
+
+from jnpr.space import (application, collection, method, registry, resource,
+                        rest, service, xmlutil)
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'generated.py')
+
+class Child(object):
+    """
+    A class attribute of a generated class that gives access to a contained
+    node. The node is created on first access and kept in the given cache
+    dict of the instance, e.g. ``_collections``.
+    """
+
+    def __init__(self, name, class_name, cache):
+        """
+        :param str name: Name of the contained node.
+        :param str class_name: Name of the generated class of the node, in
+            the module that defines the owning class.
+        :param str cache: Name of the instance attribute holding the dict
+            in which the node is kept.
+        """
+        self.name = name
+        self.class_name = class_name
+        self.cache = cache
+        self._module = None
+        self._cls = None
+
+    def __set_name__(self, owner, name):
+        self._module = owner.__module__
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        nodes = getattr(obj, self.cache)
+        try:
+            return nodes[self.name]
+        except KeyError:
+            pass
+        cls = self._cls
+        if cls is None:
+            # Resolved late since generated classes refer to each other
+            cls = self._cls = getattr(sys.modules[self._module],
+                                      self.class_name)
+        node = cls._create(obj, self.name)
+        nodes[self.name] = node
+        return node
+
+class GeneratedNode(object):
+    """
+    Implements the functionality shared by all generated classes.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, attr):
+        """
+        Gives access to contained elements using their 'xml names'. Unlike
+        the dynamic classes, this has to go through the class attributes
+        first.
+        """
+        return getattr(self, xmlutil.unmake_xml_name(attr))
+
+class GeneratedSpace(rest.Space):
+    """
+    Base class of the generated Space class.
+    """
+
+    #
+    # Generated resource classes keyed by fully qualified type name
+    #
+    _resource_classes = {}
+
+    def _resource_class(self, type_name):
+        # Generated resource classes are plain Resources, so they are not
+        # used if a sub-class swapped the resource class
+        cls = self._resource_classes.get(type_name)
+        if cls is not None and \
+           self._node_classes['resource'] == rest.Space._node_classes['resource']:
+            return cls
+        return super(GeneratedSpace, self)._resource_class(type_name)
+
+class GeneratedApplication(GeneratedNode, application.Application):
+    """
+    Base class of generated application classes.
+    """
+
+    @classmethod
+    def _create(cls, space, name):
+        return cls(space, name, cls._values)
+
+class GeneratedService(GeneratedNode, service.Service):
+    """
+    Base class of generated service classes.
+    """
+
+    @classmethod
+    def _create(cls, parent, name):
+        if isinstance(parent, application.Application):
+            return cls(parent._rest_end_point, name, cls._values, parent)
+        return cls(parent, name, cls._values)
+
+class GeneratedCollection(GeneratedNode, collection.Collection):
+    """
+    Base class of generated collection classes.
+    """
+
+    @classmethod
+    def _create(cls, parent, name):
+        return cls(parent, name, cls._meta)
+
+class GeneratedMethod(GeneratedNode, method.Method):
+    """
+    Base class of generated method classes.
+    """
+
+    @classmethod
+    def _create(cls, parent, name):
+        return cls(parent, name, cls._meta)
+
+class GeneratedResource(GeneratedNode, resource.Resource):
+    """
+    Base class of generated resource classes. Contained collections and
+    methods are class attributes, so ``__getattr__`` only has to look up
+    fields of the XML data.
+    """
+
+    def _init_meta_data(self, rest_end_point, type_name):
+        self._meta_object = self._meta
+
+    def __getattr__(self, attr):
+        return self._get_field(attr)
+
+def _camel(name):
+    """
+    Helper method to turn a name like 'device_management' into
+    'DeviceManagement'.
+    """
+    return ''.join(part[:1].upper() + part[1:] for part in name.split('_'))
+
+def _literal(value, indent):
+    """
+    Helper method to return the Python source for the given value parsed
+    from a description file.
+    """
+    text = pprint.pformat(value, width=79 - indent, sort_dicts=False)
+    return text.replace('\n', '\n' + ' ' * indent)
+
+def _fixed_media_type(meta):
+    """
+    Helper method to return the media type that ``_negotiate_media_type()``
+    always picks for the given meta object, or None if it is not fixed.
+    """
+    mtype = meta.media_type
+    if isinstance(mtype, dict):
+        return next(iter(mtype.values())) if len(mtype) == 1 else None
+    return mtype
+
+def _attr_name(name, base):
+    """
+    Helper method to tell whether a contained node can be a class attribute
+    of a generated class with the given base. Names of existing attributes
+    of the base win over contained nodes, as they do with ``__getattr__``.
+    """
+    return name.isidentifier() and not keyword.iskeyword(name) and \
+        not hasattr(base, name)
+
+class _Generator(object):
+    """
+    Helper class that walks the descriptions and collects the source of the
+    generated classes.
+    """
+
+    def __init__(self):
+        self.sources = []
+        self.class_names = set()
+        self.resources = []
+        self.collections = []
+        self.methods = []
+        self.services = []
+        self.applications = []
+        self.space_attrs = []
+        self.resource_map = []
+
+    def load(self, rel_path):
+        self.sources.append(rel_path)
+        return registry.load(rel_path)
+
+    def unique(self, name):
+        base, n = name, 1
+        while name in self.class_names:
+            n += 1
+            name = '%s%d' % (base, n)
+        self.class_names.add(name)
+        return name
+
+    def run(self):
+        services = self.load('services.yml')['services'] or {}
+        for name, values in services.items():
+            cls_name = self.service(None, name, values)
+            self.space_attrs.append((name, cls_name, '_services'))
+
+        apps = self.load('applications.yml')['applications'] or {}
+        for app_name, values in apps.items():
+            rel_path = 'apps/' + app_name + '/services.yml'
+            if not os.path.exists(os.path.join(registry._DESCRIPTIONS_DIR,
+                                               rel_path)):
+                # Not described, so not reachable dynamically either
+                continue
+            app_services = self.load(rel_path)['services'] or {}
+            attrs = []
+            for name, svc_values in app_services.items():
+                cls_name = self.service(app_name, name, svc_values)
+                attrs.append((name, cls_name, '_services'))
+            cls_name = self.unique(_camel(app_name) + 'Application')
+            self.applications.append(self.node_class(
+                cls_name, 'GeneratedApplication',
+                'Application ``%s`` (%s).' % (app_name, values['url']),
+                ['_values = %s' % _literal(values, 14)],
+                attrs, application.Application,
+                href=repr(values['url'])))
+            self.space_attrs.append((app_name, cls_name, '_applications'))
+
+    def service(self, app_name, name, values):
+        if app_name is not None:
+            rel_path = 'apps/' + app_name + '/' + name + '.yml'
+            prefix = _camel(app_name) + _camel(name)
+        else:
+            rel_path = name + '.yml'
+            prefix = _camel(name)
+        contents = self.load(rel_path)
+
+        for key, res_values in (contents['resources'] or {}).items():
+            self.resource(app_name, name, prefix, key, res_values)
+
+        attrs = []
+        for key, coll_values in (contents['collections'] or {}).items():
+            meta = collection.get_meta_object(app_name, name, key, coll_values)
+            expr = 'collection.get_meta_object(%r, %r, %r,\n%s%s)' % (
+                app_name, name, key, ' ' * 12, _literal(coll_values, 12))
+            cls_name = self.collection(app_name, prefix + _camel(key), key,
+                                       meta, expr, values['url'])
+            attrs.append((key, cls_name, '_collections'))
+        for key, mthd_values in (contents['methods'] or {}).items():
+            meta = method.get_meta_object(app_name, name, key, mthd_values)
+            expr = 'method.get_meta_object(%r, %r, %r,\n%s%s)' % (
+                app_name, name, key, ' ' * 12, _literal(mthd_values, 12))
+            cls_name = self.method(prefix + _camel(key), meta, expr,
+                                   values['url'])
+            attrs.append((key, cls_name, '_methods'))
+
+        full_name = '.'.join(filter(None, [app_name, name]))
+        cls_name = self.unique(prefix + 'Service')
+        self.services.append(self.node_class(
+            cls_name, 'GeneratedService',
+            'Service ``%s`` (%s).' % (full_name, values['url']),
+            ['_values = %s' % _literal(values, 14)],
+            attrs, service.Service, href=repr(values['url'])))
+        return cls_name
+
+    def resource(self, app_name, service_name, prefix, key, values):
+        type_name = '.'.join(filter(None, [app_name, service_name, key]))
+        meta = resource.get_meta_object(type_name, values)
+        cls_name = self.unique(prefix + _camel(key) + 'Resource')
+
+        attrs = []
+        for name, coll_meta in meta.collections.items():
+            expr = '%s._meta.collections[%r]' % (cls_name, name)
+            coll_cls = self.collection(app_name, prefix + _camel(key) +
+                                       _camel(name), name, coll_meta, expr,
+                                       None)
+            attrs.append((name, coll_cls, '_collections'))
+        for name, mthd_meta in meta.methods.items():
+            expr = '%s._meta.methods[%r]' % (cls_name, name)
+            mthd_cls = self.method(prefix + _camel(key) + _camel(name),
+                                   mthd_meta, expr, None)
+            attrs.append((name, mthd_cls, '_methods'))
+
+        body = ['_meta = resource.get_meta_object(%r,\n%s%s)' % (
+            type_name, ' ' * 12, _literal(values, 12))]
+        self.resources.append(self.node_class(
+            cls_name, 'GeneratedResource',
+            'Resource type ``%s``.' % type_name, body, attrs,
+            resource.Resource, media_type=_fixed_media_type(meta)))
+        self.resource_map.append((type_name, cls_name))
+
+    def collection(self, app_name, prefix, name, meta, meta_expr, parent_url):
+        cls_name = self.unique(prefix + 'Collection')
+        if meta.url is not None:
+            url = meta.url
+        elif parent_url is not None:
+            url = parent_url + '/' + xmlutil.make_xml_name(name)
+        else:
+            url = None
+
+        attrs = []
+        for key, values in meta.methods.items():
+            # Collection methods are keyed by the collection name in place
+            # of the service name, as MetaCollection.create_method() does
+            mthd_meta = method.get_meta_object(app_name, name, key, values)
+            expr = 'method.get_meta_object(%r, %r, %r,\n%s%s)' % (
+                app_name, name, key, ' ' * 12, _literal(values, 12))
+            mthd_cls = self.method(prefix + _camel(key), mthd_meta, expr,
+                                   url)
+            attrs.append((key, mthd_cls, '_methods'))
+
+        if url is not None:
+            href = repr(url)
+        else:
+            href = 'self._parent.get_href() + %r' % (
+                '/' + xmlutil.make_xml_name(name))
+        self.collections.append(self.node_class(
+            cls_name, 'GeneratedCollection',
+            'Collection ``%s``.' % meta.key, ['_meta = ' + meta_expr],
+            attrs, collection.Collection, href=href,
+            media_type=_fixed_media_type(meta)))
+        return cls_name
+
+    def method(self, prefix, meta, meta_expr, parent_url):
+        cls_name = self.unique(prefix + 'Method')
+        if parent_url is not None:
+            href = repr(parent_url if meta.name == '-' else
+                        parent_url + '/' + meta.name)
+        elif meta.name == '-':
+            href = 'self._parent.get_href()'
+        else:
+            href = 'self._parent.get_href() + %r' % ('/' + meta.name)
+        self.methods.append(self.node_class(
+            cls_name, 'GeneratedMethod', 'Method ``%s``.' % meta.key,
+            ['_meta = ' + meta_expr],
+            [], method.Method, href=href,
+            media_type=_fixed_media_type(meta)))
+        return cls_name
+
+    def node_class(self, cls_name, base, doc, body, attrs, dynamic_base,
+                   href=None, media_type=None):
+        lines = ['class %s(codegen.%s):' % (cls_name, base),
+                 '    """%s"""' % doc, '']
+        lines.extend('    ' + line for line in body)
+        for name, child_cls, cache in attrs:
+            if _attr_name(name, dynamic_base):
+                lines.append('    %s = codegen.Child(%r, %r, %r)' %
+                             (name, name, child_cls, cache))
+        if href is not None:
+            lines.extend(['', '    def get_href(self):',
+                          '        return ' + href])
+        if media_type is not None:
+            lines.extend(['', "    def _negotiate_media_type(self, "
+                          "http_method='GET', header='Accept'):",
+                          '        return %r' % media_type])
+        return '\n'.join(lines)
+
+    def render(self):
+        space = ['class Space(codegen.GeneratedSpace):',
+                 '    """',
+                 '    A ``jnpr.space.rest.Space`` whose tree of objects is made of the',
+                 '    generated classes.',
+                 '    """',
+                 '']
+        for name, cls_name, cache in self.space_attrs:
+            if _attr_name(name, rest.Space):
+                space.append('    %s = codegen.Child(%r, %r, %r)' %
+                             (name, name, cls_name, cache))
+        space.append('')
+        space.append('    _resource_classes = {')
+        space.extend('        %r: %s,' % item for item in self.resource_map)
+        space.append('    }')
+
+        parts = [_HEADER,
+                 'SOURCES = %s\n\nDIGEST = %r' % (
+                     _literal(tuple(self.sources), 10), digest(self.sources))]
+        for title, classes in (('Resources', self.resources),
+                               ('Collections', self.collections),
+                               ('Methods', self.methods),
+                               ('Services', self.services),
+                               ('Applications', self.applications)):
+            parts.append('\n#\n# %s\n#' % title)
+            parts.extend(classes)
+        parts.append('\n'.join(space))
+        return '\n\n'.join(parts) + '\n'
+
+_HEADER = '''\
+#
+# Generated by jnpr.space.codegen from the descriptions of jnpr.space.
+# Do not edit. Run 'python -m jnpr.space.codegen' again instead.
+#
+
+"""
+Classes generated from the descriptions of jnpr.space. See
+jnpr.space.codegen for details.
+"""
+from __future__ import unicode_literals
+
+from jnpr.space import codegen, collection, method, resource'''
+
+def digest(sources):
+    """
+    Returns a digest of the contents of the given description files.
+
+    :param list sources: Paths of the files relative to the descriptions
+        directory.
+    """
+    sha = hashlib.sha1()
+    for rel_path in sources:
+        sha.update(rel_path.encode('utf-8') + b'\0')
+        with open(os.path.join(registry._DESCRIPTIONS_DIR, rel_path),
+                  'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+def render():
+    """
+    Returns the source of the generated module for the current
+    descriptions.
+    """
+    gen = _Generator()
+    gen.run()
+    return gen.render()
+
+def generate(output=None):
+    """
+    Generates the module and writes it to the given path.
+
+    :param str output: Path of the module. This defaults to
+        ``jnpr/space/generated.py`` in this package.
+
+    :returns: The path written.
+    """
+    output = output or DEFAULT_OUTPUT
+    source = render()
+    tmp = '%s.%d.tmp' % (output, os.getpid())
+    with open(tmp, 'w') as f:
+        f.write(source)
+    os.rename(tmp, output)
+    return output
+
+def is_stale(module):
+    """
+    Tells whether the given generated module was made from descriptions
+    other than the current ones.
+
+    :param module: The generated module, e.g. ``jnpr.space.generated``.
+
+    :returns: True if the module has to be generated again.
+    """
+    try:
+        return digest(module.SOURCES) != module.DIGEST
+    except (IOError, OSError):
+        return True
+
+def main(argv=None):
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m jnpr.space.codegen',
+        description='Generate static classes from the descriptions.')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help='path of the module to write (default: %(default)s)')
+    parser.add_argument('--check', action='store_true',
+                        help='only check that the module is up to date, '
+                        'exiting with status 1 if it is not')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        try:
+            with open(args.output) as f:
+                current = f.read()
+        except (IOError, OSError):
+            current = None
+        if current != render():
+            print('%s is missing or out of date' % args.output)
+            return 1
+        return 0
+
+    print('Wrote %s' % generate(args.output))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,11 +22,11 @@ This module defines the Collection class.
 """
 from __future__ import unicode_literals
 from __future__ import print_function
-from builtins import str
-from builtins import object
-from lxml import etree
+from collections import deque
+from lxml import etree, objectify
 
 from jnpr.space import base, xmlutil, rest
+from jnpr.space.records import RecordBuilder, RecordList
 
 class Collection(base._SpaceBase):
     """
@@ -109,7 +109,8 @@ class Collection(base._SpaceBase):
         return self.__getattr__(xmlutil.unmake_xml_name(attr))
 
     def get(self, accept=None, filter_=None,
-            domain_id=None, paging=None, sortby=None):
+            domain_id=None, paging=None, sortby=None, records=False,
+            fields=None):
         """Gets the contained resources of this collection from Space.
 
         :param str accept: This can be used to supply a media-type that must
@@ -136,19 +137,380 @@ class Collection(base._SpaceBase):
             This parameter defaults to ``None``.
         :type sortby: list of str
 
-        :returns: A list of ``jnpr.space.resource.Resource`` objects.
+        :param bool records: If ``True``, the contained resources are returned
+            as read-only records (see ``jnpr.space.records``) instead of
+            Resource objects. Records hold plain Python values and are much
+            cheaper to create and to read. This defaults to ``False``.
+
+        :param fields: A list of field names to keep in the contained
+            resources, e.g. ``['name', 'ipAddr', 'domain.name']``. For a
+            nested field, the whole top-level element is kept. All other
+            elements are dropped while the response is parsed, which saves
+            memory and time when only a few fields are needed. XML attributes
+            such as ``href`` and ``key`` are always kept. If the Space
+            instance has a ``field_selector``, the fields are also selected
+            on the server. This parameter defaults to ``None``.
+        :type fields: list of str
+
+        :returns: A list of ``jnpr.space.resource.Resource`` objects, or a
+            ``jnpr.space.records.RecordList`` if ``records`` is ``True``.
+
+        :raises: ``jnpr.space.rest.RestException`` if the GET method results in an
+            error response. The exception's ``response`` attribute will have the
+            full response from Space.
+
+        """
+        url, headers = self._prepare_get(accept, filter_, domain_id,
+                                         paging, sortby, fields)
+        response = self._rest_end_point.get(url, headers)
+        if records:
+            return self._handle_get_records(url, response, fields)
+        return self._handle_get(url, response, fields)
+
+    def stream(self, accept=None, filter_=None,
+               domain_id=None, paging=None, sortby=None, chunk_size=65536,
+               records=False, fields=None):
+        """Gets the contained resources of this collection from Space, one at
+        a time. Unlike ``get()``, the response is parsed incrementally while
+        it is being downloaded and each resource is yielded as soon as its
+        XML has been parsed. Resources already yielded are not retained by
+        the parser, so that memory usage stays flat regardless of the size of
+        the collection. For example:
+
+            >>> for cfg in s.config_file_management.config_files.stream():
+                    print(cfg.id)
+
+        See ``get()`` for a description of the ``accept``, ``filter_``,
+        ``domain_id``, ``paging``, ``sortby`` and ``fields`` parameters.
+
+        :param int chunk_size: Number of bytes read from the connection at a
+            time. This defaults to 64 KB.
+
+        :param bool records: If ``True``, read-only records are yielded
+            instead of Resource objects. See ``get()``. This defaults to
+            ``False``.
+
+        :returns: A generator of ``jnpr.space.resource.Resource`` objects, or
+            of records if ``records`` is ``True``.
 
         :raises: ``jnpr.space.rest.RestException`` if the GET method results in an
             error response. The exception's ``response`` attribute will have the
             full response from Space.
 
+        """
+        url, headers = self._prepare_get(accept, filter_, domain_id,
+                                         paging, sortby, fields)
+        response = self._rest_end_point.request('GET', url, headers,
+                                                stream=True)
+        try:
+            if response.status_code != 200 or \
+               self._meta_object.single_object_collection or \
+               self._meta_object.named_members:
+                # Nothing to gain from streaming these. Read the whole body
+                # so that it remains available (e.g. in RestException).
+                response.content
+                handle = self._handle_get_records if records \
+                    else self._handle_get
+                for resrc in handle(url, response, fields):
+                    yield resrc
+                return
+
+            chunks = response.iter_content(chunk_size)
+            if records:
+                builder = RecordBuilder()
+                for child in xmlutil.iter_children(chunks, fields=fields):
+                    if isinstance(child.tag, str):
+                        yield builder.build(child)
+                return
+
+            for child in xmlutil.iter_children(chunks, objectified=True,
+                                               fields=fields):
+                try:
+                    resrc = self._create_resource(child)
+                except Exception as ex:
+                    if getattr(ex, 'ignore', False):
+                        continue
+                    raise
+                yield resrc
+        finally:
+            response.close()
+
+    def iter_pages(self, page_size=500, prefetch=2, accept=None,
+                   filter_=None, domain_id=None, sortby=None, start=0):
+        """Gets the contained resources of this collection from Space, one
+        page at a time. While the caller processes a page, the next
+        ``prefetch`` pages are fetched by background threads, so that the
+        time spent waiting for Space overlaps with the time spent on
+        processing. For example:
+
+            >>> for page in s.config_file_management.config_files.iter_pages():
+                    print(len(page))
+
+        Paging ends with the first page that has fewer than ``page_size``
+        resources. Pages fetched in advance beyond that page are dropped.
+        When paging ends, or the generator is closed, fetches that have not
+        started are cancelled and those in progress are waited for.
+
+        See ``get()`` for a description of the ``accept``, ``filter_``,
+        ``domain_id`` and ``sortby`` parameters.
+
+        :param int page_size: Number of resources to fetch per GET request.
+            This defaults to 500.
+        :param int prefetch: Number of pages to fetch in advance. This
+            defaults to 2. If it is 0, pages are fetched only when requested
+            by the caller.
+        :param int start: Index of the first resource to fetch. This defaults
+            to 0.
+
+        :returns: A generator of ``ResourceList`` objects.
+
+        :raises: ``jnpr.space.rest.RestException`` if any GET results in an
+            error response.
+
+        """
+        def fetch(page_start):
+            paging = {'start': page_start, 'limit': page_size}
+            return self.get(accept, filter_, domain_id, paging, sortby)
+
+        if prefetch < 1:
+            while True:
+                page = fetch(start)
+                if len(page) > 0:
+                    yield page
+                if len(page) < page_size:
+                    return
+                start += page_size
+
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        pending = deque()
+        try:
+            for _ in range(prefetch + 1):
+                pending.append(executor.submit(fetch, start))
+                start += page_size
+
+            while pending:
+                page = pending.popleft().result()
+                if len(page) < page_size:
+                    if len(page) > 0:
+                        yield page
+                    return
+                pending.append(executor.submit(fetch, start))
+                start += page_size
+                yield page
+        finally:
+            # Pages not started yet are dropped. Those being fetched are
+            # waited for, so that no request is sent once this returns.
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def iter_all(self, page_size=500, prefetch=2, accept=None,
+                 filter_=None, domain_id=None, sortby=None, start=0):
+        """Gets all contained resources of this collection from Space, one
+        resource at a time. The resources are fetched page by page, with the
+        next pages prefetched in the background. See ``iter_pages()`` for
+        a description of the parameters.
+
+        :returns: A generator of ``jnpr.space.resource.Resource`` objects.
+
+        """
+        for page in self.iter_pages(page_size, prefetch, accept, filter_,
+                                    domain_id, sortby, start):
+            for resrc in page:
+                yield resrc
+
+    def get_all(self, parallelism=8, page_size=500, accept=None,
+                filter_=None, domain_id=None, sortby=None):
+        """Gets all contained resources of this collection from Space, using
+        several GET requests in parallel. The first page is fetched to learn
+        the total number of resources in the collection. All remaining pages
+        are then fetched at once using up to ``parallelism`` connections and
+        merged in order. If Space does not report the total, the remaining
+        pages are fetched as by ``iter_pages()``. For example:
+
+            >>> jobs = s.job_management.jobs.get_all(parallelism=10)
+
+        Make sure that the ``pool_size`` of the ``rest.Space`` instance is
+        not smaller than ``parallelism``, or the extra requests will not
+        reuse pooled connections.
+
+        See ``get()`` for a description of the ``accept``, ``filter_``,
+        ``domain_id`` and ``sortby`` parameters.
+
+        :param int parallelism: Maximum number of GET requests in progress at
+            a time. This defaults to 8.
+        :param int page_size: Number of resources to fetch per GET request.
+            This defaults to 500.
+
+        :returns: A ``ResourceList`` with all resources of the collection.
+
+        :raises: ``jnpr.space.rest.RestException`` if any GET results in an
+            error response.
+
+        """
+        def fetch(page_start):
+            paging = {'start': page_start, 'limit': page_size}
+            return self.get(accept, filter_, domain_id, paging, sortby)
+
+        first = fetch(0)
+        resource_list = list(first)
+        if len(first) < page_size:
+            return ResourceList(resource_list, first.total)
+
+        if first.total is None:
+            # Without the total, there is nothing to fan out over
+            for page in self.iter_pages(page_size, parallelism, accept,
+                                        filter_, domain_id, sortby,
+                                        start=page_size):
+                resource_list.extend(page)
+        elif first.total > page_size:
+            from concurrent.futures import ThreadPoolExecutor
+            starts = range(page_size, first.total, page_size)
+            with ThreadPoolExecutor(max_workers=parallelism) as executor:
+                for page in executor.map(fetch, starts):
+                    resource_list.extend(page)
+
+        return ResourceList(resource_list, first.total)
+
+    def export(self, path, format_=None, fields=None, filter_=None,
+               domain_id=None, sortby=None, page_size=500, batch_size=10000,
+               convert_values=True, accept=None):
+        """Exports the contained resources of this collection into a table
+        file, e.g. for reporting. The collection is fetched page by page and
+        each response is parsed while it is being downloaded. Rows are
+        written in batches, so that memory usage is bounded by
+        ``batch_size`` and not by the size of the collection. The file is
+        written under a temporary name and renamed once the export is
+        complete, so a failed export leaves ``path`` untouched. For example:
+
+            >>> s.device_management.devices.export('devices.parquet',
+                    fields=['name', 'platform', 'ipAddr'])
+
+        See ``jnpr.space.export`` for how resources are turned into rows.
+
+        See ``get()`` for a description of the ``accept``, ``filter_``,
+        ``domain_id`` and ``sortby`` parameters.
+
+        :param str path: Path of the file to write.
+        :param str format_: One of ``parquet``, ``arrow`` (Arrow IPC file),
+            ``csv`` or ``ndjson``. The first two need ``pyarrow``. This
+            defaults to ``None``, in which case the format is picked from the
+            extension of ``path``, falling back to ``parquet`` if pyarrow is
+            installed and ``csv`` otherwise.
+        :param list fields: Names of the columns to write. Names are matched
+            as given or as XML names (see ``xmlutil.make_xml_name()``) and
+            nested fields are given by their path, e.g. ``domain.name``.
+            This defaults to ``None``, in which case the columns are those
+            found in the first batch. Fields first seen in later batches are
+            then dropped, except in ``ndjson``.
+        :param int page_size: Number of resources to fetch per GET request.
+            This defaults to 500.
+        :param int batch_size: Number of rows written at a time. This
+            defaults to 10000.
+        :param bool convert_values: If ``True``, numbers and booleans are
+            written with their types (see ``jnpr.space.records.convert()``)
+            in the ``parquet``, ``arrow`` and ``ndjson`` formats. Otherwise,
+            all values are written as text. This defaults to ``True``.
+
+        :returns: The number of resources exported.
+
+        :raises: ``jnpr.space.rest.RestException`` if any GET results in an
+            error response.
+
+        """
+        from jnpr.space import export
+        return export.export(self, path, format_, fields, filter_, domain_id,
+                             sortby, page_size, batch_size, convert_values,
+                             accept)
+
+    def count(self, filter_=None, domain_id=None):
+        """Gets the number of resources in this collection, optionally
+        matching a filter. Only one resource is requested from Space, using
+        paging, and the total count reported by Space is returned. No
+        ``Resource`` objects are created. For example:
+
+            >>> num = s.device_management.devices.count({'platform': 'MX240'})
+
+        See ``get()`` for a description of the ``filter_`` and ``domain_id``
+        parameters.
+
+        :returns: The number of resources as an int.
+
+        :raises: ``jnpr.space.rest.RestException`` if the GET method results in an
+            error response.
+
+        """
+        root = self._get_root(filter_, domain_id, {'limit': 1})
+        if root is None:
+            return 0
+        total = _get_total(root)
+        if total is None:
+            # Space did not report the total, so all of them must be fetched
+            root = self._get_root(filter_, domain_id, None)
+            return len(root) if root is not None else 0
+        return total
+
+    def exists(self, filter_=None, domain_id=None):
+        """Checks whether this collection has any resources, optionally
+        matching a filter. At most one resource is requested from Space and
+        no ``Resource`` objects are created. For example:
+
+            >>> if not s.tag_management.tags.exists({'name': 'Boston'}):
+                    ...
+
+        See ``get()`` for a description of the ``filter_`` and ``domain_id``
+        parameters.
+
+        :returns: ``True`` if there is at least one such resource.
+
+        :raises: ``jnpr.space.rest.RestException`` if the GET method results in an
+            error response.
+
+        """
+        root = self._get_root(filter_, domain_id, {'limit': 1})
+        if root is None:
+            return False
+        total = _get_total(root)
+        if total is None:
+            return len(root) > 0
+        return total > 0
+
+    def _get_root(self, filter_, domain_id, paging):
+        """
+        Helper method to GET this collection and return the root element of
+        the response as a plain ``lxml.etree.Element``, or ``None`` if the
+        response has no content.
+        """
+        url, headers = self._prepare_get(None, filter_, domain_id,
+                                         paging, None)
+        response = self._rest_end_point.get(url, headers)
+        return self._handle_get_root(url, response)
+
+    def _handle_get_root(self, url, response):
+        """
+        Helper method to check the response for a GET done by ``_get_root()``
+        and return the root element from it.
+        """
+        if response.status_code != 200:
+            if response.status_code == 204:
+                return None
+            raise rest.RestException("GET failed on %s" % url, response)
+        return xmlutil.get_xml_obj_from_response(response)
+
+    def _prepare_get(self, accept, filter_, domain_id, paging, sortby,
+                     fields=None):
+        """
+        Helper method to form the URL and headers for a GET on this
+        collection. Returns them as a tuple.
         """
         url = self._form_get_url(filter_, domain_id, paging, sortby)
+        url = self._rest_end_point._select_fields(url, fields)
 
         if accept is not None:
             mtype = accept
         else:
-            mtype = self._meta_object.get_media_type(None)
+            mtype = self._negotiate_media_type()
 
         if mtype is not None:
             if not self._meta_object.retain_charset_in_accept:
@@ -159,11 +521,17 @@ class Collection(base._SpaceBase):
         else:
             headers = {}
 
+        return url, headers
+
+    def _handle_get(self, url, response, fields=None):
+        """
+        Helper method to check the response for a GET on this collection and
+        create the list of resources from it, keeping only the given fields.
+        """
         resource_list = []
-        response = self._rest_end_point.get(url, headers)
         if response.status_code != 200:
             if response.status_code == 204:
-                return []
+                return ResourceList([], 0)
             raise rest.RestException("GET failed on %s" % url, response)
 
         # Fixing issue #17
@@ -172,7 +540,9 @@ class Collection(base._SpaceBase):
         #start = r.index('?><') + 2
         #root = etree.fromstring(r[start:])
 
-        root = xmlutil.get_xml_obj_from_response(response)
+        # Parse once with objectify. The subtree of each member is then used
+        # as it is for the state of the corresponding resource.
+        root = self._parse(response, fields, objectified=True)
 
         if self._meta_object.single_object_collection:
             resource_list.append(self._create_resource(root))
@@ -182,7 +552,8 @@ class Collection(base._SpaceBase):
                 resrc.id = key
                 resource_list.append(resrc)
         else:
-            for child in root:
+            # Iterating over an objectified element yields its siblings
+            for child in root.iterchildren():
                 try:
                     resrc = self._create_resource(child)
                     resource_list.append(resrc)
@@ -192,7 +563,53 @@ class Collection(base._SpaceBase):
                     else:
                         raise ex
 
-        return ResourceList(resource_list)
+        return ResourceList(resource_list, _get_total(root))
+
+    def _handle_get_records(self, url, response, fields=None):
+        """
+        Helper method to check the response for a GET on this collection and
+        create the list of records from it, keeping only the given fields.
+        """
+        if response.status_code != 200:
+            if response.status_code == 204:
+                return RecordList([])
+            raise rest.RestException("GET failed on %s" % url, response)
+
+        # A plain etree parse, since no objectify proxies are needed
+        root = self._parse(response, fields, objectified=False)
+        if self._meta_object.single_object_collection:
+            elements = [root]
+        elif self._meta_object.named_members:
+            elements = [root.find(value['xml_name']) for value in
+                        self._meta_object.named_members.values()]
+            elements = [elem for elem in elements if elem is not None]
+        else:
+            elements = [child for child in root
+                        if isinstance(child.tag, str)]
+
+        builder = RecordBuilder()
+        if len(set(elem.tag for elem in elements)) == 1:
+            result = builder.build_all(elements)
+        else:
+            result = [builder.build(elem) for elem in elements]
+        return RecordList(result, _get_total(root))
+
+    def _parse(self, response, fields, objectified):
+        """
+        Helper method to parse the body of a GET response on this collection.
+        Unless fields are given, an objectified parse is memoized on the
+        response. Otherwise, the fields of the members are dropped while
+        parsing, except for the given ones.
+        """
+        if fields is None:
+            if objectified:
+                return xmlutil.get_obj_from_response(response)
+            return xmlutil.get_xml_obj_from_response(response)
+        # The members of a single object collection are its fields
+        level = 0 if self._meta_object.single_object_collection else 1
+        return xmlutil.parse_fields(
+            [xmlutil.get_bytes_from_response(response)], fields, level,
+            objectified)
 
     def _create_named_resource(self, key, meta_object, xml_root):
         """
@@ -201,11 +618,12 @@ class Collection(base._SpaceBase):
         type_name = meta_object['resource_type']
         xml_data = xml_root.find(meta_object['xml_name']) \
             if xml_root is not None else None
-        from jnpr.space.resource import Resource
-        resrc = Resource(type_name=type_name,
-                         rest_end_point=self._rest_end_point,
-                         xml_data=xml_data,
-                         parent=self)
+        resource_class = self._rest_end_point._parsed_resource_class(
+            type_name)
+        resrc = resource_class(type_name=type_name,
+                               rest_end_point=self._rest_end_point,
+                               xml_data=xml_data,
+                               parent=self)
         resrc.id = key
         return resrc
 
@@ -216,11 +634,16 @@ class Collection(base._SpaceBase):
         collection.
         """
         if self._meta_object.resource_type:
-            from jnpr.space import resource
-            return resource.Resource(type_name=self._meta_object.resource_type,
-                                     rest_end_point=self._rest_end_point,
-                                     xml_data=xml_data,
-                                     parent=self)
+            type_name = self._meta_object.resource_type
+            resource_class = self._rest_end_point._parsed_resource_class(
+                type_name)
+            resrc = resource_class(type_name=type_name,
+                                   rest_end_point=self._rest_end_point,
+                                   xml_data=xml_data,
+                                   parent=self)
+            return self._rest_end_point._canonical_resource(resrc)
+        elif isinstance(xml_data, objectify.ObjectifiedElement):
+            return xml_data
         else:
             xml_str = etree.tostring(xml_data, encoding='unicode')
             return xmlutil.xml2obj(xml_str)
@@ -278,6 +701,22 @@ class Collection(base._SpaceBase):
             an error response. The exception's ``response`` attribute will have
             the full response from Space.
 
+        """
+        url, headers, body, saved_root_tag = \
+            self._prepare_post(new_obj, accept, content_type, request_body,
+                               xml_name, task_monitor)
+        response = self._rest_end_point.post(url,
+                                             headers,
+                                             body)
+        return self._handle_post(response, new_obj, saved_root_tag,
+                                 task_monitor)
+
+    def _prepare_post(self, new_obj, accept, content_type, request_body,
+                      xml_name, task_monitor):
+        """
+        Helper method to form the URL, headers and body for a POST on this
+        collection. Returns them as a tuple, along with the original tag of
+        the root element of the body (if it was renamed using xml_name).
         """
         if content_type is not None:
             media_type = content_type
@@ -323,9 +762,15 @@ class Collection(base._SpaceBase):
         if task_monitor is not None:
             url = '?queue='.join([url, task_monitor.get_queue_url()])
 
-        response = self._rest_end_point.post(url,
-                                             headers,
-                                             body)
+        return url, headers, body, saved_root_tag
+
+    def _handle_post(self, response, new_obj, saved_root_tag, task_monitor):
+        """
+        Helper method to check the response for a POST on this collection and
+        create the result from it.
+        """
+        if self._rest_end_point.resource_cache is not None:
+            self._rest_end_point.resource_cache.invalidate(self.get_href())
 
         if response.status_code == 204: # Special case of post with null response
             return new_obj
@@ -335,8 +780,7 @@ class Collection(base._SpaceBase):
                                      response)
 
         if task_monitor is not None:
-            resp_str = xmlutil.get_text_from_response(response)
-            return xmlutil.xml2obj(resp_str)
+            return xmlutil.get_obj_from_response(response)
 
         if not isinstance(new_obj, list):
             # Fixing issue #17
@@ -344,7 +788,7 @@ class Collection(base._SpaceBase):
             # Skip the <?xml> line to avoid encoding errors in lxml
             #start = r.index('?><') + 2
             #root = etree.fromstring(r[start:])
-            root = xmlutil.get_xml_obj_from_response(response)
+            root = xmlutil.get_obj_from_response(response)
             #new_obj._xml_data = root
             #new_obj._rest_end_point = self._rest_end_point
             if saved_root_tag is not None:
@@ -449,13 +893,32 @@ class Collection(base._SpaceBase):
         coll_state = self.get()
         print(coll_state.xml_string())
 
+def _get_total(root):
+    """
+    Returns the value of the ``total`` attribute of the root element of a
+    collection response as an int, or ``None`` if it is absent.
+    """
+    total = root.get('total')
+    if total is not None:
+        try:
+            return int(total)
+        except ValueError:
+            pass
+    return None
+
 class ResourceList(list):
     """
     Encapsulates a list of Resource objects and provides
     methods to print the state of all of them.
+
+    The ``total`` attribute holds the total number of resources in the
+    collection as reported by Space (which can be more than the number of
+    resources in this list, if paging was used), or ``None`` if Space did not
+    report it.
     """
-    def __init__(self, resource_list):
+    def __init__(self, resource_list, total=None):
         self.resources = resource_list
+        self.total = total
         super(ResourceList, self).__init__(resource_list)
 
     def xml_data(self):
@@ -556,7 +1019,8 @@ class MetaCollection(object):
                                            service._name,
                                            name,
                                            self.methods[name])
-            return method.Method(service, name, m_obj)
+            method_class = service._rest_end_point._node_class('method')
+            return method_class(service, name, m_obj)
 
 #
 # A dictionary that acts as a cache for meta objects representing collections.
@@ -22,12 +22,12 @@ This module defines the Connection class.
 """
 from __future__ import unicode_literals
 from __future__ import print_function
-from future import standard_library
-standard_library.install_aliases()
-from builtins import object
 import requests
 import logging
 
+# Certificates of Space servers are not verified
+requests.packages.urllib3.disable_warnings()
+
 
 class Connection(object):
     """ Creates a connection to Space Platform mimicking a GUI login.
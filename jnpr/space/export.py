@@ -0,0 +1,454 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Export of the resources of a collection into a table file. This is used by
+``Collection.export()``.
+
+The collection is fetched page by page. Each response is parsed while it is
+being downloaded and every resource is turned into a row right away, so no
+objectified trees are built. Rows are written in batches, so that memory
+usage depends on the batch size and not on the size of the collection.
+
+Each resource becomes a row with one column per XML attribute and per child
+element. The leaves of nested elements become columns named by their path,
+e.g. ``domain.name``. When an element occurs several times in a resource,
+its values are joined with ';' (or kept as a list in NDJSON).
+
+The following formats are supported:
+
+* ``parquet`` and ``arrow`` (the Arrow IPC file format). These need
+  ``pyarrow``.
+* ``csv`` and ``ndjson`` (one JSON object per line).
+"""
+from __future__ import unicode_literals
+from collections import OrderedDict
+import csv
+import importlib.util
+import io
+import json
+import os
+import tempfile
+
+from jnpr.space import rest, xmlutil
+from jnpr.space.records import convert, to_text, _local_name
+
+FORMATS = ('parquet', 'arrow', 'csv', 'ndjson')
+
+_EXTENSIONS = {'.parquet': 'parquet',
+               '.pq': 'parquet',
+               '.arrow': 'arrow',
+               '.ipc': 'arrow',
+               '.feather': 'arrow',
+               '.csv': 'csv',
+               '.ndjson': 'ndjson',
+               '.jsonl': 'ndjson'}
+
+def have_pyarrow():
+    """
+    Tells whether pyarrow is installed, which is needed for the ``parquet``
+    and ``arrow`` formats.
+    """
+    return importlib.util.find_spec('pyarrow') is not None
+
+def get_format(path, format_=None):
+    """
+    Returns the format to use for the given output file.
+
+    :param str path: Path of the output file.
+    :param str format_: One of ``FORMATS``. If this is ``None``, the format
+        is picked from the extension of ``path``. If the extension is not
+        known either, ``parquet`` is used if pyarrow is installed and
+        ``csv`` otherwise.
+
+    :returns: One of ``FORMATS``.
+    """
+    if format_ is None:
+        ext = os.path.splitext(path)[1].lower()
+        format_ = _EXTENSIONS.get(ext)
+        if format_ is None:
+            format_ = 'parquet' if have_pyarrow() else 'csv'
+    elif format_ not in FORMATS:
+        raise Exception("Unknown export format '%s'. Expected one of %s" %
+                        (format_, ', '.join(FORMATS)))
+    return format_
+
+def export(coll, path, format_=None, fields=None, filter_=None,
+           domain_id=None, sortby=None, page_size=500, batch_size=10000,
+           convert_values=True, accept=None):
+    """
+    Exports the resources of the given collection into a file. See
+    ``Collection.export()`` for a description of the parameters.
+
+    :returns: The number of rows written.
+    """
+    meta = coll._meta_object
+    if meta.single_object_collection or meta.named_members:
+        raise Exception("Collection '%s' cannot be exported" % meta.key)
+
+    format_ = get_format(path, format_)
+    if format_ in ('parquet', 'arrow') and not have_pyarrow():
+        raise ImportError("pyarrow is needed to export to %s" % format_)
+
+    # Written next to the output file, which is replaced only if the export
+    # succeeds. A failed export then leaves no truncated file behind.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        count = _export(coll, tmp_path, format_, fields, filter_, domain_id,
+                        sortby, page_size, batch_size, convert_values,
+                        accept)
+        # mkstemp() creates the file readable by its owner only
+        os.chmod(tmp_path, _new_file_mode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return count
+
+def _new_file_mode():
+    """
+    Helper method to return the mode of files created by ``open()``, i.e.
+    0666 masked by the umask of the process.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def _export(coll, path, format_, fields, filter_, domain_id, sortby,
+            page_size, batch_size, convert_values, accept):
+    """
+    Helper method to export the resources of the given collection into the
+    given file, in the given format.
+    """
+    if format_ == 'csv':
+        writer = _CsvWriter(path)
+    elif format_ == 'ndjson':
+        writer = _NdjsonWriter(path, convert_values, fields is not None)
+    else:
+        writer = _ArrowWriter(path, format_, convert_values)
+
+    if fields is not None:
+        keys = [(field, xmlutil.make_xml_name(field)) for field in fields]
+    columns = list(fields) if fields is not None else None
+
+    count = 0
+    batch = []
+    try:
+        for row in iter_rows(coll, filter_, domain_id, sortby, page_size,
+                             accept, fields):
+            if fields is not None:
+                row = dict((field, row[field] if field in row else
+                            row.get(xml_name)) for field, xml_name in keys)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                columns = _write(writer, columns, batch)
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            columns = _write(writer, columns, batch)
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+def _write(writer, columns, batch):
+    """
+    Helper method to write a batch of rows. The columns of a file are fixed
+    by its first batch, unless they were given. Returns the columns.
+    """
+    if columns is None:
+        columns = list(OrderedDict.fromkeys(name for row in batch
+                                            for name in row))
+    writer.write(columns, batch)
+    return columns
+
+def iter_rows(coll, filter_=None, domain_id=None, sortby=None,
+              page_size=500, accept=None, fields=None):
+    """
+    Gets the given collection page by page and yields a row for each
+    resource, parsing each response while it is being downloaded. A row is
+    a dict holding the text of the XML attributes and leaf elements of the
+    resource, keyed by their path (see the description of this module).
+
+    See ``Collection.get()`` for a description of the parameters. If
+    ``fields`` are given, the other elements are dropped while parsing, so
+    rows may hold more than the given fields (e.g. all of ``domain.*`` for
+    ``domain.name``), but not the others.
+
+    :returns: A generator of dicts.
+    """
+    start = 0
+    while True:
+        paging = {'start': start, 'limit': page_size}
+        url, headers = coll._prepare_get(accept, filter_, domain_id, paging,
+                                         sortby, fields)
+        response = coll._rest_end_point.request('GET', url, headers,
+                                                stream=True)
+        count = 0
+        try:
+            if response.status_code != 200:
+                if response.status_code == 204:
+                    return
+                response.content
+                raise rest.RestException("GET failed on %s" % url, response)
+            for elem in xmlutil.iter_children(response.iter_content(65536),
+                                              fields=fields):
+                if isinstance(elem.tag, str):
+                    count += 1
+                    yield _flatten(elem, {}, '')
+        finally:
+            response.close()
+        if count < page_size:
+            return
+        start += page_size
+
+def _flatten(elem, row, prefix):
+    """
+    Helper method to add the XML attributes and the leaf elements of the
+    given element to the given row, keyed by their path.
+    """
+    for name, value in elem.attrib.items():
+        _add(row, prefix + _local_name(name), value)
+    for child in elem:
+        if not isinstance(child.tag, str):
+            continue
+        name = prefix + _local_name(child.tag)
+        if len(child) or child.attrib:
+            text = child.text
+            if text is not None and text.strip() and not len(child):
+                _add(row, name, text)
+            _flatten(child, row, name + '.')
+        else:
+            _add(row, name, child.text)
+    return row
+
+def _add(row, name, value):
+    """
+    Helper method to add a value to a row, collecting repeated values into
+    a list.
+    """
+    if name in row:
+        prev = row[name]
+        if isinstance(prev, list):
+            prev.append(value)
+        else:
+            row[name] = [prev, value]
+    else:
+        row[name] = value
+
+def _text(value):
+    """
+    Helper method to return the text for a value of a row.
+    """
+    if isinstance(value, list):
+        return ';'.join(item or '' for item in value)
+    return value
+
+def _converted(value):
+    """
+    Helper method to return the Python value for a value of a row.
+    """
+    if isinstance(value, list):
+        return [convert(item) for item in value]
+    return convert(value)
+
+class _CsvWriter(object):
+    """
+    Writes rows into a CSV file with a header line. Values are written as
+    the text found in the XML.
+    """
+
+    def __init__(self, path):
+        self._file = io.open(path, 'w', newline='', encoding='utf-8')
+        self._csv = None
+
+    def write(self, columns, rows):
+        if self._csv is None:
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(columns)
+        self._csv.writerows([_text(row.get(name)) for name in columns]
+                            for row in rows)
+
+    def close(self):
+        self._file.close()
+
+class _NdjsonWriter(object):
+    """
+    Writes rows into a file as one JSON object per line. Unless the fields
+    were given, each object has exactly the fields of its resource.
+    """
+
+    def __init__(self, path, convert_values, project):
+        self._file = io.open(path, 'w', encoding='utf-8')
+        self._value = _converted if convert_values else (lambda value: value)
+        self._project = project
+
+    def write(self, columns, rows):
+        value = self._value
+        lines = []
+        for row in rows:
+            names = columns if self._project else row
+            obj = dict((name, value(row.get(name))) for name in names)
+            lines.append(json.dumps(obj) + '\n')
+        self._file.write(''.join(lines))
+
+    def close(self):
+        self._file.close()
+
+class _ArrowWriter(object):
+    """
+    Writes rows into a Parquet file (one row group per batch) or an Arrow
+    IPC file (one record batch per batch).
+
+    The type of each column is inferred from the first batch: int64,
+    double or bool if all its values have that type once converted, and
+    string otherwise. String columns hold the text found in the XML. If a
+    later batch has values of another type in a column, the column is
+    widened to string: the file written so far is read back into memory and
+    written again with the text of the values in that column.
+    """
+
+    def __init__(self, path, format_, convert_values):
+        import pyarrow
+        self._pa = pyarrow
+        self._path = path
+        self._format = format_
+        self._convert = convert_values
+        self._schema = None
+        self._writer = None
+
+    def write(self, columns, rows):
+        pa = self._pa
+        raw = [[row.get(name) for row in rows] for name in columns]
+        if self._schema is None:
+            self._open(pa.schema([pa.field(name, self._infer_type(values))
+                                  for name, values in zip(columns, raw)]))
+
+        arrays, mismatched = self._arrays(raw)
+        if mismatched:
+            self._widen(mismatched)
+            arrays, mismatched = self._arrays(raw)
+        self._write_batch(arrays)
+
+    def _open(self, schema):
+        """
+        Helper method to (re-)create the file with the given schema.
+        """
+        self._schema = schema
+        if self._format == 'parquet':
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(self._path, schema)
+        else:
+            self._writer = self._pa.ipc.new_file(self._path, schema)
+
+    def _arrays(self, raw):
+        """
+        Helper method to build the arrays for a batch from the values of
+        each column. Returns them, along with the names of the columns whose
+        values do not have the type of the column.
+        """
+        pa = self._pa
+        arrays = []
+        mismatched = []
+        for field, values in zip(self._schema, raw):
+            if field.type == pa.string():
+                values = [_text(value) for value in values]
+            else:
+                values = [_converted(value) for value in values]
+            try:
+                arrays.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError,
+                    OverflowError):
+                mismatched.append(field.name)
+        return arrays, mismatched
+
+    def _write_batch(self, arrays):
+        """
+        Helper method to write a batch with the given arrays.
+        """
+        pa = self._pa
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+        if self._format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def _widen(self, names):
+        """
+        Helper method to change the type of the given columns to string,
+        rewriting the batches written so far.
+        """
+        pa = self._pa
+        self._writer.close()
+        with io.open(self._path, 'rb') as f:
+            data = pa.py_buffer(f.read())
+        if self._format == 'parquet':
+            import pyarrow.parquet
+            parquet_file = pyarrow.parquet.ParquetFile(pa.BufferReader(data))
+            batches = [batch
+                       for index in range(parquet_file.num_row_groups)
+                       for batch in
+                       parquet_file.read_row_group(index).to_batches()]
+        else:
+            reader = pa.ipc.open_file(pa.BufferReader(data))
+            batches = [reader.get_batch(index)
+                       for index in range(reader.num_record_batches)]
+
+        self._open(pa.schema([pa.field(field.name, pa.string())
+                              if field.name in names else field
+                              for field in self._schema]))
+        for batch in batches:
+            arrays = []
+            for field, column in zip(self._schema, batch.columns):
+                if field.name in names:
+                    column = pa.array([to_text(value)
+                                       for value in column.to_pylist()],
+                                      type=pa.string())
+                arrays.append(column)
+            self._write_batch(arrays)
+
+    def _infer_type(self, values):
+        """
+        Helper method to return the Arrow type for a column of the first
+        batch.
+        """
+        pa = self._pa
+        if not self._convert:
+            return pa.string()
+        kinds = set()
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, list):
+                return pa.string()
+            kinds.add(type(convert(value)))
+        if kinds == set([bool]):
+            return pa.bool_()
+        if kinds == set([int]):
+            return pa.int64()
+        if kinds and kinds <= set([int, float]):
+            return pa.float64()
+        return pa.string()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
@@ -22,7 +22,7 @@ A module with functions using which new resource objects can be created.
 Resources are instances of jnpr.space.resource.Resource.
 """
 from __future__ import unicode_literals
-from jnpr.space import rest, resource, xmlutil
+from jnpr.space import rest, xmlutil
 
 def make_resource(type_name, rest_end_point,
                   xml_data=None, attributes=None, parent=None):
@@ -56,11 +56,12 @@ def make_resource(type_name, rest_end_point,
     :returns: A new instance of jnpr.space.resource.Resource
 
     """
-    return resource.Resource(type_name,
-                             rest_end_point,
-                             xml_data,
-                             attributes,
-                             parent)
+    resource_class = rest_end_point._resource_class(type_name)
+    return resource_class(type_name,
+                          rest_end_point,
+                          xml_data,
+                          attributes,
+                          parent)
 
 def fetch_resource(rest_end_point, href):
     """This is the method you should use to create a Resource instance if you
@@ -75,15 +76,21 @@ def fetch_resource(rest_end_point, href):
 
     :param str href: The href of the resource that needs to be fetched.
 
-    :returns: A new instance of jnpr.space.resource.Resource
+    :returns: A new instance of jnpr.space.resource.Resource. Its state is
+        taken from the ``resource_cache`` of the Space instance, if it has
+        one with a fresh entry for the href.
 
     :raises: ``jnpr.space.rest.RestException`` if the GET request results in an
         error response. The exception's ``response`` attribute will have the
         full response from Space.
     """
-    response = rest_end_point.get(href)
-    if response.status_code != 200:
-        raise rest.RestException("GET failed on %s" % href, response)
+    res_cache = rest_end_point.resource_cache
+    response = res_cache.get(href, None) if res_cache is not None else None
+    cached = response is not None
+    if not cached:
+        response = rest_end_point.get(href)
+        if response.status_code != 200:
+            raise rest.RestException("GET failed on %s" % href, response)
 
     media_type = response.headers['content-type']
     end = media_type.index('+')
@@ -97,5 +104,9 @@ def fetch_resource(rest_end_point, href):
     else:
         type_name = xmlutil.unmake_xml_name('.'.join([app_, service_, type_]))
 
-    xml_data = xmlutil.get_xml_obj_from_response(response)
-    return make_resource(type_name, rest_end_point, xml_data)
+    if res_cache is not None and not cached:
+        res_cache.put(href, None, response,
+                      [type_name, type_name.rsplit('.', 1)[0]])
+    xml_data = xmlutil.get_obj_from_response(response)
+    resrc = make_resource(type_name, rest_end_point, xml_data)
+    return rest_end_point._canonical_resource(resrc)
@@ -0,0 +1,482 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+A columnar, in-memory copy of the inventory of a Space cluster, for
+fleet-wide analysis with vectorised NumPy operations. This needs ``numpy``.
+
+``build()`` fetches the following tables into an ``InventoryFrame``:
+
+* ``devices`` from ``device_management.devices``
+* ``managed_elements`` from ``managed_domain.managed_elements``
+* ``ptps``, ``equipment_holders`` and ``software_identities`` from the
+  collections of the same names of each managed element
+
+Each table is a NumPy structured array with one row per resource. Columns
+are made from the XML attributes and leaf elements of the resources, named
+as described in ``jnpr.space.export``. A column holds int64, float64 or
+bool values if all its values are of that type, with NaN for missing
+floats. All other columns hold int32 codes into the ``StringPool`` of the
+frame, with -1 for missing values. Equal strings get equal codes in all
+tables of a frame.
+
+Join keys are taken from hrefs. The ``@key`` column holds the id at the end
+of the href of each resource, and an ``X.@key`` column is added for every
+nested reference ``X`` with an href (e.g. ``device.@key`` in managed
+elements). The rows of the tables fetched for each managed element have the
+key of that managed element in the ``@parent`` column. Missing keys are -1.
+
+For example, the number of ptps per device platform::
+
+    >>> frame = inventory.build(space)
+    >>> dev_keys = frame.managed_elements.take('device.@key',
+                                               frame.ptps['@parent'])
+    >>> frame.ptps.count_by(frame.devices.take('platform', dev_keys))
+    OrderedDict([('MX960', 120432), ('EX4200', 96020), ...])
+"""
+from __future__ import unicode_literals
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from lxml import etree
+
+from jnpr.space import export
+from jnpr.space.records import convert
+
+#
+# String columns hold codes of this type
+#
+STRING = np.dtype(np.int32)
+
+#
+# Tables fetched for each managed element. Values are the names of the
+# collections.
+#
+_ME_TABLES = OrderedDict([('ptps', 'ptps'),
+                          ('equipment_holders', 'equipment_holders'),
+                          ('software_identities', 'software_identities')])
+
+TABLES = ('devices', 'managed_elements') + tuple(_ME_TABLES)
+
+def build(space, tables=TABLES, parallelism=8, page_size=500):
+    """
+    Fetches the inventory of the given Space cluster into a new frame.
+
+    :param space: The Space cluster.
+    :type space: jnpr.space.rest.Space
+    :param tables: Names of the tables to fetch. This defaults to all of
+        ``TABLES``. The tables fetched for each managed element need
+        ``managed_elements`` as well.
+    :param int parallelism: Number of managed elements whose collections
+        are fetched at the same time. This defaults to 8.
+    :param int page_size: Number of resources fetched per GET request.
+        This defaults to 500.
+
+    :returns: An ``InventoryFrame``.
+    :raises: ``jnpr.space.rest.RestException`` if any GET results in an
+        error response.
+    """
+    frame = InventoryFrame()
+    builders = {}
+
+    if 'devices' in tables:
+        builders['devices'] = _TableBuilder()
+        for row in export.iter_rows(space.device_management.devices,
+                                    page_size=page_size):
+            builders['devices'].add(row)
+
+    me_tables = [name for name in _ME_TABLES if name in tables]
+    if 'managed_elements' in tables or me_tables:
+        builders['managed_elements'] = me_builder = _TableBuilder()
+        for row in export.iter_rows(space.managed_domain.managed_elements,
+                                    page_size=page_size):
+            me_builder.add(row)
+
+    if me_tables:
+        for name in me_tables:
+            builders[name] = _TableBuilder()
+        hrefs = me_builder.columns.get('href', [])
+
+        def fetch(href):
+            me = _managed_element(space, href)
+            parent = _href_key(href)
+            result = []
+            for name in me_tables:
+                coll = getattr(me, _ME_TABLES[name])
+                rows = list(export.iter_rows(coll, page_size=page_size))
+                for row in rows:
+                    row['@parent'] = parent
+                result.append(rows)
+            return result
+
+        executor = ThreadPoolExecutor(max_workers=parallelism)
+        try:
+            for result in executor.map(fetch, [href for href in hrefs
+                                               if href is not None]):
+                for name, rows in zip(me_tables, result):
+                    for row in rows:
+                        builders[name].add(row)
+        finally:
+            executor.shutdown(wait=True)
+
+    for name in TABLES:
+        if name in tables:
+            table = builders[name].build(name, frame.strings)
+            setattr(frame, name, table)
+    return frame
+
+def _managed_element(space, href):
+    """
+    Helper method to create a managed element resource with just the given
+    href, in order to reach its collections.
+    """
+    type_name = 'managed_domain.managed_element'
+    resource_class = space._resource_class(type_name)
+    return resource_class(type_name, space,
+                          etree.Element('managed-element', href=href))
+
+def _href_key(href):
+    """
+    Helper method to return the id at the end of the given href, or -1.
+    """
+    if not href:
+        return -1
+    last = href.rstrip('/').rpartition('/')[2]
+    return int(last) if last.isdigit() else -1
+
+class StringPool(object):
+    """
+    Interns the strings of the string columns of a frame. Each distinct
+    string has a code, which is its index in ``values``.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+        self._array = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        """
+        Returns the code of the given string, adding it to this pool if
+        needed.
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+            self._array = None
+        return code
+
+    def lookup(self, value):
+        """
+        Returns the code of the given string, or -1 if it is not in this
+        pool.
+        """
+        return self._codes.get(value, -1)
+
+    def decode(self, codes):
+        """
+        Returns the strings for the given codes as an object array, with
+        ``None`` for -1.
+
+        :param numpy.ndarray codes: The codes.
+        """
+        if self._array is None:
+            # One extra slot, so that -1 picks None
+            self._array = np.array(self.values + [None], dtype=object)
+        return self._array[codes]
+
+class InventoryFrame(object):
+    """
+    The tables of an inventory, as attributes named after ``TABLES``, and
+    the ``StringPool`` they share. Tables that were not fetched are
+    ``None``.
+    """
+
+    def __init__(self):
+        self.strings = StringPool()
+        for name in TABLES:
+            setattr(self, name, None)
+
+class Table(object):
+    """
+    A table of an inventory frame. ``data`` is the NumPy structured array
+    holding the rows. ``table[name]`` returns a column.
+    """
+
+    def __init__(self, name, data, strings):
+        """
+        :param str name: Name of the table.
+        :param numpy.ndarray data: The rows.
+        :param StringPool strings: The pool holding the strings for the
+            codes in string columns.
+        """
+        self.name = name
+        self.data = data
+        self.strings = strings
+        self._indexes = {}
+
+    @classmethod
+    def from_rows(cls, name, rows, strings):
+        """
+        Creates a table from rows such as those of
+        ``jnpr.space.export.iter_rows()``. ``@key`` columns are added for
+        hrefs.
+
+        :param str name: Name of the table.
+        :param rows: An iterable of dicts.
+        :param StringPool strings: The pool to intern strings in.
+        """
+        builder = _TableBuilder()
+        for row in rows:
+            builder.add(row)
+        return builder.build(name, strings)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    @property
+    def columns(self):
+        """
+        The names of the columns of this table.
+        """
+        return list(self.data.dtype.names or ())
+
+    def is_string(self, name):
+        """
+        Tells whether the given column holds string codes.
+        """
+        return self.data.dtype[name] == STRING
+
+    def values(self, name):
+        """
+        Returns the given column, with strings in place of codes.
+        """
+        column = self.data[name]
+        if column.dtype == STRING:
+            return self.strings.decode(column)
+        return column
+
+    def where(self, name, value):
+        """
+        Returns a boolean mask of the rows whose given column is equal to
+        the given value. Strings are compared by code.
+        """
+        column = self.data[name]
+        if column.dtype == STRING:
+            code = self.strings.lookup(value)
+            if code == -1:
+                return np.zeros(len(column), dtype=bool)
+            return column == code
+        return column == value
+
+    def take(self, name, keys, key='@key'):
+        """
+        Looks up the given column for each of the given keys, e.g. the
+        ``@parent`` column of another table. This is a vectorised join.
+
+        :param str name: The column to look up.
+        :param numpy.ndarray keys: The keys to look up.
+        :param str key: The key column of this table. This defaults to
+            ``@key``.
+
+        :returns: An array with the value of the column in the row of each
+            key. For keys that are not found, the value is -1, NaN or
+            False depending on the type of the column.
+        """
+        order, sorted_keys = self._index(key)
+        keys = np.asarray(keys)
+        column = self.data[name]
+        if len(sorted_keys) == 0:
+            pos = np.zeros(len(keys), dtype=np.intp)
+            found = np.zeros(len(keys), dtype=bool)
+        else:
+            pos = np.searchsorted(sorted_keys, keys)
+            np.minimum(pos, len(sorted_keys) - 1, out=pos)
+            found = sorted_keys[pos] == keys
+        if len(column) == 0:
+            result = np.empty(len(keys), dtype=column.dtype)
+        else:
+            result = column[order[pos]]
+        result[~found] = _missing(column.dtype)
+        return result
+
+    def _index(self, key):
+        """
+        Helper method to return the sort order of the given key column and
+        the sorted keys.
+        """
+        index = self._indexes.get(key)
+        if index is None:
+            column = self.data[key]
+            order = np.argsort(column, kind='stable')
+            index = self._indexes[key] = (order, column[order])
+        return index
+
+    def count_by(self, *columns, **kwargs):
+        """
+        Counts the rows of this table by the values of the given columns.
+
+        :param columns: Names of columns of this table, or arrays with one
+            value per row (e.g. the result of ``take()`` on another table).
+            Arrays of ``STRING`` codes are decoded.
+        :param numpy.ndarray mask: Only the rows selected by this boolean
+            mask are counted. This defaults to ``None``.
+
+        :returns: An ``OrderedDict`` mapping values (or tuples of values
+            for several columns) to counts, largest counts first.
+        """
+        mask = kwargs.pop('mask', None)
+        if kwargs:
+            raise TypeError('Unexpected arguments: %s' % ', '.join(kwargs))
+        arrays = [self.data[col] if not isinstance(col, np.ndarray) else col
+                  for col in columns]
+        if mask is not None:
+            arrays = [array[mask] for array in arrays]
+
+        if len(arrays) == 1:
+            groups, counts = np.unique(arrays[0], return_counts=True)
+            keys = self._decoded(groups, arrays[0].dtype)
+        else:
+            if any(array.dtype.kind == 'f' for array in arrays):
+                common = np.float64
+            else:
+                common = np.int64
+            stacked = np.stack([array.astype(common) for array in arrays])
+            groups, counts = np.unique(stacked, axis=1, return_counts=True)
+            parts = [self._decoded(groups[i].astype(array.dtype), array.dtype)
+                     for i, array in enumerate(arrays)]
+            keys = list(zip(*parts))
+
+        result = OrderedDict()
+        for i in np.argsort(-counts, kind='stable'):
+            result[keys[i]] = int(counts[i])
+        return result
+
+    def _decoded(self, values, dtype):
+        """
+        Helper method to return the given group values as Python values.
+        """
+        if dtype == STRING:
+            return list(self.strings.decode(values))
+        return values.tolist()
+
+def _missing(dtype):
+    """
+    Helper method to return the value used for missing values in a column
+    of the given type.
+    """
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind == 'b':
+        return False
+    return -1
+
+class _TableBuilder(object):
+    """
+    Helper class to collect rows column by column, and to turn them into a
+    table when all rows were added.
+    """
+
+    def __init__(self):
+        self.columns = OrderedDict()
+        self.count = 0
+
+    def add(self, row):
+        for name, value in row.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [None] * self.count
+            column.append(value)
+        self.count += 1
+        for column in self.columns.values():
+            if len(column) < self.count:
+                column.append(None)
+
+    def build(self, name, strings):
+        self._add_keys()
+        dtypes = []
+        arrays = []
+        for col_name, values in self.columns.items():
+            array = _to_array(values, strings)
+            dtypes.append((col_name, array.dtype))
+            arrays.append(array)
+        data = np.empty(self.count, dtype=dtypes)
+        for (col_name, _), array in zip(dtypes, arrays):
+            data[col_name] = array
+        return Table(name, data, strings)
+
+    def _add_keys(self):
+        keys = OrderedDict()
+        for name, values in self.columns.items():
+            if name == 'href' or name.endswith('.href'):
+                keys[name[:-4] + '@key'] = [
+                    _href_key(value if not isinstance(value, list)
+                              else value[0])
+                    for value in values]
+        if 'href' not in self.columns and 'uri' in self.columns:
+            keys['@key'] = [_href_key(value) for value in self.columns['uri']]
+        if '@parent' in self.columns:
+            keys['@parent'] = [value if value is not None else -1
+                               for value in self.columns['@parent']]
+        self.columns.update(keys)
+
+def _to_array(values, strings):
+    """
+    Helper method to turn the values of a column into an array of the type
+    that fits all of them.
+    """
+    if values and all(isinstance(value, int) for value in values):
+        # Keys computed by _TableBuilder
+        return np.array(values, dtype=np.int64)
+
+    texts = []
+    converted = []
+    kinds = set()
+    for value in values:
+        if isinstance(value, list):
+            value = ';'.join(item or '' for item in value)
+            texts.append(value)
+            kinds.add(str)
+        else:
+            texts.append(value)
+            if value is not None:
+                value = convert(value)
+                kinds.add(type(value))
+        converted.append(value)
+
+    has_missing = None in converted
+    if kinds == set([int]) and not has_missing:
+        return np.array(converted, dtype=np.int64)
+    if kinds and kinds <= set([int, float]):
+        return np.array([np.nan if value is None else value
+                         for value in converted], dtype=np.float64)
+    if kinds == set([bool]) and not has_missing:
+        return np.array(converted, dtype=bool)
+
+    code = strings.code
+    return np.array([-1 if text is None else code(text) for text in texts],
+                    dtype=STRING)
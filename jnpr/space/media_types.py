@@ -17,46 +17,131 @@
 # limitations under the License.
 #
 
+"""
+Lookup of the media types modeled in the media_type_versions.yml files.
+"""
 from __future__ import unicode_literals
-from builtins import str
-import os
-import yaml
 import re
+import threading
+from jnpr.space import registry
 
-media_type_versions = None
+_DIGITS = re.compile(r'\d+')
+
+#
+# The value stored in a trie node for the URL template ending at that node
+#
+_LEAF = None
+
+class MediaTypeRegistry(object):
+    """
+    An index over the contents of one media_type_versions.yml file. URL
+    templates are kept in a trie over their path segments, and the results
+    of lookups are memoised so that repeated lookups cost one dict access.
+    """
+
+    def __init__(self, media_type_versions, memo_size=4096):
+        """
+        :param dict media_type_versions: Contents of the description file,
+            keyed by URL template.
+        :param int memo_size: Maximum number of lookup results memoised. The
+            memo is emptied when it is full.
+        """
+        self._trie = {}
+        for template, methods in media_type_versions.items():
+            node = self._trie
+            for segment in template.split('/'):
+                node = node.setdefault(segment, {})
+            node[_LEAF] = methods
+        self._memo = {}
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+
+    def lookup(self, url, method, header, version=None):
+        """
+        Returns the media type modeled for the given URL, HTTP method and
+        header. Numbers in the URL stand for ids.
+
+        :param str url: URL of the resource or collection.
+        :param str method: The HTTP method, e.g. 'GET'.
+        :param str header: The header, i.e. 'Accept' or 'Content-Type'.
+        :param version: The version required. If ``None``, the lowest version
+            modeled is returned.
+
+        :returns: The media type.
+        :raises: ``Exception`` if the media type is not modeled.
+
+        """
+        key = (url, method, header, version)
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+
+        result = self._resolve(url, method, header, version)
+        with self._lock:
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[key] = result
+        return result
+
+    def _resolve(self, url, method, header, version):
+        """
+        Helper method to find a media type by walking the trie.
+        """
+        node = self._trie
+        for segment in url.split('/'):
+            child = node.get(segment)
+            if child is None and segment:
+                child = node.get(_DIGITS.sub('{id}', segment))
+            if child is None:
+                node = None
+                break
+            node = child
+
+        methods = node.get(_LEAF) if node is not None else None
+        if methods is None:
+            raise Exception('URL %s not available' % _DIGITS.sub('{id}', url))
+        if method not in methods:
+            raise Exception('Method %s not available on %s' %
+                            (method, _DIGITS.sub('{id}', url)))
+        versions = methods[method]
+        if header not in versions:
+            raise Exception('Header %s not available for %s on %s' %
+                            (header, method, _DIGITS.sub('{id}', url)))
+        versions = versions[header]
+        if version is None:
+            return versions[sorted(versions)[0]]
+        try:
+            return versions[str(version)]
+        except KeyError:
+            raise Exception('Version %s not available for %s header for %s on %s' %
+                            (str(version), header, method,
+                             _DIGITS.sub('{id}', url)))
+
+#
+# Registries keyed by application name (None for the platform)
+#
+_registries = {}
+
+def get_registry(app_name=None):
+    """
+    Returns the media type registry of the given application, or of the
+    Space platform if ``app_name`` is ``None``.
+    """
+    try:
+        return _registries[app_name]
+    except KeyError:
+        pass
+
+    if app_name is not None:
+        file_name = 'apps/' + app_name + '/media_type_versions.yml'
+    else:
+        file_name = 'media_type_versions.yml'
+    reg = MediaTypeRegistry(registry.load(file_name))
+    return _registries.setdefault(app_name, reg)
 
 def get_media_type(url, method, header, version=None, app_name=None):
     """
     Returns the requested media-type read from the yaml file.
     """
-    global media_type_versions
-    if media_type_versions is None:
-        path = os.path.abspath(__file__)
-        dir_path = os.path.dirname(path)
-        file_name = dir_path + '/descriptions/'
-        if app_name is not None:
-            file_name = file_name + 'apps/' + app_name + '/media_type_versions.yml'
-        else:
-            file_name = file_name + '/media_type_versions.yml'
-        with open(file_name) as mt_file:
-            media_type_versions = yaml.load(mt_file)
-
-    url = re.sub(r'\d+', '{id}', url)
-    if url in media_type_versions:
-        if method in media_type_versions[url]:
-            if header in media_type_versions[url][method]:
-                if version is not None:
-                    try:
-                        return media_type_versions[url][method][header][str(version)]
-                    except KeyError:
-                        raise Exception('Version %s not available for %s header for %s on %s' %
-                                        (str(version), header, method, url))
-                else:
-                    d = media_type_versions[url][method][header]
-                    return d[sorted(d)[0]]
-            else:
-                raise Exception('Header %s not available for %s on %s' % (header, method, url))
-        else:
-            raise Exception('Method %s not available on %s' % (method, url))
-    else:
-        raise Exception('URL %s not available' % (url))
+    return get_registry(app_name).lookup(url, method, header, version)
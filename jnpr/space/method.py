@@ -23,10 +23,7 @@ This module defines the Method class.
 from __future__ import unicode_literals
 from __future__ import print_function
 from __future__ import absolute_import
-from builtins import str
-from builtins import object
-from jinja2 import Environment, PackageLoader
-from jnpr.space import rest, base, xmlutil
+from jnpr.space import rest, base, templating, xmlutil
 
 class Method(base._SpaceBase):
     """
@@ -75,7 +72,8 @@ class Method(base._SpaceBase):
             return self._parent.get_href()
 
     def post(self, accept=None, content_type=None, request_body=None,
-             task_monitor=None, schedule=None, *args, **kwargs):
+             task_monitor=None, schedule=None, stream_body=False,
+             *args, **kwargs):
         """
         This sends a POST request corresponding to this Method object.
 
@@ -109,6 +107,11 @@ class Method(base._SpaceBase):
             has asynchronous semantics and you want to schedule the execution.
             Otherwise, this will default to ``None``.
 
+        :param bool stream_body: If ``True``, the request body is rendered from
+            the modeled template while it is being sent, using chunked
+            transfer encoding. This avoids building large bodies (e.g. for
+            thousands of devices) in memory. Defaults to ``False``.
+
         :param kwargs: Keyword args of the form name=value which will be used
             to substitute variables in a pre-defined template to form the
             request body. The template name is specified inside the meta data
@@ -124,6 +127,19 @@ class Method(base._SpaceBase):
             an error response. The exception's ``response`` attribute will have
             the full response from Space.
 
+        """
+        url, headers, body = self._prepare_post(accept, content_type,
+                                                request_body, task_monitor,
+                                                schedule, stream_body,
+                                                **kwargs)
+        response = self._rest_end_point.post(url, headers, body)
+        return self._handle_post(url, response)
+
+    def _prepare_post(self, accept, content_type, request_body,
+                      task_monitor, schedule, stream_body=False, **kwargs):
+        """
+        Helper method to form the URL, headers and body for a POST on this
+        method. Returns them as a tuple.
         """
         url = self.get_href()
         if 'id' in kwargs:
@@ -148,17 +164,27 @@ class Method(base._SpaceBase):
         if request_body is not None:
             body = request_body
         elif self._meta_object.request_template is not None:
-            body = self._meta_object.request_template.render(**kwargs)
+            if stream_body:
+                body = templating.StreamedBody(
+                    self._meta_object.request_template, kwargs)
+            else:
+                body = self._meta_object.request_template.render(**kwargs)
         else:
             body = None
 
-        response = self._rest_end_point.post(url, headers, body)
+        return url, headers, body
+
+    def _handle_post(self, url, response):
+        """
+        Helper method to check the response for a POST on this method and
+        create the result from it.
+        """
         if (response.status_code != 202) and (response.status_code != 200):
             raise rest.RestException("POST failed on %s " % url, response)
 
         try:
-            if response.text is not None:
-                src = xmlutil.get_text_from_response(response)
+            if response.content is not None:
+                src = xmlutil.get_bytes_from_response(response)
                 if not self._meta_object.keep_xml_escaping:
                     src = xmlutil.cleanup(src)
                 if self._meta_object.remove_default_xmlns:
@@ -183,11 +209,18 @@ class Method(base._SpaceBase):
             full response from Space.
 
         """
+        headers = self._prepare_get(accept)
+        response = self._rest_end_point.get(self.get_href(), headers)
+        return self._handle_get(response)
 
+    def _prepare_get(self, accept):
+        """
+        Helper method to form the headers for a GET on this method.
+        """
         if accept is not None:
             mtype = accept
         else:
-            mtype = self._meta_object.get_media_type(None)
+            mtype = self._negotiate_media_type()
 
         if mtype is not None:
             if not self._meta_object.retain_charset_in_accept:
@@ -198,13 +231,18 @@ class Method(base._SpaceBase):
         else:
             headers = {}
 
-        response = self._rest_end_point.get(self.get_href(), headers)
+        return headers
+
+    def _handle_get(self, response):
+        """
+        Helper method to check the response for a GET on this method and
+        create the result from it.
+        """
         if response.status_code != 200:
             raise rest.RestException("GET failed on %s " % self.get_href(),
                                      response)
 
-        resp_text = xmlutil.get_text_from_response(response)
-        return xmlutil.xml2obj(resp_text)
+        return xmlutil.get_obj_from_response(response)
 
     def _describe_details(self):
         rtemp = self._meta_object.request_template
@@ -253,12 +291,21 @@ class MetaMethod(object):
         self.remove_default_xmlns = values['remove_default_xmlns'] \
             if ('remove_default_xmlns' in values) else False
 
-        if 'request_template' in values:
-            env = Environment(loader=PackageLoader('jnpr.space',
-                                                   'templates'))
-            self.request_template = env.get_template(values['request_template'])
-        else:
-            self.request_template = None
+        self.request_template_name = values['request_template'] \
+            if ('request_template' in values) else None
+        self._request_template = None
+
+    @property
+    def request_template(self):
+        """
+        The template used to form request bodies, or ``None``. It is loaded
+        on first use.
+        """
+        if self._request_template is None and \
+           self.request_template_name is not None:
+            self._request_template = templating.get_template(
+                self.request_template_name)
+        return self._request_template
 
     def get_request_type(self, version):
         """
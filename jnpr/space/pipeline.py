@@ -0,0 +1,542 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+This module defines the Pipeline class through which every request sent by
+``rest.Space`` passes, and the stages that can be plugged into it.
+"""
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+import base64
+import gzip
+import io
+import logging
+import re
+import threading
+import time
+
+class Request(object):
+    """
+    Encapsulates an HTTP request going through a ``Pipeline``.
+
+    Attributes:
+        method: The HTTP method (GET, POST, etc.)
+        url: URL of the request, relative to the URL of the Space cluster.
+        headers: A dict with the headers for the request. Stages can modify
+            it, since it is a copy of the headers supplied by the caller.
+        body: The body of the request or ``None``.
+        stream: If ``True``, the body of the response is not read when the
+            response arrives. It must be read (or the response closed) by the
+            caller.
+        attempt: Number of times this request has been re-sent.
+    """
+
+    def __init__(self, method, url, headers=None, body=None, stream=False):
+        self.method = method
+        self.url = url
+        self.headers = dict(headers) if headers else {}
+        self.body = body
+        self.stream = stream
+        self.attempt = 0
+
+class Stage(object):
+    """
+    Base class for the stages of a ``Pipeline``. A stage overrides one or more
+    of the hooks below. The default implementations do nothing.
+    """
+
+    def before(self, request):
+        """
+        Called before the request is sent, in the order in which stages were
+        added to the pipeline. A stage can modify the request here.
+
+        :returns: ``None`` to let the request proceed. Or a response object,
+            in which case the request is not sent and this response is passed
+            to the ``after`` hooks of this and all earlier stages.
+        """
+        return None
+
+    def after(self, request, response):
+        """
+        Called with the response, in the reverse order in which stages were
+        added to the pipeline.
+
+        :returns: The response to pass on. This is usually the given one.
+        """
+        return response
+
+    def failed(self, request, error):
+        """
+        Called in place of ``after``, in the same order, if the request could
+        not be sent (i.e. ``error`` is about to be raised to the caller).
+        """
+        pass
+
+    def retry_delay(self, request, response, error):
+        """
+        Called after each attempt at sending the request, with either the
+        response or the error that was raised.
+
+        :returns: ``None`` if this stage does not require the request to be
+            re-sent. Otherwise, the number of seconds to wait before re-sending
+            it.
+        """
+        return None
+
+class Pipeline(object):
+    """
+    Sends requests through an ordered list of stages and finally through a
+    ``send`` function which puts the request on the wire.
+    """
+
+    def __init__(self, send, stages=None):
+        """
+        :param send: A function that takes a ``Request`` and returns a
+            response object.
+        :param list stages: The initial list of ``Stage`` objects.
+        """
+        self._send = send
+        self.stages = list(stages) if stages else []
+
+    def add_stage(self, stage, index=None):
+        """
+        Adds a stage to this pipeline.
+
+        :param Stage stage: The stage to add.
+        :param int index: Position at which the stage is inserted. The stage
+            is appended (i.e. it is the closest to the wire) if this is
+            ``None``, which is the default.
+        """
+        if index is None:
+            self.stages.append(stage)
+        else:
+            self.stages.insert(index, stage)
+
+    def get_stage(self, stage_class):
+        """
+        Returns the first stage that is an instance of the given class, or
+        ``None``.
+        """
+        for stage in self.stages:
+            if isinstance(stage, stage_class):
+                return stage
+
+    def execute(self, request):
+        """
+        Sends the given request through all stages and returns the response.
+        """
+        steps = self._steps(request)
+        action, value = next(steps)
+        while action != 'done':
+            outcome = None
+            try:
+                if action == 'send':
+                    try:
+                        outcome = self._send(request), None
+                    except Exception as ex:
+                        outcome = None, ex
+                else:
+                    time.sleep(value)
+            except BaseException as ex:
+                # E.g. KeyboardInterrupt. The stages still learn about it.
+                steps.throw(ex)
+                raise
+            action, value = steps.send(outcome)
+        return value
+
+    def execute_async(self, request, send):
+        """
+        The asyncio variant of ``execute()``, used by ``aio.AsyncSpace``. It
+        goes through the same steps, but the request is sent by awaiting
+        ``send`` and retries are delayed with ``asyncio.sleep()``.
+
+        :param send: A coroutine function that takes a ``Request`` and
+            returns a response object.
+
+        :returns: A coroutine returning the response.
+        """
+        from jnpr.space import aio
+        return aio.execute(self._steps(request), request, send)
+
+    def _steps(self, request):
+        """
+        Generator running the stages for the given request, shared by
+        ``execute()`` and ``execute_async()``. It yields the actions left to
+        the caller as ``(action, value)`` tuples:
+
+        * ``('send', None)``: Send the request and pass the outcome back in
+          with ``send()``, as a tuple of the response and the error raised.
+        * ``('sleep', delay)``: Wait for ``delay`` seconds before re-sending.
+        * ``('done', response)``: The final response.
+
+        Errors to be raised to the caller are raised from the generator. An
+        error which is not an ``Exception`` (e.g. ``KeyboardInterrupt``)
+        raised while sending or sleeping must be thrown into the generator,
+        so that the ``failed`` hooks are run for it too.
+        """
+        response, entered = self._enter(request)
+        if response is None:
+            while True:
+                try:
+                    response, error = yield 'send', None
+                except BaseException as ex:
+                    self._fail(request, ex, entered)
+                    raise
+                try:
+                    delay = self._retry_delay(request, response, error)
+                except BaseException as ex:
+                    self._fail(request, ex, entered)
+                    raise
+                if delay is None:
+                    if error is not None:
+                        self._fail(request, error, entered)
+                        raise error
+                    break
+                if response is not None:
+                    # Release the connection of a response being discarded
+                    response.close()
+                request.attempt += 1
+                try:
+                    yield 'sleep', delay
+                except BaseException as ex:
+                    self._fail(request, ex, entered)
+                    raise
+
+        yield 'done', self._exit(request, response, entered)
+
+    def _enter(self, request):
+        """
+        Runs the ``before`` hooks. Returns a tuple of the short-circuit
+        response (if any) and the stages whose ``after`` hooks must be run.
+        """
+        stages = self.stages
+        for index, stage in enumerate(stages):
+            try:
+                response = stage.before(request)
+            except BaseException as ex:
+                self._fail(request, ex, stages[:index])
+                raise
+            if response is not None:
+                return response, stages[:index + 1]
+        return None, stages
+
+    def _exit(self, request, response, entered):
+        """
+        Runs the ``after`` hooks of the given stages. If one of them raises,
+        the ``failed`` hooks of the stages before it are run instead, so that
+        every stage learns the outcome of the request.
+        """
+        for index in range(len(entered) - 1, -1, -1):
+            try:
+                response = entered[index].after(request, response)
+            except BaseException as ex:
+                self._fail(request, ex, entered[:index])
+                raise
+        return response
+
+    def _fail(self, request, error, entered):
+        """
+        Runs the ``failed`` hooks of the given stages.
+        """
+        for stage in reversed(entered):
+            stage.failed(request, error)
+
+    def _retry_delay(self, request, response, error):
+        """
+        Returns the delay before re-sending the request, as required by the
+        first stage asking for it, or ``None``.
+        """
+        for stage in self.stages:
+            delay = stage.retry_delay(request, response, error)
+            if delay is not None:
+                return delay
+
+class AuthStage(Stage):
+    """
+    Authenticates requests for a ``rest.Space`` instance. Without a session
+    based login, it adds the basic authentication header (X.509 certificates
+    are presented by the transport). With a session based login, it logs in
+    again when Space responds with 401 (e.g. because the session has expired)
+    and re-sends the request once.
+    """
+
+    def __init__(self, rest_end_point):
+        self._rest_end_point = rest_end_point
+        self._auth_header = None
+        if rest_end_point.space_user is not None:
+            creds = ':'.join([rest_end_point.space_user,
+                              rest_end_point.space_passwd])
+            self._auth_header = 'Basic ' + \
+                base64.b64encode(creds.encode('utf-8')).decode('ascii')
+
+    def before(self, request):
+        if self._rest_end_point._use_session:
+            request.login_count = self._rest_end_point._login_count
+        elif self._auth_header is not None:
+            request.headers['Authorization'] = self._auth_header
+
+    def retry_delay(self, request, response, error):
+        end_point = self._rest_end_point
+        if response is None or response.status_code != 401 or \
+           not end_point._use_session or getattr(request, 'relogin', False):
+            return None
+
+        with end_point._relogin_lock:
+            # Some other thread may have logged in again already
+            if end_point._login_count == request.login_count:
+                end_point.login(end_point._required_node)
+        request.relogin = True
+        return 0
+
+class RetryStage(Stage):
+    """
+    Re-sends requests that fail due to connection errors or due to responses
+    with given status codes, with an exponentially increasing delay between
+    attempts. By default, only idempotent methods are retried.
+    """
+
+    def __init__(self, max_retries=3, backoff=0.5,
+                 statuses=(502, 503, 504),
+                 methods=('GET', 'HEAD', 'PUT', 'DELETE'),
+                 errors=(IOError,)):
+        """
+        :param int max_retries: Maximum number of times a request is re-sent.
+        :param float backoff: Delay in seconds before the first re-send. It is
+            doubled for each subsequent one.
+        :param tuple statuses: Response status codes that cause a re-send.
+        :param tuple methods: HTTP methods that may be re-sent.
+        :param tuple errors: Exception classes that cause a re-send.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.statuses = statuses
+        self.methods = methods
+        self.errors = errors
+
+    def retry_delay(self, request, response, error):
+        if request.method not in self.methods or \
+           request.attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if not isinstance(error, self.errors):
+                return None
+        elif response.status_code not in self.statuses:
+            return None
+        return self.backoff * (2 ** request.attempt)
+
+class MetricsStage(Stage):
+    """
+    Counts requests and their response times. If a profile file is given,
+    the response time of each request is also recorded in it as a line of
+    the form ``<method>, <url>, <status>, <milliseconds>``.
+    """
+
+    def __init__(self, profile_file=None):
+        """
+        :param file profile_file: An open file to record response times into.
+        """
+        self.profile_file = profile_file
+        self._lock = threading.Lock()
+        self._count = 0
+        self._errors = 0
+        self._total_ms = 0
+
+    def after(self, request, response):
+        num_ms = response.elapsed.seconds * 1000 + \
+                 response.elapsed.microseconds // 1000
+        with self._lock:
+            self._count += 1
+            self._total_ms += num_ms
+            if response.status_code >= 400:
+                self._errors += 1
+            if self.profile_file is not None:
+                url = re.sub(r'\d+', '{id}', request.url)
+                url = re.sub(r',', '_', url)
+                print("%s, %s, %d, %d" % (request.method, url,
+                                          response.status_code, num_ms),
+                      file=self.profile_file)
+        return response
+
+    def stats(self):
+        """
+        Returns a dict with the number of ``requests``, the number of
+        ``errors`` (responses with status 400 or higher) and the
+        ``total_ms`` spent waiting for responses.
+        """
+        with self._lock:
+            return {'requests': self._count,
+                    'errors': self._errors,
+                    'total_ms': self._total_ms}
+
+class CompressionStage(Stage):
+    """
+    Compresses request bodies larger than a given size using gzip and sets
+    the ``Content-Encoding`` header. Use this only with Space servers (or
+    proxies in front of them) that accept compressed request bodies.
+    Responses are always requested with gzip compression by the transport.
+    """
+
+    def __init__(self, min_size=8192, level=6):
+        """
+        :param int min_size: Bodies smaller than this many bytes are sent as
+            they are.
+        :param int level: The gzip compression level.
+        """
+        self.min_size = min_size
+        self.level = level
+
+    def before(self, request):
+        body = request.body
+        # Bodies rendered while being sent (without a length) are left alone
+        if not hasattr(body, '__len__') or len(body) < self.min_size or \
+           'content-encoding' in (k.lower() for k in request.headers):
+            return None
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb',
+                           compresslevel=self.level) as gz_file:
+            gz_file.write(body)
+        request.body = buf.getvalue()
+        request.headers['Content-Encoding'] = 'gzip'
+
+class TracingStage(Stage):
+    """
+    Logs each request and its response at DEBUG level. Nothing is formatted
+    (and the response body is not decoded) unless the logger is enabled for
+    DEBUG. The body of a streamed response is never logged, since that would
+    read it completely.
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def before(self, request):
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        self._logger.debug("%s %s", request.method, request.url)
+        self._logger.debug(request.headers)
+        if request.body is not None:
+            self._logger.debug(request.body)
+
+    def after(self, request, response):
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return response
+        self._logger.debug(response)
+        self._logger.debug(response.headers)
+        self._logger.debug(response.cookies)
+        if not request.stream:
+            self._logger.debug(response.text)
+        return response
+
+class SingleFlightStage(Stage):
+    """
+    Coalesces identical GET requests (same URL and Accept header) that are in
+    progress at the same time, from different threads. Only the first one
+    is sent to Space. The others wait for it and get the same response
+    object (and hence the same parsed object, see
+    ``xmlutil.get_obj_from_response()``), or the same error. If the first
+    request is interrupted by an error which is not an ``Exception`` (e.g.
+    ``KeyboardInterrupt``), or does not complete within ``timeout``, the
+    others are sent to Space instead.
+
+    This stage blocks the waiting threads, so it must not be used with
+    ``aio.AsyncSpace``.
+    """
+
+    def __init__(self, timeout=300):
+        """
+        :param float timeout: Maximum number of seconds to wait for an
+            identical request in progress. This defaults to 300.
+        """
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._saved = 0
+
+    def before(self, request):
+        if request.method != 'GET' or request.stream:
+            return None
+        accept = None
+        for key, value in request.headers.items():
+            if key.lower() == 'accept':
+                accept = value
+        key = (request.url, accept)
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is None:
+                self._in_flight[key] = request.flight = _Flight()
+                request.flight_key = key
+                return None
+            self._saved += 1
+
+        if not flight.done.wait(self.timeout) or flight.abandoned:
+            # Send this request instead of waiting any longer
+            with self._lock:
+                self._saved -= 1
+            return None
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    def after(self, request, response):
+        self._land(request, response, None)
+        return response
+
+    def failed(self, request, error):
+        self._land(request, None, error)
+
+    def _land(self, request, response, error):
+        """
+        Hands the outcome of a request sent by this stage over to the
+        requests waiting for it.
+        """
+        flight = getattr(request, 'flight', None)
+        if flight is None:
+            return
+        with self._lock:
+            del self._in_flight[request.flight_key]
+        if error is not None and not isinstance(error, Exception):
+            # Not an outcome the waiting requests should share
+            flight.abandoned = True
+        else:
+            flight.response = response
+            flight.error = error
+        flight.done.set()
+        request.flight = None
+
+    def stats(self):
+        """
+        Returns a dict with the number of requests ``saved`` by sharing the
+        response of an identical request in progress.
+        """
+        with self._lock:
+            return {'saved': self._saved}
+
+class _Flight(object):
+    """
+    The outcome of a request sent by ``SingleFlightStage``.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.abandoned = False
@@ -0,0 +1,265 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Lightweight, read-only records built from the XML state of resources. These
+are used by collections when resources are requested with ``records=True``.
+
+A record is an instance of a ``collections.namedtuple`` class. The class is
+generated from the XML attributes and child elements seen for each element
+name, so one class is shared by all the records of one type. Field names are
+the XML names with '-' replaced by '_'. Values are converted as follows:
+
+* Integers, decimals and ``true``/``false`` become int, float and bool,
+  as long as the value gives back exactly the same text. So ``12.10`` (e.g.
+  a version) or ``007`` stays a str.
+* Other text stays a str. Elements without text become ``None``.
+* Among the records built together by ``RecordBuilder.build_all()`` (e.g.
+  one page of a collection), each top-level field has one type. If its
+  values do not all convert to the same type, they all stay str.
+* An element that has child elements or XML attributes becomes a nested
+  record.
+* An element that occurs more than once becomes a list.
+
+The types are inferred from the values, since the descriptions do not give
+the types of the fields.
+
+Fields that a particular element does not have are ``None``. When records
+are streamed, fields first seen in later elements are missing from the
+records built before them.
+"""
+from __future__ import unicode_literals
+from collections import OrderedDict, namedtuple
+import re
+
+_INT = re.compile(r'-?(0|[1-9][0-9]*)$')
+_FLOAT = re.compile(r'-?[0-9]+\.[0-9]+([eE][-+]?[0-9]+)?$')
+_NON_WORD = re.compile(r'[^0-9a-zA-Z]+')
+
+def convert(text):
+    """
+    Converts the given XML text to an int, float or bool if it has the
+    corresponding format, and if the converted value gives back the same
+    text (see ``to_text()``). Otherwise, the text is returned as it is.
+
+    :param str text: The text, or ``None``.
+
+    :returns: The converted value.
+    """
+    if not text:
+        return text
+    first = text[0]
+    if first.isdigit() or first == '-':
+        if _INT.match(text):
+            value = int(text)
+            return value if str(value) == text else text
+        if _FLOAT.match(text):
+            value = float(text)
+            return value if repr(value) == text else text
+    elif text == 'true':
+        return True
+    elif text == 'false':
+        return False
+    return text
+
+def to_text(value):
+    """
+    Returns the XML text that the given value was converted from by
+    ``convert()``.
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+def _local_name(tag):
+    """
+    Returns the given tag without its namespace.
+    """
+    return tag if tag[0] != '{' else tag.rpartition('}')[2]
+
+def _class_name(xml_name):
+    """
+    Returns a class name for the records of the given element name, e.g.
+    'ManagedElement' for 'managed-element'.
+    """
+    name = ''.join(part[:1].upper() + part[1:]
+                   for part in _NON_WORD.split(xml_name))
+    if not name or name[0].isdigit():
+        name = 'Record' + name
+    return name
+
+class RecordList(list):
+    """
+    A list of records. The ``total`` attribute holds the total number of
+    resources in the collection as reported by Space, or ``None`` if Space
+    did not report it.
+    """
+
+    def __init__(self, records, total=None):
+        self.total = total
+        super(RecordList, self).__init__(records)
+
+class RecordBuilder(object):
+    """
+    Builds records from XML elements. The record class for an element name
+    is extended with new fields whenever an element with more fields is
+    seen. Records built earlier keep the class they were built with. Use
+    ``build_all()`` (or ``learn()`` on all elements first) to have all
+    records share one class.
+    """
+
+    def __init__(self):
+        # Element name -> (record class, XML names of its fields, and the
+        # same names as a set)
+        self._layouts = {}
+
+    def record_class(self, xml_name):
+        """
+        Returns the current record class for the given element name, or
+        ``None`` if no such element was seen yet.
+        """
+        layout = self._layouts.get(xml_name)
+        return layout[0] if layout is not None else None
+
+    def learn(self, elem):
+        """
+        Makes sure that the record classes for the given element and the
+        elements nested in it have all the fields these elements have.
+
+        :param lxml.etree.Element elem: The element.
+        """
+        names = [_local_name(name) for name in elem.attrib]
+        for child in elem:
+            if not isinstance(child.tag, str):
+                continue
+            names.append(_local_name(child.tag))
+            if len(child) or child.attrib:
+                self.learn(child)
+        self._layout(_local_name(elem.tag), names)
+
+    def build(self, elem):
+        """
+        Builds a record from the given element.
+
+        :param lxml.etree.Element elem: The element.
+
+        :returns: The record.
+        """
+        values = self._values(elem)
+        cls, xml_names = self._layout(_local_name(elem.tag), values)[:2]
+        return cls._make([values.get(name) for name in xml_names])
+
+    def build_all(self, elems):
+        """
+        Builds records from the given elements, all of which must have the
+        same name. All the records share one class, which has the fields of
+        all the elements.
+
+        :param list elems: The elements.
+
+        :returns: A list of records.
+        """
+        if not elems:
+            return []
+        all_values = [self._values(elem) for elem in elems]
+        names = OrderedDict()
+        for values in all_values:
+            names.update(values)
+        _unify_types(all_values, names)
+        cls, xml_names = self._layout(_local_name(elems[0].tag), names)[:2]
+        make = cls._make
+        return [make([values.get(name) for name in xml_names])
+                for values in all_values]
+
+    def _values(self, elem):
+        """
+        Helper method to return a dict with the converted values of the
+        attributes and child elements of the given element, keyed by their
+        XML names.
+        """
+        values = {}
+        for name, value in elem.attrib.items():
+            values[_local_name(name)] = convert(value)
+        for child in elem:
+            tag = child.tag
+            if not isinstance(tag, str):
+                continue
+            name = _local_name(tag)
+            if len(child) or child.attrib:
+                value = self.build(child)
+            else:
+                value = convert(child.text)
+            if name in values:
+                prev = values[name]
+                if isinstance(prev, list):
+                    prev.append(value)
+                else:
+                    values[name] = [prev, value]
+            else:
+                values[name] = value
+        return values
+
+    def _layout(self, xml_name, names):
+        """
+        Helper method to return the record class and field names for the
+        given element name, extending the class if some of the given field
+        names are new.
+        """
+        layout = self._layouts.get(xml_name)
+        if layout is not None:
+            if layout[2].issuperset(names):
+                return layout
+            xml_names = layout[1] + tuple(name for name in
+                                          OrderedDict.fromkeys(names)
+                                          if name not in layout[2])
+        else:
+            xml_names = tuple(OrderedDict.fromkeys(names))
+
+        fields = [name.replace('-', '_') for name in xml_names]
+        cls = namedtuple(_class_name(xml_name), fields, rename=True)
+        layout = (cls, xml_names, frozenset(xml_names))
+        self._layouts[xml_name] = layout
+        return layout
+
+_SCALARS = (bool, int, float, str)
+
+def _unify_types(all_values, names):
+    """
+    Helper method to turn back into text the values of the given fields
+    whose converted values do not all have the same type.
+    """
+    for name in names:
+        types = set()
+        for values in all_values:
+            value = values.get(name)
+            for item in value if isinstance(value, list) else (value,):
+                if isinstance(item, _SCALARS):
+                    types.add(type(item))
+        if len(types) < 2:
+            continue
+        for values in all_values:
+            value = values.get(name)
+            if isinstance(value, list):
+                values[name] = [to_text(item) for item in value]
+            elif value is not None:
+                values[name] = to_text(value)
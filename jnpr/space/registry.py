@@ -0,0 +1,177 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Registry of the yml description files shipped under the descriptions
+directory of this package.
+
+Each description file is parsed only once per process and the result is
+shared by all Space instances. The parsed contents are also compiled into a
+file in a cache directory, so that later processes can skip YAML parsing
+altogether. A compiled file is used only if the size and modification time
+of the yml file it was made from are unchanged.
+
+Compiled files are written with ``marshal``, which only holds plain data
+(unlike ``pickle``, loading them cannot run code). Even so, they are only
+loaded if they and the cache directory are owned by the current user and not
+writable by others.
+
+The cache directory is taken from the SPACE_EZ_CACHE_DIR environment
+variable and defaults to ~/.cache/space-ez. Setting the variable to an empty
+string disables the compiled files.
+"""
+from __future__ import unicode_literals
+import hashlib
+import marshal
+import os
+import stat
+import sys
+import threading
+
+_DESCRIPTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'descriptions')
+
+#
+# Parsed descriptions keyed by their path relative to _DESCRIPTIONS_DIR
+#
+_descriptions = {}
+_lock = threading.Lock()
+
+def get_cache_dir():
+    """
+    Returns the directory holding the compiled description files, or None
+    if compiled files are disabled.
+    """
+    cache_dir = os.environ.get('SPACE_EZ_CACHE_DIR')
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'space-ez')
+    return cache_dir or None
+
+def load(rel_path):
+    """
+    Returns the parsed contents of the given description file. The returned
+    object is shared and must not be modified.
+
+    :param str rel_path: Path of the yml file relative to the descriptions
+        directory, e.g. 'services.yml' or 'apps/servicenow/services.yml'.
+
+    :returns: The contents of the file.
+    :raises IOError: If the description file does not exist.
+
+    """
+    try:
+        return _descriptions[rel_path]
+    except KeyError:
+        pass
+
+    with _lock:
+        if rel_path not in _descriptions:
+            _descriptions[rel_path] = _load(rel_path)
+        return _descriptions[rel_path]
+
+def clear():
+    """
+    Discards the descriptions parsed so far in this process. Compiled files
+    are left alone.
+    """
+    with _lock:
+        _descriptions.clear()
+
+def _load(rel_path):
+    """
+    Helper method to read a description file, from its compiled form if
+    there is an up-to-date one.
+    """
+    file_name = os.path.join(_DESCRIPTIONS_DIR, rel_path)
+    st = os.stat(file_name)
+    stamp = (st.st_size, st.st_mtime)
+
+    compiled = _compiled_path(rel_path)
+    if compiled is not None and _trusted(compiled):
+        try:
+            with open(compiled, 'rb') as f:
+                saved_stamp, contents = marshal.load(f)
+            if tuple(saved_stamp) == stamp:
+                return contents
+        except Exception:
+            # Stale or unreadable: fall back to parsing
+            pass
+
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(file_name, 'rb') as f:
+        contents = yaml.load(f, Loader=loader)
+
+    if compiled is not None:
+        _save(compiled, (stamp, contents))
+    return contents
+
+def _compiled_path(rel_path):
+    """
+    Helper method to return the path of the compiled file for the given
+    description file.
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    # The marshal format is specific to the interpreter version, and several
+    # installs of this package may share the cache directory
+    install = hashlib.md5(_DESCRIPTIONS_DIR.encode('utf-8')).hexdigest()[:8]
+    name = '%s-%s.py%d%d.marshal' % (rel_path.replace('/', '__').replace('\\', '__'),
+                                     install, sys.version_info[0],
+                                     sys.version_info[1])
+    return os.path.join(cache_dir, name)
+
+def _trusted(compiled):
+    """
+    Helper method to tell whether the given compiled file exists and may be
+    loaded: it and its directory must be owned by the current user and must
+    not be writable by the group or others.
+    """
+    for path in (os.path.dirname(compiled), compiled):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            return False
+        if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            return False
+    return True
+
+def _save(compiled, value):
+    """
+    Helper method to write a compiled file atomically. Failures are ignored
+    since the compiled files are only an optimization.
+    """
+    tmp = '%s.%d.tmp' % (compiled, os.getpid())
+    try:
+        cache_dir = os.path.dirname(compiled)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(value, f)
+        os.rename(tmp, compiled)
+    except (IOError, OSError, ValueError):
+        # ValueError: the contents hold values marshal does not support
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
@@ -22,27 +22,18 @@ This module defines the Resource class.
 """
 from __future__ import unicode_literals
 from __future__ import print_function
-from builtins import str
-from builtins import object
 from pprint import pformat
 from lxml import etree, objectify
-from jinja2 import Environment, PackageLoader
 
-from jnpr.space import xmlutil, util, base, rest
+from jnpr.space import xmlutil, util, base, rest, templating
 
-class Resource(base._SpaceBase):
+class _ResourceBase(base._SpaceBase):
     """
-    Represents a **resource** that is exposed by Junos Space REST API.
-    Some examples of resources are:
-
-    * A device (``/api/space/device-management/devices/{id}``)
-    * Configuration of a device \
-      (``/api/space/device-management/devices/{id}/configurations/raw``)
-    * A user (``/api/space/user-management/users/{id}``)
-    * A tag (``/api/space/tag-management/tags/{id}``)
-
+    Implements the functionality shared by Resource and CompactResource.
     """
 
+    __slots__ = ()
+
     def __init__(self, type_name, rest_end_point,
                  xml_data=None, attributes=None, parent=None):
         """Initializes a Resource object.
@@ -61,7 +52,9 @@ class Resource(base._SpaceBase):
         :type rest_end_point: jnpr.space.rest.Space
 
         :param lxml.etree.Element xml_data:  The state of the resource as an
-            XML object. This defaults to ``None``.
+            XML object. If this is an ``lxml.objectify.ObjectifiedElement``,
+            it is used as it is. Otherwise, an objectified copy of it is
+            made. This defaults to ``None``.
 
         :param dict attributes:  The state of the resource as a dict where the
             keys are attribute names and values are attribute values.
@@ -85,7 +78,9 @@ class Resource(base._SpaceBase):
                 exc = Exception('Invalid xml object for this resource!')
                 exc.ignore = True
                 raise exc
-            self._xml_data = xmlutil.xml2obj(etree.tostring(xml_data, encoding='unicode'))
+            if not isinstance(xml_data, objectify.ObjectifiedElement):
+                self._xml_data = xmlutil.xml2obj(etree.tostring(xml_data,
+                                                                encoding='unicode'))
 
     def _init_meta_data(self, rest_end_point, type_name):
         """
@@ -157,12 +152,7 @@ class Resource(base._SpaceBase):
             self._methods[attr] = method
             return method
 
-        # Check if it is an XML attribute
-        thing = self._xml_data.get(attr)
-        if thing is not None:
-            return thing
-
-        return self._xml_data[xmlutil.make_xml_name(attr)]
+        return self._get_field(attr)
         # return self._xml_data.__getattr__(attr) # For issue #27
 
         """
@@ -182,6 +172,17 @@ class Resource(base._SpaceBase):
             raise AttributeError("No attribute '%s'" % attr)
         """
 
+    def _get_field(self, attr):
+        """
+        Helper method to return the value of the given XML attribute, or
+        else the given field, of the XML data of this resource.
+        """
+        thing = self._xml_data.get(attr)
+        if thing is not None:
+            return thing
+
+        return self._xml_data[xmlutil.make_xml_name(attr)]
+
     def __getitem__(self, attr):
         """
         This method is overridden so that contained elements can be accessed
@@ -204,12 +205,13 @@ class Resource(base._SpaceBase):
         """Returns the named XML attribute from the XML data element contained
         by this resource.
 
-        :returns: Value of the named attribute
-        :raises: ``AttributeError`` if there is no such XML attribute
+        :returns: Value of the named attribute, or ``None`` if there is no
+            such XML attribute or no XML data.
         """
-        return self._xml_data.get(attr)
+        if self._xml_data is not None:
+            return self._xml_data.get(attr)
 
-    def get(self, attr=None, accept=None):
+    def get(self, attr=None, accept=None, fields=None):
         """
         This is an overloaded method that does two things: If the ``attr``
         parameter is passed, it returns the corresponding XML attribute from
@@ -225,6 +227,13 @@ class Resource(base._SpaceBase):
             ``None`` and in this case SpaceEZ will use the media-type modeled
             in the description file.
 
+        :param fields: A list of field names to keep in the state of the
+            resource, e.g. ``['name', 'ipAddr']``. All other elements are
+            dropped while the response is parsed. See ``Collection.get()``
+            for details. The resource cache is not used for such a partial
+            state. This defaults to ``None``.
+        :type fields: list of str
+
         :returns:
             - Value of the named XML attribute. OR
             - The current state of this resource fetched from Space and
@@ -239,10 +248,26 @@ class Resource(base._SpaceBase):
         if attr is not None:
             return self._get_xml_attr(attr)
 
+        headers = self._prepare_get(accept)
+        if fields is not None:
+            url = self._rest_end_point._select_fields(self.get_href(), fields)
+            response = self._rest_end_point.get(url, headers)
+            return self._handle_get(response, fields=fields)
+
+        cached = self._get_cached(headers)
+        if cached is not None:
+            return cached
+        response = self._rest_end_point.get(self.get_href(), headers)
+        return self._handle_get(response, headers)
+
+    def _prepare_get(self, accept):
+        """
+        Helper method to form the headers for a GET on this resource.
+        """
         if accept is not None:
             mtype = accept
         else:
-            mtype = self._meta_object.get_media_type(None)
+            mtype = self._negotiate_media_type()
 
         if mtype is not None:
             if not self._meta_object.retain_charset_in_accept:
@@ -253,14 +278,58 @@ class Resource(base._SpaceBase):
         else:
             headers = {}
 
-        response = self._rest_end_point.get(self.get_href(), headers)
+        return headers
+
+    def _get_cached(self, headers):
+        """
+        Helper method to look up the state of this resource in the resource
+        cache of the Space instance, if it has one. A new object is parsed
+        for each hit.
+        """
+        res_cache = self._rest_end_point.resource_cache
+        if res_cache is not None:
+            response = res_cache.get(self.get_href(), headers.get('accept'))
+            if response is not None:
+                return xmlutil.get_obj_from_response(response)
+
+    def _handle_get(self, response, headers=None, fields=None):
+        """
+        Helper method to check the response for a GET on this resource and
+        create the result from it. The result is added to the resource cache
+        of the Space instance, if it has one, unless only the given fields
+        were kept.
+        """
         if response.status_code != 200:
             raise rest.RestException("GET failed on %s" % self.get_href(),
                                      response)
 
-        #r = response.text
-        resp_txt = xmlutil.get_text_from_response(response)
-        return xmlutil.xml2obj(resp_txt)
+        if fields is not None:
+            return xmlutil.parse_fields(
+                [xmlutil.get_bytes_from_response(response)], fields, 0,
+                objectified=True)
+
+        res_cache = self._rest_end_point.resource_cache
+        if res_cache is not None and headers is not None:
+            res_cache.put(self.get_href(), headers.get('accept'), response,
+                          self._cache_names())
+        return xmlutil.get_obj_from_response(response)
+
+    def _cache_names(self):
+        """
+        Helper method to return the dotted names used to look up the TTL of
+        this resource in the resource cache: the resource type, the parent
+        collection (if any) and the service.
+        """
+        names = [self._type_name]
+        meta_parent = getattr(self._parent, '_meta_object', None)
+        if hasattr(meta_parent, 'service_name') and \
+           hasattr(meta_parent, 'key'):
+            names.append('.'.join([name for name in (meta_parent.app_name,
+                                                     meta_parent.service_name,
+                                                     meta_parent.key)
+                                   if name]))
+        names.append(self._type_name.rsplit('.', 1)[0])
+        return names
 
     def put(self, new_val_obj=None, request_body=None,
             accept=None, content_type=None):
@@ -299,6 +368,18 @@ class Resource(base._SpaceBase):
             an error response. The exception's ``response`` attribute will have
             the full response from Space.
 
+        """
+        headers, body = self._prepare_put(new_val_obj, request_body,
+                                          accept, content_type)
+        response = self._rest_end_point.put(self.get_href(),
+                                            headers,
+                                            body)
+        self._handle_put(response)
+
+    def _prepare_put(self, new_val_obj, request_body, accept, content_type):
+        """
+        Helper method to form the headers and body for a PUT on this resource.
+        Returns them as a tuple.
         """
         if request_body is not None:
             body = request_body
@@ -319,9 +400,16 @@ class Resource(base._SpaceBase):
         if accept is not None:
             headers['accept'] = accept
 
-        response = self._rest_end_point.put(self.get_href(),
-                                            headers,
-                                            body)
+        return headers, body
+
+    def _handle_put(self, response):
+        """
+        Helper method to check the response for a PUT on this resource and
+        re-initialize the state of this resource from it.
+        """
+        if self._rest_end_point.resource_cache is not None:
+            self._rest_end_point.resource_cache.invalidate(self.get_href())
+
         if response.status_code != 200:
             raise rest.RestException("PUT failed on %s" % self.get_href(),
                                      response)
@@ -334,8 +422,7 @@ class Resource(base._SpaceBase):
         #root = etree.fromstring(response.content)
 
         # Fixing issue #19 self._xml_data = root
-        resp_text = xmlutil.get_text_from_response(response)
-        self._xml_data = xmlutil.xml2obj(resp_text)
+        self._xml_data = xmlutil.get_obj_from_response(response)
 
     def delete(self):
         """Deletes this resource on Space by sending a DELETE request with the
@@ -346,6 +433,14 @@ class Resource(base._SpaceBase):
             in an error response. The exception's ``response`` attribute will
             have the full response from Space.
 
+        """
+        url = self._prepare_delete()
+        response = self._rest_end_point.delete(url)
+        self._handle_delete(url, response)
+
+    def _prepare_delete(self):
+        """
+        Helper method to form the URL for a DELETE on this resource.
         """
         if self._meta_object.use_uri_for_delete:
             url = self._xml_data.get('uri')
@@ -353,13 +448,24 @@ class Resource(base._SpaceBase):
                 url = '/'.join([self._parent.get_href(), str(self.id)])
         else:
             url = self.get_href()
-        response = self._rest_end_point.delete(url)
+        return url
+
+    def _handle_delete(self, url, response):
+        """
+        Helper method to check the response for a DELETE on this resource.
+        """
+        res_cache = self._rest_end_point.resource_cache
+        if res_cache is not None:
+            res_cache.invalidate(url)
+            res_cache.invalidate(self.get_href())
+
         if response.status_code != 204 and response.status_code != 200 and \
            response.status_code != 202:
             raise rest.RestException("DELETE failed on %s" % url, response)
 
     def post(self, accept=None, content_type=None, request_body=None,
-             task_monitor=None, schedule=None, *args, **kwargs):
+             task_monitor=None, schedule=None, stream_body=False,
+             *args, **kwargs):
         """
         Some resources support the POST method. For example, the configuration
         of a device supports the POST method which can be used to fetch
@@ -396,6 +502,11 @@ class Resource(base._SpaceBase):
             has asynchronous semantics and you want to schedule the execution.
             Otherwise, this will default to ``None``.
 
+        :param bool stream_body: If ``True``, the request body is rendered from
+            the modeled template while it is being sent, using chunked
+            transfer encoding. This avoids building large bodies (e.g. for
+            thousands of devices) in memory. Defaults to ``False``.
+
         :param kwargs: Keyword args of the form name=value which will be used
             to substitute variables in a pre-defined template (if applicable)
             to form the request body.
@@ -410,6 +521,19 @@ class Resource(base._SpaceBase):
             an error response. The exception's ``response`` attribute will have
             the full response from Space.
 
+        """
+        url, headers, body = self._prepare_post(accept, content_type,
+                                                request_body, task_monitor,
+                                                schedule, stream_body,
+                                                **kwargs)
+        response = self._rest_end_point.post(url, headers, body)
+        return self._handle_post(url, response)
+
+    def _prepare_post(self, accept, content_type, request_body,
+                      task_monitor, schedule, stream_body=False, **kwargs):
+        """
+        Helper method to form the URL, headers and body for a POST on this
+        resource. Returns them as a tuple.
         """
         url = self.get_href()
         if task_monitor is not None:
@@ -431,15 +555,25 @@ class Resource(base._SpaceBase):
         if request_body is not None:
             body = request_body
         elif self._meta_object.request_template is not None:
-            body = self._meta_object.request_template.render(**kwargs)
+            if stream_body:
+                body = templating.StreamedBody(
+                    self._meta_object.request_template, kwargs)
+            else:
+                body = self._meta_object.request_template.render(**kwargs)
         else:
             body = None
 
-        response = self._rest_end_point.post(url, headers, body)
+        return url, headers, body
+
+    def _handle_post(self, url, response):
+        """
+        Helper method to check the response for a POST on this resource and
+        create the result from it.
+        """
         if (response.status_code != 202) and (response.status_code != 200):
             raise rest.RestException("POST failed on %s" % url, response)
 
-        resp_text = xmlutil.get_text_from_response(response)
+        resp_text = xmlutil.get_bytes_from_response(response)
         resp_text = xmlutil.cleanup(resp_text)
         if self._meta_object.remove_junos_group:
             resp_text = xmlutil.remove_junos_group(resp_text)
@@ -506,7 +640,7 @@ class Resource(base._SpaceBase):
         if self._attributes is not None:
             attributes = self._attributes
         else:
-            attributes = self.__dict__
+            attributes = getattr(self, '__dict__', {})
 
         for key, value in attributes.items():
             if key.startswith('_'):
@@ -515,7 +649,7 @@ class Resource(base._SpaceBase):
             xml_name = util.make_xml_name(key)
             if xml_name == 'href':
                 ele.attrib[xml_name] = str(value)
-            elif isinstance(value, Resource):
+            elif isinstance(value, _ResourceBase):
                 ele.append(value.form_xml())
             elif isinstance(value, list):
                 lst = etree.SubElement(ele, xml_name)
@@ -562,6 +696,130 @@ class Resource(base._SpaceBase):
         """
         print(self.xml_string())
 
+    def _take_state(self, other):
+        """
+        Replaces the XML state of this resource with that of the given one.
+        """
+        self._xml_data = other._xml_data
+
+class Resource(_ResourceBase):
+    """
+    Represents a **resource** that is exposed by Junos Space REST API.
+    Some examples of resources are:
+
+    * A device (``/api/space/device-management/devices/{id}``)
+    * Configuration of a device \
+      (``/api/space/device-management/devices/{id}/configurations/raw``)
+    * A user (``/api/space/user-management/users/{id}``)
+    * A tag (``/api/space/tag-management/tags/{id}``)
+
+    """
+
+class CompactResource(_ResourceBase):
+    """
+    A memory efficient variant of Resource, used for all resources reached
+    through a Space instance created with ``compact_resources=True``.
+
+    The XML state is kept as serialized bytes and parsed only when a field
+    is first accessed. The href is extracted up front, so that ``get_href()``
+    does not need the parsed state. Contained collections and methods are
+    tracked only once one of them is accessed. Instances have no
+    ``__dict__``, so arbitrary attributes cannot be set on them, and they
+    are not instances of Resource.
+    """
+
+    __slots__ = ('_type_name', '_rest_end_point', '_raw', '_obj', '_href',
+                 '_attributes', '_parent', '_collections', '_methods',
+                 '_meta_object', 'id', '__weakref__')
+
+    def __init__(self, type_name, rest_end_point,
+                 xml_data=None, attributes=None, parent=None):
+        """Initializes a CompactResource object. See ``Resource`` for the
+        parameters.
+        """
+        self._type_name = type_name
+        self._rest_end_point = rest_end_point
+        self._raw = None
+        self._obj = None
+        self._href = None
+        self._attributes = attributes
+        self._parent = parent
+        self._collections = None
+        self._methods = None
+        self._init_meta_data(rest_end_point, type_name)
+        if xml_data is not None:
+            if self._meta_object.xml_name != xml_data.tag:
+                exc = Exception('Invalid xml object for this resource!')
+                exc.ignore = True
+                raise exc
+            self._raw = etree.tostring(xml_data)
+            self._href = xml_data.get('href')
+
+    @property
+    def _xml_data(self):
+        """
+        The state of this resource as an objectified XML element, parsed on
+        first access.
+        """
+        if self._obj is None and self._raw is not None:
+            self._obj = xmlutil.xml2obj(self._raw)
+            self._raw = None
+        return self._obj
+
+    @_xml_data.setter
+    def _xml_data(self, value):
+        self._obj = value
+        self._raw = None
+        self._href = value.get('href') if value is not None else None
+
+    def __getattr__(self, attr):
+        """
+        See ``Resource.__getattr__()``.
+        """
+        if attr.startswith('_'):
+            # Also avoids recursion on slots that are not set yet
+            raise AttributeError(attr)
+
+        if self._collections is not None and attr in self._collections:
+            return self._collections[attr]
+
+        if self._methods is not None and attr in self._methods:
+            return self._methods[attr]
+
+        collection = self._meta_object.create_collection(self, attr)
+        if collection is not None:
+            if self._collections is None:
+                self._collections = {}
+            self._collections[attr] = collection
+            return collection
+
+        method = self._meta_object.create_method(self, attr)
+        if method is not None:
+            if self._methods is None:
+                self._methods = {}
+            self._methods[attr] = method
+            return method
+
+        return self._get_field(attr)
+
+    def _get_xml_attr(self, attr):
+        if attr == 'href' and (self._href is not None or self._obj is None):
+            return self._href
+        return super(CompactResource, self)._get_xml_attr(attr)
+
+    def get_href(self):
+        if self._href is not None:
+            return self._href
+        return super(CompactResource, self).get_href()
+
+    def _take_state(self, other):
+        if isinstance(other, CompactResource) and other._obj is None:
+            self._obj = None
+            self._raw = other._raw
+            self._href = other._href
+        else:
+            self._xml_data = other._xml_data
+
 """
 A dictionary that acts as a cache for meta objects representing resources.
 Keys are of the form ``<service-name>.<type_name>``. Values are instances of
@@ -655,12 +913,9 @@ class MetaResource(object):
         self.response_type = values['response_type'] \
             if 'response_type' in values else None
 
-        if 'request_template' in values:
-            env = Environment(loader=PackageLoader('jnpr.space',
-                                                   'templates'))
-            self.request_template = env.get_template(values['request_template'])
-        else:
-            self.request_template = None
+        self.request_template_name = values['request_template'] \
+            if ('request_template' in values) else None
+        self._request_template = None
 
         try:
             from jnpr.space import collection
@@ -686,6 +941,18 @@ class MetaResource(object):
         except KeyError:
             pass
 
+    @property
+    def request_template(self):
+        """
+        The template used to form request bodies, or ``None``. It is loaded
+        on first use.
+        """
+        if self._request_template is None and \
+           self.request_template_name is not None:
+            self._request_template = templating.get_template(
+                self.request_template_name)
+        return self._request_template
+
     def get_media_type(self, version):
         """
         Returns media-type modelled in the yaml file.
@@ -715,8 +982,8 @@ class MetaResource(object):
 
         """
         if name in self.collections:
-            from jnpr.space import collection
-            return collection.Collection(resrc, name, self.collections[name])
+            coll_class = resrc._rest_end_point._node_class('collection')
+            return coll_class(resrc, name, self.collections[name])
 
     def create_method(self, resrc, name):
         """Creates a method object.
@@ -735,4 +1002,5 @@ class MetaResource(object):
                                            self.service_name,
                                            name,
                                            self.methods[name])
-            return method.Method(resrc, name, m_obj)
+            method_class = resrc._rest_end_point._node_class('method')
+            return method_class(resrc, name, m_obj)
@@ -23,16 +23,12 @@ This module defines the Space class.
 from __future__ import unicode_literals
 from __future__ import print_function
 from __future__ import division
-from builtins import range
-from builtins import object
-from past.utils import old_div
-import os
-import re
 import threading
+import weakref
 
-import requests
 import logging
-import yaml
+
+from jnpr.space import pipeline, registry
 
 class Space(object):
     """Encapsulates a Junos Space cluster and provides access to all RESTful
@@ -59,6 +55,17 @@ class Space(object):
         using one instance of this class.
     """
 
+    #
+    # Dotted names of the classes used to represent the services, collections,
+    # resources and methods reached through an instance of this class.
+    # Sub-classes can override these to build the same tree of objects from
+    # the descriptions, using different classes.
+    #
+    _node_classes = {'service': 'jnpr.space.service.Service',
+                     'collection': 'jnpr.space.collection.Collection',
+                     'resource': 'jnpr.space.resource.Resource',
+                     'method': 'jnpr.space.method.Method'}
+
     def __init__(self,
                  url,
                  user=None,
@@ -66,7 +73,16 @@ class Space(object):
                  cert=None,
                  use_session=False,
                  required_node=None,
-                 profile_file=None):
+                 profile_file=None,
+                 pool_size=10,
+                 http_cache=False,
+                 resource_cache=None,
+                 cache_file=None,
+                 single_flight=False,
+                 identity_map=False,
+                 info_cache_file=None,
+                 compact_resources=False,
+                 field_selector=None):
         """Creates an instance of this class to represent a Junos Space cluster.
 
         :param url: URL of the Junos Space cluster using its VIP address.
@@ -94,12 +110,58 @@ class Space(object):
         :param str profile_file: Full pathname of a file where response times
             for each API call is to be recorded. This parameter is ``None``
             by default.
+        :param int pool_size: This parameter is used only if ``use_session``
+            is set to False. It gives the maximum number of keep-alive
+            connections to the Space cluster that are kept open for re-use by
+            API calls. Set it to at least the number of threads that invoke
+            APIs concurrently using this instance. It is 10 by default.
+        :param bool http_cache: Whether to cache GET responses that carry an
+            ``ETag`` or ``Last-Modified`` header, and to re-validate them
+            with conditional requests. See ``cache.HttpCacheStage`` for
+            details. It is ``False`` by default.
+        :param resource_cache: A cache of resource states that is used by
+            ``Resource.get()`` and ``factory.fetch_resource()``. This
+            parameter is ``None`` by default.
+        :type resource_cache: jnpr.space.cache.ResourceCache
+        :param str cache_file: Full pathname of a SQLite file in which the
+            responses cached due to ``http_cache`` are also saved, so that
+            later processes can start with them. Giving this implies
+            ``http_cache``. This parameter is ``None`` by default.
+        :param bool single_flight: Whether identical GET requests made
+            concurrently by different threads should share one call to Space
+            and its response. See ``pipeline.SingleFlightStage`` for details.
+            It is ``False`` by default.
+        :param bool identity_map: Whether resources reached through this
+            instance should be de-duplicated by href. If set, a collection
+            ``get()`` or ``factory.fetch_resource()`` returns the existing
+            Resource object for an href, as long as it is referenced
+            elsewhere, with its state replaced by the one just fetched. It is
+            ``False`` by default.
+        :param str info_cache_file: Full pathname of a JSON file from which
+            cached introspection (``/api/info``) results are loaded, if it
+            exists, and into which ``prewarm_info()`` saves them. This
+            parameter is ``None`` by default.
+        :param bool compact_resources: If ``True``, resources are represented
+            by ``jnpr.space.resource.CompactResource`` objects, which keep
+            their state as serialized XML until a field is accessed. This
+            takes much less memory when many resources are held at once.
+            Defaults to ``False``.
+        :param str field_selector: Name of the query parameter with which
+            the Space server selects the fields of the resources it returns,
+            if it supports one. When ``fields`` are given to a GET, a clause
+            such as ``fields=(name,ipAddr)`` is then added to the URL, in
+            addition to dropping the other fields while parsing. Support for
+            this varies across Space releases and APIs, so it is not
+            detected. This parameter is ``None`` by default.
 
         :returns:  An instance of this class encapsulating the Junos Space
                    cluster whose **url** was given as a parameter. It can be
                    used to access all APIs provided by Space.
         """
         self._lock = threading.Lock()
+        self._relogin_lock = threading.Lock()
+        self._login_count = 0
+        self._required_node = required_node
         self.space_url = url
 
         if user is not None:
@@ -126,7 +188,20 @@ class Space(object):
         self._services = {}
         self._applications = {}
         self._use_session = use_session
-
+        self._transport = None
+        self._transport_lock = threading.Lock()
+        self._pool_size = pool_size
+        self.resource_cache = resource_cache
+        self.field_selector = field_selector
+        self._identity_map = weakref.WeakValueDictionary() \
+            if identity_map else None
+        self._identity_lock = threading.Lock()
+        self._compact_resources = compact_resources
+        from jnpr.space import cache
+        self.info_cache = cache.InfoCache(info_cache_file)
+
+        # Without session based login, the transport (and requests) is set
+        # up on the first API call
         if use_session:
             self.login(required_node)
 
@@ -135,28 +210,112 @@ class Space(object):
         else:
             self.profile_file = None
 
+        self.pipeline = self._create_pipeline()
+        if http_cache or cache_file is not None:
+            from jnpr.space import cache
+            store = cache.SqliteStore(cache_file) \
+                if cache_file is not None else None
+            # Ahead of metrics, so that 304 responses are counted as such
+            stage = cache.HttpCacheStage(store=store,
+                                         space_url=self.space_url,
+                                         user=self.space_user)
+            self.pipeline.add_stage(stage, 1)
+        if single_flight:
+            # Ahead of all but tracing, so that shared calls are not counted
+            self.pipeline.add_stage(pipeline.SingleFlightStage(), 1)
+
     def __str__(self):
         return ' '.join(['Space <',
                          '@'.join([self.space_user, self.space_url]),
                          '>'])
 
+    def _create_transport(self, pool_size):
+        """
+        Creates the pool of keep-alive connections used when there is no
+        session based login.
+        """
+        from jnpr.space import transport
+        return transport.PooledTransport(cert=self.cert, pool_size=pool_size)
+
+    def _get_transport(self):
+        """
+        Returns the pool of keep-alive connections, creating it on first use.
+        """
+        with self._transport_lock:
+            if self._transport is None:
+                self._transport = self._create_transport(self._pool_size)
+            return self._transport
+
+    def _create_pipeline(self):
+        """
+        Creates the request pipeline with the default stages. More stages
+        (e.g. ``pipeline.RetryStage``) can be added to it later using
+        ``self.pipeline.add_stage()``.
+        """
+        return pipeline.Pipeline(self._send,
+                                 [pipeline.TracingStage(self._logger),
+                                  pipeline.MetricsStage(self.profile_file),
+                                  pipeline.AuthStage(self)])
+
+    def _node_class(self, kind):
+        """
+        Returns the class used to represent the given kind of node
+        ('service', 'collection', 'resource' or 'method') in the tree of
+        objects reached through this instance.
+        """
+        from jnpr.space import util
+        return util.get_class_def(self._node_classes[kind])
+
+    def _resource_class(self, type_name):
+        """
+        Returns the class used to represent resources of the given type in
+        the tree of objects reached through this instance.
+
+        :param str type_name: Fully qualified type name of the resources,
+            e.g. ``device_management.device``.
+        """
+        return self._node_class('resource')
+
+    def _parsed_resource_class(self, type_name):
+        """
+        Returns the class used to represent resources of the given type that
+        are parsed from the response to a collection GET. This is
+        ``jnpr.space.resource.CompactResource`` if ``compact_resources`` is
+        set. Resources created locally (e.g. by ``factory.make_resource()``)
+        always use ``_resource_class()``, since they must accept new fields.
+
+        :param str type_name: Fully qualified type name of the resources,
+            e.g. ``device_management.device``.
+        """
+        if self._compact_resources:
+            from jnpr.space import resource
+            return resource.CompactResource
+        return self._resource_class(type_name)
+
+    def _select_fields(self, url, fields):
+        """
+        Returns the given URL with the clause that selects the given fields
+        on the server added, if ``field_selector`` was set.
+
+        :param str url: The URL of a GET request.
+        :param list fields: Names of the fields to select.
+        """
+        if self.field_selector is None or not fields:
+            return url
+        clause = '%s=(%s)' % (self.field_selector, ','.join(fields))
+        return ('&' if '?' in url else '?').join([url, clause])
+
     def _init_services(self):
         """
         Initialize services from yaml file.
         """
-        path = os.path.abspath(__file__)
-        dir_path = os.path.dirname(path)
-        with open(dir_path + '/descriptions/services.yml') as serv_file:
-            return yaml.load(serv_file)['services']
+        return registry.load('services.yml')['services']
 
     def _init_applications(self):
         """
         Initialize applications from yaml file.
         """
-        path = os.path.abspath(__file__)
-        dir_path = os.path.dirname(path)
-        with open(dir_path + '/descriptions/applications.yml') as app_file:
-            return yaml.load(app_file)['applications']
+        return registry.load('applications.yml')['applications']
 
     def __getattr__(self, attr):
         """
@@ -176,9 +335,9 @@ class Space(object):
             return self._services[attr]
 
         if attr in self._meta_services:
-            from jnpr.space import service
             value = self._meta_services[attr]
-            self._services[attr] = service.Service(self, attr, value)
+            self._services[attr] = self._node_class('service')(self,
+                                                               attr, value)
             return self._services[attr]
 
         if attr in self._applications:
@@ -205,18 +364,6 @@ class Space(object):
         from jnpr.space import xmlutil
         return self.__getattr__(xmlutil.unmake_xml_name(attr))
 
-    def _log_time(self, oper, url, response):
-        """
-        Log response time into profiling output file.
-        """
-        if self.profile_file is not None:
-            url = re.sub(r'\d+', '{id}', url)
-            url = re.sub(r',', '_', url)
-            num_ms = response.elapsed.seconds * 1000 + \
-                     old_div(response.elapsed.microseconds, 1000)
-            print("%s, %s, %d, %d" % (oper, url, response.status_code,
-                                      num_ms),
-                  file=self.profile_file)
     def describe(self):
         print('\tJunos Space at URL: %s' % self.space_url)
         if len(self._meta_services) > 0:
@@ -230,9 +377,51 @@ class Space(object):
                 print('\t\t%s (%s)' % (k, self._meta_applications[k]['url']))
 
 
+    def request(self, method, url, headers=None, body=None, stream=False):
+        """Sends an HTTP request to Space through the request pipeline of this
+        instance. All the verb methods below (``get()``, ``post()``, etc.)
+        use this method.
+
+        :param str method: The HTTP method (GET, HEAD, POST, PUT, DELETE)
+        :param str url: URL for the request, relative to the URL of the Space
+            cluster.
+        :param dict headers: A dict with the headers that need to be sent with
+            the request. Defaults to ``None``.
+        :param str body: A string that forms the body of the request. Defaults
+            to ``None``.
+        :param bool stream: If ``True``, only the headers of the response are
+            read before returning. The body must then be consumed using
+            ``iter_content()`` and the response must be closed by the caller.
+            Defaults to ``False``.
+
+        :returns: The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
+            returned for the request.
+        """
+        return self.pipeline.execute(pipeline.Request(method, url,
+                                                      headers, body, stream))
+
+    def _send(self, request):
+        """
+        Puts the given request on the wire. This is the last step of the
+        request pipeline.
+        """
+        req_url = self.space_url + request.url
+        if self._use_session:
+            return self._connection.get_session().request(
+                request.method, req_url,
+                headers=request.headers,
+                data=request.body,
+                stream=request.stream,
+                verify=False)
+        else:
+            transport = self._transport or self._get_transport()
+            return transport.request(request.method, req_url,
+                                     headers=request.headers,
+                                     data=request.body,
+                                     stream=request.stream)
+
     def get(self, url, headers={}):
-        """Performs an HTTP GET on the given url. Acts as a wrapper over
-        requests.get() function.
+        """Performs an HTTP GET on the given url.
 
         :param str url: URL for performing GET
         :param dict headers: A dict with the headers that need to be sent with
@@ -241,34 +430,10 @@ class Space(object):
         :returns: The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
             returned by the GET request.
         """
-        req_url = self.space_url + url
-        self._logger.debug("GET %s", req_url)
-        self._logger.debug(headers)
-        if self._use_session:
-            resp = self._connection.get_session().get(req_url,
-                                                      headers=headers,
-                                                      verify=False)
-        else:
-            if self.cert is not None:
-                resp = requests.get(req_url,
-                                    cert=self.cert,
-                                    headers=headers,
-                                    verify=False)
-            else:
-                resp = requests.get(req_url,
-                                    auth=(self.space_user, self.space_passwd),
-                                    headers=headers,
-                                    verify=False)
-        self._logger.debug(resp)
-        self._logger.debug(resp.headers)
-        self._logger.debug(resp.cookies)
-        self._logger.debug(resp.text)
-        self._log_time('GET', url, resp)
-        return resp
+        return self.request('GET', url, headers)
 
     def head(self, url, headers={}):
-        """Performs an HTTP HEAD on the given url. Acts as a wrapper over
-        requests.head() function.
+        """Performs an HTTP HEAD on the given url.
 
         :param str url: URL for performing HEAD
         :param dict headers: A dict with the headers that need to be sent with
@@ -277,34 +442,10 @@ class Space(object):
         :returns:  The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
             returned by the HEAD request.
         """
-        req_url = self.space_url + url
-        self._logger.debug("HEAD %s", req_url)
-        self._logger.debug(headers)
-        if self._use_session:
-            resp = self._connection.get_session().head(req_url,
-                                                       headers=headers,
-                                                       verify=False)
-        else:
-            if self.cert is not None:
-                resp = requests.head(req_url,
-                                     cert=self.cert,
-                                     headers=headers,
-                                     verify=False)
-            else:
-                resp = requests.head(req_url,
-                                     auth=(self.space_user, self.space_passwd),
-                                     headers=headers,
-                                     verify=False)
-        self._logger.debug(resp)
-        self._logger.debug(resp.headers)
-        self._logger.debug(resp.cookies)
-        self._logger.debug(resp.text)
-        self._log_time('HEAD', url, resp)
-        return resp
+        return self.request('HEAD', url, headers)
 
     def post(self, url, headers, body):
-        """Performs an HTTP POST on the given url. Acts as a wrapper over
-        requests.post() function.
+        """Performs an HTTP POST on the given url.
 
         :param str url: URL for performing POST
         :param dict headers: A dict with the headers that need to be sent with
@@ -315,38 +456,10 @@ class Space(object):
         :returns:  The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
                    returned by the POST request.
         """
-        req_url = self.space_url + url
-        self._logger.debug("POST %s", req_url)
-        self._logger.debug(headers)
-        self._logger.debug(body)
-        if self._use_session:
-            resp = self._connection.get_session().post(req_url,
-                                                       data=body,
-                                                       headers=headers,
-                                                       verify=False)
-        else:
-            if self.cert is not None:
-                resp = requests.post(req_url,
-                                     cert=self.cert,
-                                     data=body,
-                                     headers=headers,
-                                     verify=False)
-            else:
-                resp = requests.post(req_url,
-                                     auth=(self.space_user, self.space_passwd),
-                                     data=body,
-                                     headers=headers,
-                                     verify=False)
-        self._logger.debug(resp)
-        self._logger.debug(resp.headers)
-        self._logger.debug(resp.cookies)
-        self._logger.debug(resp.text)
-        self._log_time('POST', url, resp)
-        return resp
+        return self.request('POST', url, headers, body)
 
     def put(self, put_url, headers, body):
-        """Performs an HTTP PUT on the given url. Acts as a wrapper over
-        requests.put() function.
+        """Performs an HTTP PUT on the given url.
 
         :param str url: URL for performing PUT
         :param dict headers: A dict with the headers that need to be sent with
@@ -357,61 +470,83 @@ class Space(object):
         :returns:  The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
                    returned by the PUT request.
         """
-        req_url = self.space_url + put_url
-        self._logger.debug("PUT %s", req_url)
-        self._logger.debug(headers)
-        self._logger.debug(body)
-        if self._use_session:
-            resp = self._connection.get_session().put(req_url,
-                                                      data=body,
-                                                      headers=headers,
-                                                      verify=False)
-        else:
-            if self.cert is not None:
-                resp = requests.put(req_url,
-                                    cert=self.cert,
-                                    data=body,
-                                    headers=headers,
-                                    verify=False)
-            else:
-                resp = requests.put(req_url,
-                                    auth=(self.space_user, self.space_passwd),
-                                    data=body,
-                                    headers=headers,
-                                    verify=False)
-        self._logger.debug(resp)
-        self._logger.debug(resp.headers)
-        self._logger.debug(resp.cookies)
-        self._logger.debug(resp.text)
-        self._log_time('PUT', put_url, resp)
-        return resp
-
-    def delete(self, delete_url):
-        """Performs an HTTP DELETE on the given url. Acts as a wrapper over
-        requests.delete() function.
+        return self.request('PUT', put_url, headers, body)
+
+    def delete(self, delete_url, headers=None):
+        """Performs an HTTP DELETE on the given url.
 
         :param str url: URL for performing DELETE
+        :param dict headers: A dict with the headers that need to be sent with
+            the DELETE request. Defaults to ``None``.
 
         :returns:  The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
-                   returned by the POST request.
+                   returned by the DELETE request.
+        """
+        return self.request('DELETE', delete_url, headers)
+
+    def _canonical_resource(self, resrc):
+        """
+        Returns the Resource object that represents the href of the given
+        one, if ``identity_map`` is in use. The state of the given resource
+        replaces the state held by that object, since it is the fresher one.
+        Otherwise, the given resource itself is returned.
+        """
+        if self._identity_map is None:
+            return resrc
+
+        href = resrc._get_xml_attr('href')
+        if href is None:
+            return resrc
+
+        with self._identity_lock:
+            canonical = self._identity_map.get(href)
+            if canonical is None:
+                self._identity_map[href] = resrc
+                return resrc
+            if canonical._type_name != resrc._type_name:
+                return resrc
+            canonical._take_state(resrc)
+            if canonical._parent is None:
+                canonical._parent = resrc._parent
+            return canonical
+
+    def prewarm_info(self, placeholder_id=1):
+        """Fetches the introspection (``/api/info``) results for all
+        applications, services, collections, resources and methods described
+        for this instance, and saves them into ``info_cache_file`` if one was
+        given. Later calls to ``info()`` and media type version negotiation
+        then need no round trips to Space.
+
+        :param int placeholder_id: The id used to form the URLs of
+            resources. Defaults to 1.
+
+        :returns: The number of introspection calls made.
+        """
+        count = self.info_cache.prewarm(self, placeholder_id)
+        if self.info_cache.path is not None:
+            self.info_cache.save()
+        return count
+
+    def pool_stats(self):
+        """Returns counters for the pool of keep-alive connections used for
+        API calls when ``use_session`` is False.
+
+        :returns: A dict with ``hits`` (API calls that re-used an established
+            connection) and ``misses`` (API calls that had to set up a new
+            connection) as keys. ``None`` if session based login is in use.
         """
-        req_url = self.space_url + delete_url
-        self._logger.debug("DELETE %s", req_url)
         if self._use_session:
-            resp = self._connection.get_session().delete(req_url, verify=False)
-        else:
-            if self.cert is not None:
-                resp = requests.delete(req_url, cert=self.cert, verify=False)
-            else:
-                resp = requests.delete(req_url,
-                                       auth=(self.space_user, self.space_passwd),
-                                       verify=False)
-        self._logger.debug(resp)
-        self._logger.debug(resp.headers)
-        self._logger.debug(resp.cookies)
-        self._logger.debug(resp.text)
-        self._log_time('DELETE', delete_url, resp)
-        return resp
+            return None
+        if self._transport is None:
+            return {'hits': 0, 'misses': 0}
+        return self._transport.stats.as_dict()
+
+    def close(self):
+        """Closes all the pooled keep-alive connections held by this
+        instance. They are re-opened on demand by subsequent API calls.
+        """
+        if self._transport is not None:
+            self._transport.close()
 
     def logout(self):
         """Logs out the current session being used.
@@ -431,6 +566,7 @@ class Space(object):
         """
         with self._lock:
             from jnpr.space import connection
+            self._login_count += 1
             for i in range(10):
                 if self.space_user:
                     self._connection = connection.Connection(self.space_url,
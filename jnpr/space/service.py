@@ -21,10 +21,7 @@
 This module defines the Service class.
 """
 from __future__ import unicode_literals
-from builtins import object
-import os
-import yaml
-from jnpr.space import base
+from jnpr.space import base, registry
 
 class Service(base._SpaceBase):
     """
@@ -144,20 +141,16 @@ class MetaService(object):
         self._application = application
         self.name = name
 
-        path = os.path.abspath(__file__)
-        dir_path = os.path.dirname(path)
-        file_name = dir_path + '/descriptions/'
         if application is not None:
-            file_name = file_name + 'apps/' + application._name + '/' + name + '.yml'
+            file_name = 'apps/' + application._name + '/' + name + '.yml'
         else:
-            file_name = file_name + name + '.yml'
+            file_name = name + '.yml'
 
-        with open(file_name) as contents_file:
-            contents = yaml.load(contents_file)
-            self.values = contents
-            self._meta_collections = contents['collections']
-            self._meta_methods = contents['methods']
-            self._meta_resources = contents['resources']
+        contents = registry.load(file_name)
+        self.values = contents
+        self._meta_collections = contents['collections']
+        self._meta_methods = contents['methods']
+        self._meta_resources = contents['resources']
 
     def get_application_name(self):
         """Returns the name of the containing application if there is one.
@@ -181,7 +174,8 @@ class MetaService(object):
                                                service._name,
                                                name,
                                                self._meta_collections[name])
-            return collection.Collection(service, name, m_obj)
+            coll_class = service._rest_end_point._node_class('collection')
+            return coll_class(service, name, m_obj)
 
     def create_method(self, service, name):
         """Creates a method object corresponding to the given service and
@@ -200,7 +194,8 @@ class MetaService(object):
                                            service._name,
                                            name,
                                            self._meta_methods[name])
-            return method.Method(service, name, m_obj)
+            method_class = service._rest_end_point._node_class('method')
+            return method_class(service, name, m_obj)
 
     def get_meta_resource(self, name):
         """Returns the MetaResource object with the given name.
@@ -0,0 +1,139 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Access to the Jinja templates under the templates directory of this package,
+which are used to form request bodies.
+
+All templates are loaded through a single environment shared by the whole
+process. Compiled templates are kept in a bytecode cache in the templates
+sub-directory of the cache directory used by jnpr.space.registry, so that
+later processes do not have to compile them again.
+"""
+from __future__ import unicode_literals
+import os
+import threading
+
+from jnpr.space import registry
+
+_env = None
+_lock = threading.Lock()
+
+def get_environment():
+    """
+    Returns the Jinja environment shared by all request templates, creating
+    it on first use.
+    """
+    global _env
+    if _env is None:
+        with _lock:
+            if _env is None:
+                from jinja2 import Environment, PackageLoader
+                _env = Environment(loader=PackageLoader('jnpr.space',
+                                                        'templates'),
+                                   bytecode_cache=_make_bytecode_cache())
+    return _env
+
+def _make_bytecode_cache():
+    """
+    Helper method to create the bytecode cache, or return None if the cache
+    directory is disabled or cannot be created.
+    """
+    cache_dir = registry.get_cache_dir()
+    if cache_dir is None:
+        return None
+    cache_dir = os.path.join(cache_dir, 'templates')
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+    except OSError:
+        return None
+    from jinja2 import FileSystemBytecodeCache
+    return FileSystemBytecodeCache(cache_dir)
+
+def get_template(name):
+    """
+    Returns the compiled template with the given file name.
+
+    :param str name: File name of the template, e.g. 'rpc.tpl'.
+    """
+    return get_environment().get_template(name)
+
+def precompile():
+    """
+    Compiles all the templates shipped with this package, so that no
+    compilation happens when a request is made later. The results are also
+    stored in the bytecode cache.
+
+    :returns: The number of templates compiled.
+    """
+    env = get_environment()
+    names = env.list_templates(extensions=['tpl'])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+def render_stream(template, chunk_size=65536, **kwargs):
+    """
+    Renders the given template incrementally, without building the whole
+    output in memory.
+
+    :param template: The template to render.
+    :type template: jinja2.Template
+    :param int chunk_size: Output is yielded in pieces of about this many
+        bytes.
+    :param kwargs: Variables to substitute in the template.
+
+    :returns: A generator of UTF-8 encoded byte strings.
+    """
+    parts = []
+    size = 0
+    for text in template.generate(**kwargs):
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
+
+class StreamedBody(object):
+    """
+    A request body rendered from a template while it is being sent. Each
+    iteration renders the template again, so the body can be sent more than
+    once (e.g. when a request is retried).
+    """
+
+    def __init__(self, template, variables, chunk_size=65536):
+        """
+        :param template: The template to render.
+        :type template: jinja2.Template
+        :param dict variables: Variables to substitute in the template.
+        :param int chunk_size: Size of the chunks that are sent.
+        """
+        self.template = template
+        self.variables = variables
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return render_stream(self.template, self.chunk_size, **self.variables)
+
+    def __str__(self):
+        return self.template.render(**self.variables)
@@ -0,0 +1,37 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import os
+
+import pytest
+
+@pytest.fixture(scope='session', autouse=True)
+def space_ez_cache_dir(tmp_path_factory):
+    """
+    Keeps the compiled description files written during tests out of the
+    user's home directory.
+    """
+    saved = os.environ.get('SPACE_EZ_CACHE_DIR')
+    cache_dir = str(tmp_path_factory.mktemp('space-ez'))
+    os.environ['SPACE_EZ_CACHE_DIR'] = cache_dir
+    yield cache_dir
+    if saved is None:
+        del os.environ['SPACE_EZ_CACHE_DIR']
+    else:
+        os.environ['SPACE_EZ_CACHE_DIR'] = saved
@@ -0,0 +1,110 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+A minimal HTTP server that stands in for a Junos Space cluster in test cases
+that must run without access to a real one.
+"""
+from __future__ import unicode_literals
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _read_chunks(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0], 16)
+            if size == 0:
+                self.rfile.readline()
+                return b''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _handle(self):
+        stub = self.server.stub
+        if self.headers.get('transfer-encoding') == 'chunked':
+            body = self._read_chunks()
+        else:
+            length = int(self.headers.get('content-length', 0))
+            body = self.rfile.read(length) if length else None
+        with stub.lock:
+            stub.requests.append((self.command, self.path,
+                                  dict(self.headers), body))
+        route = stub.routes.get((self.command, self.path))
+        if route is None:
+            route = stub.routes.get((self.command, self.path.split('?')[0]))
+        if route is None:
+            status, headers, content = 404, {}, b''
+        elif callable(route):
+            status, headers, content = route(self.path, self.headers, body)
+        else:
+            status, headers, content = route
+
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = _handle
+
+class StubSpace(object):
+    """
+    Serves canned responses over HTTP on a local port. Routes are set in the
+    ``routes`` dict as ``{(method, path): (status, headers, body)}``, where
+    the path may include the query string. The value may also be a callable
+    taking (path, headers, body) and returning such a tuple. All requests
+    received are recorded in the ``requests`` list.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.stub = self
+        self.url = 'http://127.0.0.1:%d' % self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add_xml(self, path, xml, media_type='application/xml', method='GET'):
+        """
+        Adds a route that returns the given XML with status 200.
+        """
+        self.routes[(method, path)] = (200, {'Content-Type': media_type}, xml)
+
+    def stop(self):
+        """
+        Shuts down the server.
+        """
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,165 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from jnpr.space import aio, rest, pipeline
+from jnpr.space.test.stub_server import StubSpace
+from jnpr.space.test.test_paging import NUM_DEVICES, paged_devices
+
+DEVICES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<devices total="2" uri="/api/space/device-management/devices">
+<device href="/api/space/device-management/devices/1" key="1"><name>d1</name></device>
+<device href="/api/space/device-management/devices/2" key="2"><name>d2</name></device>
+</devices>"""
+
+DEVICE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<device href="/api/space/device-management/devices/%d"><name>d%d</name><platform>MX240</platform></device>"""
+
+class TestAsyncSpace(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices', DEVICES)
+        for i in (1, 2):
+            self.stub.add_xml('/api/space/device-management/devices/%d' % i,
+                              DEVICE % (i, i))
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def test_collection_and_resources(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                devs = await s.device_management.devices.get()
+                assert isinstance(devs[0], aio.AsyncResource)
+                states = await asyncio.gather(*[d.get() for d in devs])
+                return [d.name for d in devs], [st.platform for st in states]
+
+        names, platforms = asyncio.run(run())
+        assert names == ['d1', 'd2']
+        assert platforms == ['MX240', 'MX240']
+
+    def test_async_for(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                return [d.name async for d in s.device_management.devices]
+
+        assert asyncio.run(run()) == ['d1', 'd2']
+
+    def test_error_response(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                await s.user_management.users.get()
+
+        with pytest.raises(rest.RestException):
+            asyncio.run(run())
+
+    def test_count_and_exists(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                devs = s.device_management.devices
+                return await devs.count(), await devs.exists()
+
+        assert asyncio.run(run()) == (2, True)
+
+    def test_records_and_fields(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                devs = s.device_management.devices
+                recs = await devs.get(records=True, fields=['name'])
+                dev = (await devs.get(fields=['name']))[0]
+                state = await dev.get(fields=['name'])
+                return [r.name for r in recs], hasattr(state, 'platform')
+
+        assert asyncio.run(run()) == (['d1', 'd2'], False)
+
+    def test_sync_only_methods(self):
+        s = aio.AsyncSpace(self.stub.url, 'super', 'secret')
+        devs = s.device_management.devices
+        for name in ('stream', 'export'):
+            assert not callable(getattr(devs, name, None))
+        for name in ('login', 'logout'):
+            assert not hasattr(s, name)
+
+    def test_retry(self):
+        attempts = []
+        def flaky(path, headers, body):
+            attempts.append(path)
+            if len(attempts) < 3:
+                return 503, {}, ''
+            return 200, {'Content-Type': 'application/xml'}, '<test/>'
+        self.stub.routes[('GET', '/api/space/flaky')] = flaky
+
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                s.pipeline.add_stage(pipeline.RetryStage(backoff=0))
+                return await s.get('/api/space/flaky')
+
+        assert asyncio.run(run()).status_code == 200
+        assert len(attempts) == 3
+
+class TestAsyncPaging(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+            paged_devices
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def test_get_all(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                return await s.device_management.devices.get_all(
+                    parallelism=4, page_size=100)
+
+        del self.stub.requests[:]
+        devs = asyncio.run(run())
+        assert [d.name for d in devs] == ['d%d' % i for i in range(NUM_DEVICES)]
+        assert devs.total == NUM_DEVICES
+        assert len(self.stub.requests) == 11
+
+    def test_iter_all(self):
+        async def run(prefetch):
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                devs = s.device_management.devices
+                return [d.name async for d in
+                        devs.iter_all(page_size=500, prefetch=prefetch)]
+
+        for prefetch in (0, 2):
+            names = asyncio.run(run(prefetch))
+            assert names == ['d%d' % i for i in range(NUM_DEVICES)]
+
+    def test_iter_pages_closed_early(self):
+        async def run():
+            async with aio.AsyncSpace(self.stub.url, 'super', 'secret') as s:
+                pages = s.device_management.devices.iter_pages(page_size=100)
+                async for page in pages:
+                    break
+                await pages.aclose()
+                return len(page)
+
+        del self.stub.requests[:]
+        assert asyncio.run(run()) == 100
+        assert len(self.stub.requests) < 11
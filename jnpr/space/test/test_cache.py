@@ -0,0 +1,307 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+from lxml import etree
+
+from jnpr.space import rest, cache
+from jnpr.space.test.stub_server import StubSpace
+
+DEVICES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<devices total="2" uri="/api/space/device-management/devices">
+<device href="/api/space/device-management/devices/1" key="1"><name>d1</name></device>
+<device href="/api/space/device-management/devices/2" key="2"><name>d2</name></device>
+</devices>"""
+
+def conditional(etag, body):
+    """
+    Returns a route that responds with 304 if the given ETag is sent in
+    If-None-Match.
+    """
+    def route(path, headers, req_body):
+        if headers.get('if-none-match') == etag:
+            return 304, {'ETag': etag}, ''
+        return 200, {'Content-Type': 'application/xml', 'ETag': etag}, body
+    return route
+
+class TestHttpCache(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+            conditional('"v1"', DEVICES)
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret',
+                                http_cache=True)
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def test_not_modified(self):
+        devs = self.space.device_management.devices
+        first = devs.get()
+        stage = self.space.pipeline.get_stage(cache.HttpCacheStage)
+        # The cache holds a detached copy, not the tree of the first caller
+        cached = list(stage._entries.values())
+        assert isinstance(cached[0], cache.CachedResponse)
+        assert not hasattr(cached[0], '_parsed_obj')
+        second = devs.get()
+        assert [d.name for d in second] == ['d1', 'd2']
+        # Each caller gets its own parsed object
+        assert second[0]._xml_data is not first[0]._xml_data
+        assert etree.tostring(second[0]._xml_data) == \
+            etree.tostring(first[0]._xml_data)
+        second[0]._xml_data.name = 'changed'
+        assert devs.get()[0].name == 'd1'
+
+        assert 'If-None-Match' not in self.stub.requests[0][2]
+        assert self.stub.requests[1][2]['If-None-Match'] == '"v1"'
+        assert stage.stats() == {'hits': 2, 'misses': 1, 'entries': 1}
+
+    def test_modified(self):
+        devs = self.space.device_management.devices
+        devs.get()
+        self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+            conditional('"v2"', DEVICES.replace('d2', 'd3'))
+        try:
+            assert [d.name for d in devs.get()] == ['d1', 'd3']
+        finally:
+            self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+                conditional('"v1"', DEVICES)
+
+    def test_keyed_by_accept(self):
+        devs = self.space.device_management.devices
+        devs.get()
+        devs.get(accept='application/xml')
+        assert 'If-None-Match' not in self.stub.requests[1][2]
+
+    def test_not_enabled_by_default(self):
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        try:
+            assert space.pipeline.get_stage(cache.HttpCacheStage) is None
+        finally:
+            space.close()
+
+DEVICE_TYPE = 'application/vnd.net.juniper.space.device-management.device+xml;version=1'
+DEVICE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<device href="/api/space/device-management/devices/%d"><name>d%d</name></device>"""
+
+class TestResourceCache(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices', DEVICES)
+        for i in (1, 2):
+            self.stub.add_xml('/api/space/device-management/devices/%d' % i,
+                              DEVICE % (i, i), DEVICE_TYPE)
+            self.stub.routes[('PUT', '/api/space/device-management/devices/%d' % i)] = \
+                (200, {}, DEVICE % (i, i))
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.cache = cache.ResourceCache(
+            default_ttl=60,
+            ttls={'device_management.devices': 300, 'user_management': 0})
+        self.space = rest.Space(self.stub.url, 'super', 'secret',
+                                resource_cache=self.cache)
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def _gets(self, path):
+        return len([r for r in self.stub.requests
+                    if r[0] == 'GET' and r[1] == path])
+
+    def _response(self, body):
+        return cache.CachedResponse('/a', {}, body)
+
+    def test_resource_get(self):
+        devs = self.space.device_management.devices.get()
+        first = devs[0].get()
+        second = devs[0].get()
+        assert second is not first
+        assert etree.tostring(second) == etree.tostring(first)
+        assert self._gets('/api/space/device-management/devices/1') == 1
+        assert self.cache.stats()['hits'] == 1
+
+    def test_local_change_not_cached(self):
+        dev = self.space.device_management.devices.get()[1]
+        first = dev.get()
+        first.name = 'changed'
+        assert dev.get().name == 'd2'
+        assert self._gets('/api/space/device-management/devices/2') == 1
+
+    def test_put_invalidates(self):
+        dev = self.space.device_management.devices.get()[0]
+        dev.get()
+        dev.put(request_body='<device/>')
+        dev.get()
+        assert self._gets('/api/space/device-management/devices/1') == 2
+
+    def test_fetch_resource(self):
+        from jnpr.space import factory
+        href = '/api/space/device-management/devices/2'
+        dev = factory.fetch_resource(self.space, href)
+        dev.name = 'changed'
+        again = factory.fetch_resource(self.space, href)
+        assert again is not dev
+        assert again.name == 'd2'
+        assert self._gets(href) == 1
+
+    def test_one_entry_per_resource(self):
+        from jnpr.space import factory
+        href = '/api/space/device-management/devices/1'
+        dev = self.space.device_management.devices.get()[0]
+        assert dev.get().name == 'd1'
+        assert factory.fetch_resource(self.space, href).name == 'd1'
+        assert self._gets(href) == 1
+        assert self.cache.stats()['entries'] == 1
+
+        # Invalidated for both
+        dev.put(request_body='<device/>')
+        factory.fetch_resource(self.space, href)
+        dev.get()
+        assert self._gets(href) == 2
+
+    def test_media_type_mismatch(self):
+        self.cache.put('/a', None,
+                       cache.CachedResponse(
+                           '/a', {'Content-Type': 'application/vnd.a+xml; '
+                                                  'version=1;charset=UTF-8'},
+                           b'<a/>'))
+        assert self.cache.get('/a', 'application/vnd.a+xml;version=2') is None
+        assert self.cache.get('/a', 'application/vnd.a+xml;version=1')
+        assert self.cache.get('/a', None)
+
+    def test_ttl(self):
+        dev = self.space.device_management.devices.get()[0]
+        assert self.cache.ttl_for(dev._cache_names()) == 300
+        assert self.cache.ttl_for(['user_management.user',
+                                   'user_management']) == 0
+        assert self.cache.ttl_for(['tag_management.tag']) == 60
+
+    def test_expiry(self):
+        self.cache.put('/a', None, self._response(b'x'), names=['short'])
+        self.cache.ttls['short'] = -1
+        self.cache.put('/b', None, self._response(b'y'), names=['short'])
+        assert self.cache.get('/a', None).content == b'x'
+        assert self.cache.get('/b', None) is None
+
+    def test_eviction(self):
+        small = cache.ResourceCache(max_entries=2, max_bytes=100)
+        small.put('/a', None, self._response(b'a' * 10))
+        small.put('/b', None, self._response(b'b' * 10))
+        small.get('/a', None)
+        small.put('/c', None, self._response(b'c' * 10))
+        assert small.get('/b', None) is None
+        small.put('/d', None, self._response(b'd' * 85))
+        assert small.get('/a', None) is None
+        assert small.get('/d', None).content == b'd' * 85
+        stats = small.stats()
+        assert stats['evictions'] == 2
+        assert stats['entries'] == 2
+        assert stats['bytes'] == 95
+
+    def test_invalidate_prefix(self):
+        for href in ('/api/space/tag-management/tags/1',
+                     '/api/space/tag-management/tags/1/targets/2',
+                     '/api/space/tag-management/tags/10'):
+            self.cache.put(href, None, self._response(b't'))
+        self.cache.invalidate('/api/space/tag-management/tags/1')
+        assert self.cache.stats()['entries'] == 1
+
+class TestSqliteStore(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+            conditional('"v1"', DEVICES)
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.db')
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        shutil.rmtree(self.dir)
+
+    def test_warm_start(self):
+        for _ in range(2):
+            # Each Space instance stands in for a new process
+            space = rest.Space(self.stub.url, 'super', 'secret',
+                               cache_file=self.path)
+            try:
+                devs = space.device_management.devices.get()
+                assert [d.name for d in devs] == ['d1', 'd2']
+            finally:
+                space.close()
+
+        assert 'If-None-Match' not in self.stub.requests[0][2]
+        assert self.stub.requests[1][2]['If-None-Match'] == '"v1"'
+
+    def test_not_shared_across_users(self):
+        for user in ('super', 'other'):
+            space = rest.Space(self.stub.url, user, 'secret',
+                               cache_file=self.path)
+            try:
+                space.device_management.devices.get()
+            finally:
+                space.close()
+
+        assert 'If-None-Match' not in self.stub.requests[1][2]
+
+    def test_wal_mode(self):
+        store = cache.SqliteStore(self.path)
+        try:
+            mode = store._db.execute('PRAGMA journal_mode').fetchone()[0]
+            assert mode.lower() == 'wal'
+        finally:
+            store.close()
+
+    def test_size_cap(self):
+        store = cache.SqliteStore(self.path, max_bytes=250)
+        def key(i):
+            return ('https://space', 'super', '/a/%d' % i, None)
+        try:
+            for i in range(5):
+                store.put(key(i),
+                          cache.CachedResponse('/a/%d' % i,
+                                               {'ETag': str(i)}, b'x' * 100))
+                if i == 0:
+                    store.get(key(0))
+            assert store.stats() == {'entries': 2, 'bytes': 200}
+            assert store.get(key(4)).headers['etag'] == '4'
+            assert store.get(key(0)) is None
+            assert store.get(('https://other', 'super', '/a/4', '')) is None
+        finally:
+            store.close()
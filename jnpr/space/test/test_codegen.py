@@ -0,0 +1,147 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import importlib.util
+import os
+import sys
+import tempfile
+
+from jnpr.space import codegen, rest, resource, collection, method
+from jnpr.space.test.stub_server import StubSpace
+from jnpr.space.test.test_stream import make_devices
+
+MODULE_NAME = 'space_ez_generated_test'
+
+def load_generated(path):
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+class TestCodegen(object):
+
+    def setup_class(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, MODULE_NAME + '.py')
+        assert codegen.main(['-o', self.path]) == 0
+        self.gen = load_generated(self.path)
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices',
+                          make_devices(10))
+
+    def teardown_class(self):
+        self.stub.stop()
+        sys.modules.pop(MODULE_NAME, None)
+
+    def setup_method(self, method):
+        self.space = self.gen.Space(self.stub.url, 'super', 'secret')
+        self.dynamic = rest.Space(self.stub.url, 'super', 'secret')
+
+    def teardown_method(self, method):
+        self.space.close()
+        self.dynamic.close()
+
+    def test_up_to_date(self):
+        assert not codegen.is_stale(self.gen)
+        assert codegen.main(['-o', self.path, '--check']) == 0
+        with open(self.path, 'a') as f:
+            f.write('# edited\n')
+        assert codegen.main(['-o', self.path, '--check']) == 1
+
+    def test_navigation(self):
+        dm = self.space.device_management
+        assert isinstance(dm, codegen.GeneratedService)
+        assert self.space.device_management is dm
+        devices = dm.devices
+        assert isinstance(devices, codegen.GeneratedCollection)
+        assert dm.devices is devices
+        assert dm._collections['devices'] is devices
+        assert dm['devices'] is devices
+
+        sn_devices = self.space.servicenow.device_management.devices
+        assert isinstance(sn_devices, codegen.GeneratedCollection)
+        assert sn_devices.get_href() == \
+            self.dynamic.servicenow.device_management.devices.get_href()
+
+    def test_same_as_dynamic(self):
+        for name in self.dynamic._meta_services:
+            gen_svc = getattr(self.space, name)
+            dyn_svc = getattr(self.dynamic, name)
+            assert gen_svc.get_href() == dyn_svc.get_href()
+            meta = dyn_svc._meta_object
+            for coll_name in meta._meta_collections or {}:
+                gen = getattr(gen_svc, coll_name)
+                dyn = getattr(dyn_svc, coll_name)
+                assert gen._meta_object is dyn._meta_object
+                assert gen.get_href() == dyn.get_href()
+                assert gen._negotiate_media_type() == \
+                    dyn._negotiate_media_type()
+                for mthd_name in dyn._meta_object.methods:
+                    assert getattr(gen, mthd_name).get_href() == \
+                        getattr(dyn, mthd_name).get_href()
+            for mthd_name in meta._meta_methods or {}:
+                gen = getattr(gen_svc, mthd_name)
+                dyn = getattr(dyn_svc, mthd_name)
+                assert isinstance(gen, codegen.GeneratedMethod)
+                assert gen._meta_object is dyn._meta_object
+                assert gen.get_href() == dyn.get_href()
+
+    def test_resources(self):
+        devs = self.space.device_management.devices.get()
+        dyn_devs = self.dynamic.device_management.devices.get()
+        assert len(devs) == len(dyn_devs) == 10
+        dev, dyn_dev = devs[4], dyn_devs[4]
+        assert type(dev) is self.gen.DeviceManagementDeviceResource
+        assert isinstance(dev, resource.Resource)
+        assert dev._meta_object is dyn_dev._meta_object
+        assert dev.name == dyn_dev.name == 'd4'
+        assert dev['name'] == 'd4'
+        assert dev.get_href() == dyn_dev.get_href()
+        assert dev._negotiate_media_type() == dyn_dev._negotiate_media_type()
+
+        assert isinstance(dev.exec_rpc, method.Method)
+        assert dev.exec_rpc is dev['exec-rpc']
+        assert dev.exec_rpc.get_href() == dyn_dev.exec_rpc.get_href()
+        assert dev.exec_rpc._meta_object.request_template_name == 'rpc.tpl'
+        configs = dev.configurations
+        assert isinstance(configs, collection.Collection)
+        assert configs.get_href() == dyn_dev.configurations.get_href()
+        assert type(configs.raw) is self.gen.DeviceManagementRawConfigResource
+
+        # Methods of the base class still win over contained nodes
+        assert dev.get.__func__ is resource.Resource.get
+
+    def test_no_dynamic_lookup(self, monkeypatch):
+        devs = self.space.device_management.devices.get()
+
+        def fail(*args):
+            raise AssertionError('dynamic lookup')
+        monkeypatch.setattr(rest.Space, '__getattr__', fail)
+        monkeypatch.setattr(resource, 'get_meta_object', fail)
+        for dev in devs:
+            assert dev.exec_rpc.get_href().endswith('/exec-rpc')
+        assert len(self.space.device_management.devices.get()) == 10
+
+    def test_compact_resources(self):
+        space = self.gen.Space(self.stub.url, 'super', 'secret',
+                               compact_resources=True)
+        devs = space.device_management.devices.get()
+        assert isinstance(devs[0], resource.CompactResource)
+        space.close()
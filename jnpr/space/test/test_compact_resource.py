@@ -0,0 +1,111 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import gc
+
+import pytest
+
+from jnpr.space import rest, resource, factory
+from jnpr.space.test.stub_server import StubSpace
+from jnpr.space.test.test_stream import make_devices
+
+DEVICE_TYPE = 'application/vnd.net.juniper.space.device-management.device+xml;version=1'
+DEVICE = """<device href="/api/space/device-management/devices/1" key="1"><name>d1</name><platform>MX960</platform></device>"""
+
+class TestCompactResource(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices',
+                          make_devices(10))
+        self.stub.add_xml('/api/space/device-management/devices/1',
+                          DEVICE, DEVICE_TYPE)
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret',
+                                compact_resources=True)
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def test_lazy_parsing(self):
+        devs = self.space.device_management.devices.get()
+        assert len(devs) == 10
+        dev = devs[3]
+        assert isinstance(dev, resource.CompactResource)
+        assert not hasattr(dev, '__dict__')
+        assert dev.get_href() == '/api/space/device-management/devices/3'
+        assert dev.get('href') == '/api/space/device-management/devices/3'
+        assert dev._obj is None and isinstance(dev._raw, bytes)
+
+        assert dev.name == 'd3'
+        assert dev['platform'] == 'MX240'
+        assert dev._raw is None
+        assert dev._collections is None
+
+    def test_contained_nodes(self):
+        dev = self.space.device_management.devices.get()[1]
+        assert dev._methods is None
+        assert dev.exec_rpc.get_href() == \
+            '/api/space/device-management/devices/1/exec-rpc'
+        assert list(dev._methods) == ['exec_rpc']
+        assert dev.configurations.get_href() == \
+            '/api/space/device-management/devices/1/configurations'
+        assert list(dev._collections) == ['configurations']
+
+    def test_refresh(self):
+        dev = self.space.device_management.devices.get()[1]
+        fresh = dev.get()
+        assert fresh.platform == 'MX960'
+
+        with pytest.raises(AttributeError):
+            dev.extra = 1
+
+    def test_identity_map(self):
+        space = rest.Space(self.stub.url, 'super', 'secret',
+                           compact_resources=True, identity_map=True)
+        try:
+            devs = space.device_management.devices.get()
+            dev = factory.fetch_resource(space,
+                                         '/api/space/device-management/devices/1')
+            assert dev is devs[1]
+            assert devs[1].platform == 'MX960'
+            del devs, dev
+            gc.collect()
+            assert len(space._identity_map) == 0
+        finally:
+            space.close()
+
+    def test_not_enabled_by_default(self):
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        try:
+            dev = space.device_management.devices.get()[0]
+            assert isinstance(dev, resource.Resource)
+        finally:
+            space.close()
+
+    def test_make_resource(self):
+        # Resources created locally must accept new fields before post()
+        tag = factory.make_resource('tag_management.tag', self.space)
+        assert type(tag) is resource.Resource
+        tag.name = 'Boston'
+        assert tag.name == 'Boston'
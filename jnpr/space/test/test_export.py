@@ -0,0 +1,190 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+from urllib.parse import unquote
+
+import pytest
+
+from jnpr.space import rest, export
+from jnpr.space.test.stub_server import StubSpace
+
+NUM_DEVICES = 250
+
+def device(i):
+    return ('<device href="/api/space/device-management/devices/%d" key="%d">'
+            '<name>d%d</name><deviceId>%d</deviceId>'
+            '<cpuLoad>%d.5</cpuLoad><connected>%s</connected>'
+            '<serial-number>%s</serial-number>'
+            '<domain href="/api/space/domain-management/domains/2">'
+            '<name>Global</name></domain>'
+            '<ip>10.0.0.%d</ip><ip>10.1.0.%d</ip></device>' %
+            (i, i, i, i, i % 100, 'true' if i % 2 else 'false',
+             # Numeric in the first pages only
+             str(1000 + i) if i < 200 else 'JN%d' % i, i % 256, i % 256))
+
+def paged_devices(path, headers, body):
+    path = unquote(path)
+    start = int(re.search(r'start eq (\d+)', path).group(1))
+    limit = int(re.search(r'limit eq (\d+)', path).group(1))
+    devs = [device(i) for i in range(start, min(start + limit, NUM_DEVICES))]
+    xml = '<devices total="%d">%s</devices>' % (NUM_DEVICES, ''.join(devs))
+    return 200, {'Content-Type': 'application/xml'}, xml
+
+class TestExport(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+            paged_devices
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def teardown_class(self):
+        self.stub.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_get_format(self):
+        assert export.get_format('a/devices.parquet') == 'parquet'
+        assert export.get_format('devices.JSONL') == 'ndjson'
+        assert export.get_format('devices.arrow') == 'arrow'
+        assert export.get_format('devices.csv', 'ndjson') == 'ndjson'
+        assert export.get_format('devices') == \
+            ('parquet' if export.have_pyarrow() else 'csv')
+        with pytest.raises(Exception):
+            export.get_format('devices', 'xlsx')
+
+    def test_csv(self):
+        path = self._path('devices.csv')
+        devs = self.space.device_management.devices
+        assert devs.export(path, page_size=100, batch_size=64) == NUM_DEVICES
+        # Pages of 100, 100 and 50 resources
+        assert len(self.stub.requests) == 3
+
+        with io.open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == NUM_DEVICES
+        assert rows[7]['name'] == 'd7'
+        assert rows[7]['href'] == '/api/space/device-management/devices/7'
+        assert rows[7]['connected'] == 'true'
+        assert rows[7]['cpuLoad'] == '7.5'
+        assert rows[7]['domain.name'] == 'Global'
+        assert rows[7]['domain.href'] == \
+            '/api/space/domain-management/domains/2'
+        assert rows[7]['ip'] == '10.0.0.7;10.1.0.7'
+        assert rows[220]['serial-number'] == 'JN220'
+
+    def test_ndjson_fields(self):
+        path = self._path('devices.ndjson')
+        devs = self.space.device_management.devices
+        fields = ['name', 'deviceId', 'serial_number', 'connected',
+                  'domain.name', 'ip', 'missing']
+        assert devs.export(path, fields=fields) == NUM_DEVICES
+        with io.open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert len(rows) == NUM_DEVICES
+        assert rows[3] == {'name': 'd3', 'deviceId': 3,
+                           'serial_number': 1003, 'connected': True,
+                           'domain.name': 'Global',
+                           'ip': ['10.0.0.3', '10.1.0.3'], 'missing': None}
+
+    def test_parquet(self):
+        pq = pytest.importorskip('pyarrow.parquet')
+        path = self._path('devices.parquet')
+        devs = self.space.device_management.devices
+        assert devs.export(path, fields=['name', 'deviceId', 'cpuLoad',
+                                         'connected', 'ip'],
+                           page_size=100, batch_size=100) == NUM_DEVICES
+        pfile = pq.ParquetFile(path)
+        # One row group per batch
+        assert pfile.num_row_groups == 3
+        table = pfile.read()
+        assert [str(t) for t in table.schema.types] == \
+            ['string', 'int64', 'double', 'bool', 'string']
+        assert table.column('deviceId').to_pylist() == list(range(NUM_DEVICES))
+        assert table.column('cpuLoad')[3].as_py() == 3.5
+        assert table.column('connected')[3].as_py() is True
+        assert table.column('ip')[3].as_py() == '10.0.0.3;10.1.0.3'
+
+    def test_type_change(self):
+        pa = pytest.importorskip('pyarrow')
+        pq = pytest.importorskip('pyarrow.parquet')
+        devs = self.space.device_management.devices
+        fields = ['name', 'deviceId', 'serial_number']
+        for name in ('devices.arrow', 'devices.parquet'):
+            path = self._path(name)
+            # The serial number looks numeric in the first batches only, so
+            # the column is widened to string
+            assert devs.export(path, fields=fields,
+                               batch_size=100) == NUM_DEVICES
+            if name.endswith('.arrow'):
+                with pa.ipc.open_file(path) as reader:
+                    assert reader.num_record_batches == 3
+                    table = reader.read_all()
+            else:
+                assert pq.ParquetFile(path).num_row_groups == 3
+                table = pq.read_table(path)
+            assert [str(t) for t in table.schema.types] == \
+                ['string', 'int64', 'string']
+            assert table.column('serial_number')[220].as_py() == 'JN220'
+            assert table.column('serial_number')[2].as_py() == '1002'
+            assert table.column('deviceId')[2].as_py() == 2
+
+    def test_failed_export(self):
+        path = self._path('failed.csv')
+        route = ('GET', '/api/space/device-management/devices')
+        def failing(path, headers, body):
+            if 'start eq 200' in unquote(path):
+                return 500, {}, 'down'
+            return paged_devices(path, headers, body)
+        self.stub.routes[route] = failing
+        try:
+            with pytest.raises(rest.RestException):
+                self.space.device_management.devices.export(path,
+                                                            page_size=100)
+        finally:
+            self.stub.routes[route] = paged_devices
+        # No truncated file is left behind
+        assert not os.path.exists(path)
+        assert not any(name.endswith('.tmp')
+                       for name in os.listdir(self.tmp_dir))
+
+    def test_file_mode(self):
+        path = self._path('mode.csv')
+        umask = os.umask(0o022)
+        try:
+            self.space.device_management.devices.export(path)
+        finally:
+            os.umask(umask)
+        assert os.stat(path).st_mode & 0o777 == 0o644
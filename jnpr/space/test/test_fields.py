@@ -0,0 +1,135 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+from urllib.parse import unquote
+
+from jnpr.space import rest, cache, xmlutil
+from jnpr.space.test.stub_server import StubSpace
+
+DM = '/api/space/device-management/devices'
+NUM_DEVICES = 50
+
+def device(i):
+    return ('<device href="%s/%d" key="%d"><name>d%d</name>'
+            '<ipAddr>10.0.0.%d</ipAddr><platform>MX240</platform>'
+            '<serial-number>JN%d</serial-number>'
+            '<domain href="/api/space/domain-management/domains/2">'
+            '<name>Global</name></domain>'
+            '<config><large>%s</large></config></device>' %
+            (DM, i, i, i, i, i, 'x' * 100))
+
+def devices_xml():
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<devices total="%d" uri="%s">%s</devices>' %
+            (NUM_DEVICES, DM, ''.join(device(i) for i in range(NUM_DEVICES))))
+
+FIELDS = ['name', 'ipAddr', 'serial_number', 'domain.name']
+
+class TestFields(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml(DM, devices_xml())
+        self.stub.add_xml(DM + '/3', device(3))
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def _check(self, dev, i):
+        assert dev.name == 'd%d' % i
+        assert dev.get('href') == '%s/%d' % (DM, i)
+        assert dev.get('key') == str(i)
+        assert dev.ipAddr == '10.0.0.%d' % i
+        assert getattr(dev, 'serial-number') == 'JN%d' % i
+        assert dev.domain.name == 'Global'
+        assert not hasattr(dev, 'platform')
+        assert not hasattr(dev, 'config')
+
+    def test_get(self):
+        devs = self.space.device_management.devices.get(fields=FIELDS)
+        assert len(devs) == NUM_DEVICES
+        assert devs.total == NUM_DEVICES
+        for i in (0, 7, 49):
+            self._check(devs[i], i)
+        # No field selector was set
+        assert '?' not in self.stub.requests[-1][1]
+
+    def test_stream(self):
+        devs = self.space.device_management.devices
+        for i, dev in enumerate(devs.stream(chunk_size=256, fields=FIELDS)):
+            self._check(dev, i)
+        records = list(devs.stream(records=True, fields=['name']))
+        assert len(records) == NUM_DEVICES
+        assert records[5].name == 'd5'
+        assert records[5].href == '%s/5' % DM
+        assert not hasattr(records[5], 'ipAddr')
+
+    def test_records(self):
+        records = self.space.device_management.devices.get(
+            records=True, fields=['ipAddr', 'domain.name'])
+        assert len(records) == NUM_DEVICES
+        assert records[9].ipAddr == '10.0.0.9'
+        assert records[9].domain.name == 'Global'
+        assert not hasattr(records[9], 'name')
+
+    def test_resource_get(self):
+        self.space.resource_cache = cache.ResourceCache()
+        dev = self.space.device_management.devices.get()[3]
+        state = dev.get(fields=FIELDS)
+        self._check(state, 3)
+        # A partial state is not cached
+        assert dev.get().platform == 'MX240'
+        assert len(self.stub.requests) == 3
+        assert dev.get(fields=FIELDS) is not dev.get()
+        assert len(self.stub.requests) == 4
+
+    def test_field_selector(self):
+        space = rest.Space(self.stub.url, 'super', 'secret',
+                           field_selector='fields')
+        space.device_management.devices.get(
+            paging={'start': 0, 'limit': 10}, fields=['name', 'ipAddr'])
+        path = unquote(self.stub.requests[-1][1])
+        assert path.endswith('&fields=(name,ipAddr)')
+        dev = space.device_management.devices.get()[3]
+        dev.get(fields=['name'])
+        assert unquote(self.stub.requests[-1][1]) == DM + '/3?fields=(name)'
+        space.close()
+
+    def test_parse_fields(self):
+        root = xmlutil.parse_fields([device(1).encode('utf-8')], ['name'],
+                                    level=0)
+        assert [child.tag for child in root] == ['name']
+        assert root.get('key') == '1'
+
+    def test_no_reparse(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError('serialized for a second parse')
+        monkeypatch.setattr(xmlutil.etree, 'tostring', fail)
+        monkeypatch.setattr(xmlutil.objectify, 'fromstring', fail)
+        devs = self.space.device_management.devices.get(fields=FIELDS)
+        self._check(devs[2], 2)
+        state = devs[3].get(fields=FIELDS)
+        self._check(state, 3)
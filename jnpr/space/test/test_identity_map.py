@@ -0,0 +1,80 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import gc
+
+from jnpr.space import rest, factory
+from jnpr.space.test.stub_server import StubSpace
+
+DEVICE_TYPE = 'application/vnd.net.juniper.space.device-management.device+xml;version=1'
+DEVICES = """<devices total="2">
+<device href="/api/space/device-management/devices/1"><name>d1</name><status>%s</status></device>
+<device href="/api/space/device-management/devices/2"><name>d2</name><status>%s</status></device>
+</devices>"""
+DEVICE = """<device href="/api/space/device-management/devices/1"><name>d1</name><status>%s</status></device>"""
+
+class TestIdentityMap(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices',
+                          DEVICES % ('up', 'up'))
+        self.stub.add_xml('/api/space/device-management/devices/1',
+                          DEVICE % 'down', DEVICE_TYPE)
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret',
+                                identity_map=True)
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def test_same_object(self):
+        devs = self.space.device_management.devices
+        first = devs.get()
+        second = devs.get()
+        assert first[0] is second[0]
+        assert first[1] is second[1]
+
+    def test_fresher_data_merged(self):
+        devs = self.space.device_management.devices.get()
+        assert devs[0].status == 'up'
+        dev = factory.fetch_resource(self.space,
+                                     '/api/space/device-management/devices/1')
+        assert dev is devs[0]
+        assert devs[0].status == 'down'
+        assert devs[0]._parent is not None
+
+    def test_weak(self):
+        devs = self.space.device_management.devices.get()
+        assert len(self.space._identity_map) == 2
+        del devs
+        gc.collect()
+        assert len(self.space._identity_map) == 0
+
+    def test_not_enabled_by_default(self):
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        try:
+            devs = space.device_management.devices
+            assert devs.get()[0] is not devs.get()[0]
+        finally:
+            space.close()
@@ -0,0 +1,120 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from jnpr.space import rest
+from jnpr.space.test.stub_server import StubSpace
+
+DEVICES_V1 = 'application/vnd.net.juniper.space.device-management.devices+xml;version=1'
+DEVICES_V2 = 'application/vnd.net.juniper.space.device-management.devices+xml;version=2'
+
+INFO = """<info uri="%s"><http-methods>
+<http-method type="GET"><headers><header type="Accept"><representations>
+<representation>%s;q=0.01</representation>
+</representations></header></headers></http-method>
+</http-methods></info>"""
+
+def info_route(path, headers, body):
+    return 200, {'Content-Type': 'application/xml'}, INFO % (path, DEVICES_V1)
+
+class TestInfoCache(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('GET', '/api/info')] = info_route
+        self.stub.add_xml('/api/space/device-management/devices',
+                          '<devices total="0"/>')
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'info.json')
+        self.space = rest.Space(self.stub.url, 'super', 'secret',
+                                info_cache_file=self.path)
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+        shutil.rmtree(self.dir)
+
+    def _info_calls(self):
+        return len([r for r in self.stub.requests
+                    if r[1].startswith('/api/info')])
+
+    def test_cached_per_template(self):
+        devs = self.space.device_management.devices
+        from jnpr.space import factory
+        dev1 = factory.make_resource('device_management.device', self.space,
+                                     parent=devs)
+        dev1.id = 1
+        dev2 = factory.make_resource('device_management.device', self.space,
+                                     parent=devs)
+        dev2.id = 22
+        info = dev1._get_info()
+        assert dev2._get_info() is info
+        assert self._info_calls() == 1
+        assert self.space.info_cache.get(
+            '/api/space/device-management/devices/333') is info
+
+    def test_prewarm_and_reload(self):
+        count = self.space.prewarm_info()
+        assert count > 10
+        assert count == self._info_calls()
+        assert os.path.exists(self.path)
+
+        space = rest.Space(self.stub.url, 'super', 'secret',
+                           info_cache_file=self.path)
+        try:
+            assert len(space.info_cache) == count
+            del self.stub.requests[:]
+            space.device_management.devices._get_info()
+            space.user_management.users._get_info()
+            assert self._info_calls() == 0
+        finally:
+            space.close()
+
+    def test_describe_precomputed(self):
+        meta = self.space.device_management._meta_object
+        first = self.space.device_management._describe()
+        assert meta._described is not None
+        second = self.space.device_management._describe()
+        assert first['collections'] is second['collections']
+
+    def test_negotiation(self):
+        devs = self.space.device_management.devices
+        meta = devs._meta_object
+        saved = meta.media_type
+        meta.media_type = {'1': DEVICES_V1, '2': DEVICES_V2}
+        try:
+            with pytest.raises(Exception):
+                devs._prepare_get(None, None, None, None, None)
+            devs._get_info()
+            del self.stub.requests[:]
+            url, headers = devs._prepare_get(None, None, None, None, None)
+            assert headers['accept'] == DEVICES_V1
+            assert self._info_calls() == 0
+        finally:
+            meta.media_type = saved
@@ -0,0 +1,158 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from jnpr.space import rest, inventory
+from jnpr.space.test.stub_server import StubSpace
+
+DM = '/api/space/device-management/devices'
+ME = '/api/space/managed-domain/managed-elements'
+NUM_DEVICES = 12
+
+def platform(i):
+    return ('MX960', 'EX4200', 'SRX550')[i % 3]
+
+def devices_xml():
+    devs = []
+    for i in range(NUM_DEVICES):
+        devs.append(
+            '<device href="%s/%d" key="%d"><name>d%d</name>'
+            '<platform>%s</platform><managedStatus>%s</managedStatus>'
+            '<domain href="/api/space/domain-management/domains/%d">'
+            '<name>%s</name></domain></device>' %
+            (DM, 100 + i, 100 + i, i, platform(i),
+             'Out Of Sync' if i % 4 == 0 else 'In Sync',
+             2 + i % 2, ('Global', 'East')[i % 2]))
+    return '<devices total="%d">%s</devices>' % (NUM_DEVICES, ''.join(devs))
+
+def managed_elements_xml():
+    mes = ['<managed-element href="%s/%d"><name>d%d</name>'
+           '<device href="%s/%d"/></managed-element>' %
+           (ME, 500 + i, i, DM, 100 + i) for i in range(NUM_DEVICES)]
+    return '<managed-elements>%s</managed-elements>' % ''.join(mes)
+
+def ptps_xml(i):
+    # Device i has i + 1 ptps
+    ptps = ['<ptp href="/api/space/managed-domain/ptps/%d">'
+            '<name>ge-0/0/%d</name><speed>1000</speed></ptp>' %
+            (i * 100 + p, p) for p in range(i + 1)]
+    return '<ptps>%s</ptps>' % ''.join(ptps)
+
+def software_xml(i):
+    return ('<software-identities><software-identity>'
+            '<version>%s</version><type>junos</type></software-identity>'
+            '</software-identities>' % ('15.1R5', '17.3R1')[i % 2])
+
+class TestInventoryFrame(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml(DM, devices_xml())
+        self.stub.add_xml(ME, managed_elements_xml())
+        for i in range(NUM_DEVICES):
+            href = '%s/%d' % (ME, 500 + i)
+            self.stub.add_xml(href + '/ptps', ptps_xml(i))
+            self.stub.add_xml(href + '/equipment-holders',
+                              '<equipment-holders><equipment-holder '
+                              'uri="%s/equipment-holders/1"><name>FPC 0</name>'
+                              '</equipment-holder></equipment-holders>' % href)
+            self.stub.add_xml(href + '/software-identities', software_xml(i))
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+        self.frame = inventory.build(self.space, parallelism=4)
+
+    def teardown_class(self):
+        self.space.close()
+        self.stub.stop()
+
+    def test_tables(self):
+        frame = self.frame
+        assert len(frame.devices) == NUM_DEVICES
+        assert len(frame.managed_elements) == NUM_DEVICES
+        assert len(frame.ptps) == sum(range(1, NUM_DEVICES + 1))
+        assert len(frame.equipment_holders) == NUM_DEVICES
+        assert len(frame.software_identities) == NUM_DEVICES
+
+        devs = frame.devices
+        assert devs['@key'].tolist() == list(range(100, 100 + NUM_DEVICES))
+        assert devs['domain.@key'][:2].tolist() == [2, 3]
+        assert devs.is_string('platform')
+        assert devs.values('platform')[1] == 'EX4200'
+        assert frame.managed_elements['device.@key'][3] == 103
+        assert frame.equipment_holders['@key'].tolist() == [1] * NUM_DEVICES
+        assert frame.equipment_holders['@parent'][5] == 505
+        # Numbers are stored as numbers
+        assert frame.ptps['speed'].dtype == np.int64
+        # Strings are shared by all tables
+        assert frame.managed_elements['name'][4] == devs['name'][4]
+
+    def test_ptps_per_platform(self):
+        frame = self.frame
+        dev_keys = frame.managed_elements.take('device.@key',
+                                               frame.ptps['@parent'])
+        platforms = frame.devices.take('platform', dev_keys)
+        counts = frame.ptps.count_by(platforms)
+        expected = {}
+        for i in range(NUM_DEVICES):
+            expected[platform(i)] = expected.get(platform(i), 0) + i + 1
+        assert counts == expected
+        assert list(counts.values()) == sorted(expected.values(), reverse=True)
+
+    def test_out_of_sync_per_domain(self):
+        devs = self.frame.devices
+        mask = devs.where('managedStatus', 'Out Of Sync')
+        assert devs.count_by('domain.name', mask=mask) == {'Global': 3}
+        assert not devs.where('managedStatus', 'Unknown').any()
+
+    def test_software_versions_by_model(self):
+        frame = self.frame
+        sw = frame.software_identities
+        dev_keys = frame.managed_elements.take('device.@key', sw['@parent'])
+        models = frame.devices.take('platform', dev_keys)
+        counts = sw.count_by(models, 'version')
+        assert counts[('MX960', '15.1R5')] == 2
+        assert counts[('MX960', '17.3R1')] == 2
+        assert sum(counts.values()) == NUM_DEVICES
+
+    def test_take_missing(self):
+        devs = self.frame.devices
+        result = devs.take('platform', np.array([101, 7, 102]))
+        assert devs.strings.decode(result).tolist() == \
+            ['EX4200', None, 'SRX550']
+
+    def test_vectorised_speed(self):
+        strings = inventory.StringPool()
+        rows = [{'href': '/api/space/managed-domain/ptps/%d' % i,
+                 'name': 'ge-0/0/%d' % (i % 48),
+                 'speed': str((1000, 10000)[i % 2]),
+                 '@parent': i % 20000} for i in range(200000)]
+        ptps = inventory.Table.from_rows('ptps', rows, strings)
+        parents = inventory.Table.from_rows(
+            'devices',
+            [{'href': '%s/%d' % (DM, i), 'platform': platform(i)}
+             for i in range(20000)], strings)
+        start = time.time()
+        counts = ptps.count_by(parents.take('platform', ptps['@parent']),
+                               'speed')
+        assert time.time() - start < 0.5
+        assert sum(counts.values()) == 200000
@@ -55,3 +55,24 @@ class TestMediaTypes(object):
     def test_7(self):
         mt = media_types.get_media_type('/api/space/application-management/applications/123/settings-config', 'PUT', 'Content-Type')
         assert mt == 'application/vnd.net.juniper.space.application-management.settings-config+xml;version=1;charset=UTF-8'
+
+    def test_8(self):
+        mt = media_types.get_media_type('/api/space/application-management/applications/123/settings-config', 'PUT', 'Content-Type', version=2)
+        assert mt == media_types.get_media_type('/api/space/application-management/applications/456/settings-config', 'PUT', 'Content-Type', version='2')
+        assert mt == 'application/vnd.net.juniper.space.application-management.settings-config+xml;version=2;charset=UTF-8'
+
+    def test_per_app_registry(self):
+        app_reg = media_types.MediaTypeRegistry({
+            '/api/app/things/{id}': {'GET': {'Accept': {'1': 'app-thing-v1'}}}})
+        assert app_reg.lookup('/api/app/things/7', 'GET', 'Accept') == 'app-thing-v1'
+        with pytest.raises(Exception) as excinfo:
+            app_reg.lookup('/api/space/application-management', 'GET', 'Accept')
+        assert excinfo.value.args[0] == 'URL /api/space/application-management not available'
+
+    def test_memo_bounded(self):
+        reg = media_types.MediaTypeRegistry({
+            '/api/things/{id}': {'GET': {'Accept': {'1': 'thing-v1'}}}},
+            memo_size=10)
+        for i in range(100):
+            assert reg.lookup('/api/things/%d' % i, 'GET', 'Accept') == 'thing-v1'
+        assert len(reg._memo) <= 10
@@ -0,0 +1,140 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import re
+import time
+from urllib.parse import unquote
+
+from jnpr.space import rest
+from jnpr.space.test.stub_server import StubSpace
+
+NUM_DEVICES = 1050
+
+def paged_devices(path, headers, body):
+    """
+    Serves a slice of NUM_DEVICES devices as per the paging clause.
+    """
+    path = unquote(path)
+    start = re.search(r'start eq (\d+)', path)
+    start = int(start.group(1)) if start else 0
+    limit = int(re.search(r'limit eq (\d+)', path).group(1))
+    devs = ['<device href="/api/space/device-management/devices/%d">'
+            '<name>d%d</name></device>' % (i, i)
+            for i in range(start, min(start + limit, NUM_DEVICES))]
+    xml = '<devices total="%d">%s</devices>' % (NUM_DEVICES, ''.join(devs))
+    return 200, {'Content-Type': 'application/xml'}, xml
+
+class TestPaging(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('GET', '/api/space/device-management/devices')] = \
+            paged_devices
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def _paths(self):
+        return [unquote(req[1]) for req in self.stub.requests]
+
+    def test_iter_all(self):
+        devs = self.space.device_management.devices
+        names = [d.name for d in devs.iter_all(page_size=100)]
+        assert names == ['d%d' % i for i in range(NUM_DEVICES)]
+
+    def test_iter_pages_serial(self):
+        devs = self.space.device_management.devices
+        sizes = [len(p) for p in devs.iter_pages(page_size=500, prefetch=0)]
+        assert sizes == [500, 500, 50]
+        assert len(self.stub.requests) == 3
+
+    def test_filter_sortby_passthrough(self):
+        devs = self.space.device_management.devices
+        pages = devs.iter_pages(page_size=1000, filter_={'platform': 'MX240'},
+                                sortby=['name'])
+        assert sum(len(p) for p in pages) == NUM_DEVICES
+        for path in self._paths():
+            assert "filter=((platform eq 'MX240'))" in path
+            assert 'sortby=(name)' in path
+
+    def test_prefetch_overlaps(self):
+        devs = self.space.device_management.devices
+        pages = devs.iter_pages(page_size=100, prefetch=2)
+        next(pages)
+        # The next pages are fetched while the caller holds the first one
+        deadline = time.time() + 5
+        while len(self.stub.requests) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        paths = self._paths()
+        assert any('start eq 100,' in p for p in paths)
+        assert any('start eq 200,' in p for p in paths)
+        pages.close()
+        assert len(self.stub.requests) < 11
+
+    def test_get_all(self):
+        devs = self.space.device_management.devices
+        result = devs.get_all(parallelism=4, page_size=100)
+        assert result.total == NUM_DEVICES
+        assert [d.name for d in result] == \
+            ['d%d' % i for i in range(NUM_DEVICES)]
+        # The first page, then one request per remaining page
+        assert len(self.stub.requests) == 11
+
+    def test_get_all_single_page(self):
+        devs = self.space.device_management.devices
+        result = devs.get_all(page_size=2000)
+        assert len(result) == NUM_DEVICES
+        assert len(self.stub.requests) == 1
+
+    def test_count_and_exists(self):
+        devs = self.space.device_management.devices
+        assert devs.count() == NUM_DEVICES
+        assert devs.exists()
+        assert len(self.stub.requests) == 2
+        for path in self._paths():
+            assert 'paging=(limit eq 1)' in path
+
+    def test_count_without_total(self):
+        self.stub.add_xml('/api/space/tag-management/tags',
+                          '<tags><tag><name>t1</name></tag>'
+                          '<tag><name>t2</name></tag></tags>')
+        tags = self.space.tag_management.tags
+        assert tags.exists()
+        assert tags.count() == 2
+
+    def test_count_no_content(self):
+        self.stub.routes[('GET', '/api/space/user-management/users')] = \
+            (204, {}, '')
+        users = self.space.user_management.users
+        assert users.count({'name': 'nobody'}) == 0
+        assert not users.exists({'name': 'nobody'})
+
+    def test_get_all_no_content(self):
+        self.stub.routes[('GET', '/api/space/user-management/users')] = \
+            (204, {}, '')
+        result = self.space.user_management.users.get_all()
+        assert result == []
+        assert result.total == 0
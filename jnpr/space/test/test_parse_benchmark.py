@@ -0,0 +1,98 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+from __future__ import print_function
+import os
+import time
+
+import pytest
+from lxml import etree
+
+from jnpr.space import rest, xmlutil
+from jnpr.space.test.test_stream import make_devices
+
+NUM_DEVICES = 100
+BENCHMARK_DEVICES = 10000
+
+class _Response(object):
+    status_code = 200
+    def __init__(self, content):
+        self.content = content
+
+def _best_of(func, rounds=3):
+    best = None
+    for _ in range(rounds):
+        start = time.time()
+        result = func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+class TestParseBenchmark(object):
+
+    def setup_class(self):
+        # No requests are sent, the URL is never used
+        self.space = rest.Space('http://127.0.0.1:1', 'super', 'secret')
+        self.devices = self.space.device_management.devices
+
+    def teardown_class(self):
+        self.space.close()
+
+    def _reparse(self, response):
+        """
+        What Collection.get() used to do: parse the collection, then
+        serialize and re-parse each member.
+        """
+        root = xmlutil.get_xml_obj_from_response(response)
+        return [xmlutil.xml2obj(etree.tostring(child, encoding='unicode'))
+                for child in root]
+
+    def _parse_once(self, response):
+        return self.devices._handle_get('/api/space/device-management/devices',
+                                        response)
+
+    def test_same_result(self, monkeypatch):
+        # A new response for each parse, since the parsed tree is memoized
+        # on the response
+        data = make_devices(NUM_DEVICES).encode('utf-8')
+        expected = [etree.tostring(obj)
+                    for obj in self._reparse(_Response(data))]
+
+        def fail(*args, **kwargs):
+            raise AssertionError('serialized for a second parse')
+        monkeypatch.setattr(xmlutil.etree, 'tostring', fail)
+        result = self._parse_once(_Response(data))
+        monkeypatch.undo()
+
+        assert len(result) == NUM_DEVICES
+        assert [etree.tostring(r._xml_data) for r in result] == expected
+        assert result[-1].name == 'd%d' % (NUM_DEVICES - 1)
+
+    @pytest.mark.skipif(not os.environ.get('SPACE_EZ_BENCHMARK'),
+                        reason='set SPACE_EZ_BENCHMARK=1 to run benchmarks')
+    def test_parse_once_is_faster(self):
+        data = make_devices(BENCHMARK_DEVICES).encode('utf-8')
+        old_time, old_result = _best_of(lambda: self._reparse(_Response(data)))
+        new_time, new_result = _best_of(
+            lambda: self._parse_once(_Response(data)))
+        print('\n%d devices: re-parse %.3fs, parse once %.3fs (%.1fx)' %
+              (BENCHMARK_DEVICES, old_time, new_time, old_time / new_time))
+
+        assert len(new_result) == len(old_result) == BENCHMARK_DEVICES
+        assert new_time < old_time
@@ -0,0 +1,214 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import gzip
+import threading
+import time
+
+from jnpr.space import rest, pipeline, xmlutil
+from jnpr.space.test.stub_server import StubSpace
+
+class TestPipeline(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/test', '<test/>')
+        self.stub.routes[('DELETE', '/api/space/test')] = (204, {}, '')
+        self.stub.routes[('POST', '/api/space/test')] = (200, {}, '<test/>')
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def test_metrics(self):
+        self.space.get('/api/space/test')
+        self.space.get('/api/space/junk')
+        stats = self.space.pipeline.get_stage(pipeline.MetricsStage).stats()
+        assert stats['requests'] == 2
+        assert stats['errors'] == 1
+
+    def test_delete_sends_headers(self):
+        resp = self.space.delete('/api/space/test', {'x-test': 'yes'})
+        assert resp.status_code == 204
+        assert self.stub.requests[0][2]['x-test'] == 'yes'
+
+    def test_retry(self):
+        attempts = []
+        def flaky(path, headers, body):
+            attempts.append(path)
+            if len(attempts) < 3:
+                return 503, {}, ''
+            return 200, {}, '<test/>'
+        self.stub.routes[('GET', '/api/space/flaky')] = flaky
+
+        self.space.pipeline.add_stage(pipeline.RetryStage(backoff=0))
+        assert self.space.get('/api/space/flaky').status_code == 200
+        assert len(attempts) == 3
+
+    def test_retry_not_for_post(self):
+        self.stub.routes[('POST', '/api/space/busy')] = (503, {}, '')
+        self.space.pipeline.add_stage(pipeline.RetryStage(backoff=0))
+        assert self.space.post('/api/space/busy', {}, 'x').status_code == 503
+        assert len(self.stub.requests) == 1
+
+    def test_short_circuit(self):
+        class Canned(pipeline.Stage):
+            def before(self, request):
+                return 'canned'
+        self.space.pipeline.add_stage(Canned(), 0)
+        assert self.space.get('/api/space/test') == 'canned'
+        assert len(self.stub.requests) == 0
+
+    def test_compression(self):
+        self.space.pipeline.add_stage(pipeline.CompressionStage(min_size=10))
+        body = '<test>%s</test>' % ('x' * 100)
+        self.space.post('/api/space/test', {}, body)
+        headers, sent = self.stub.requests[0][2], self.stub.requests[0][3]
+        assert headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(sent).decode('utf-8') == body
+
+class TestSingleFlight(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.release = threading.Event()
+        def slow(path, headers, body):
+            self.release.wait(5)
+            return 200, {'Content-Type': 'application/xml'}, '<test><a>1</a></test>'
+        self.stub.routes[('GET', '/api/space/slow')] = slow
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret',
+                                single_flight=True, pool_size=20)
+        del self.stub.requests[:]
+        self.release.clear()
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def _get_concurrently(self, count, url):
+        results = [None] * count
+        def run(i):
+            try:
+                results[i] = self.space.get(url, {'accept': 'application/xml'})
+            except Exception as ex:
+                results[i] = ex
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+        stage = self.space.pipeline.get_stage(pipeline.SingleFlightStage)
+        deadline = time.time() + 5
+        while stage.stats()['saved'] < count - 1 and time.time() < deadline:
+            time.sleep(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results, stage.stats()
+
+    def test_coalesced(self):
+        results, stats = self._get_concurrently(10, '/api/space/slow')
+        assert len(self.stub.requests) == 1
+        assert stats['saved'] == 9
+        assert all(resp is results[0] for resp in results)
+        objs = [xmlutil.get_obj_from_response(resp) for resp in results]
+        assert all(obj is objs[0] for obj in objs)
+
+    def test_error_shared(self):
+        class Broken(pipeline.Stage):
+            def before(self, request):
+                time.sleep(0.2)
+                raise IOError('no route')
+        self.space.pipeline.add_stage(Broken())
+        results, stats = self._get_concurrently(5, '/api/space/slow')
+        assert all(isinstance(res, IOError) for res in results)
+        assert stats['saved'] == 4
+
+    def test_error_after_response_shared(self):
+        class Broken(pipeline.Stage):
+            def after(self, request, response):
+                raise ValueError('bad response')
+        self.space.pipeline.add_stage(Broken())
+        results, stats = self._get_concurrently(5, '/api/space/slow')
+        assert all(isinstance(res, ValueError) for res in results)
+        assert stats['saved'] == 4
+        # Nothing is left in flight
+        self.space.pipeline.stages.pop()
+        assert self.space.get('/api/space/slow').status_code == 200
+
+    def test_interrupted(self):
+        interrupted = []
+        class Interrupt(pipeline.Stage):
+            def before(self, request):
+                if not interrupted:
+                    interrupted.append(request)
+                    time.sleep(0.2)
+                    raise KeyboardInterrupt()
+        self.space.pipeline.add_stage(Interrupt())
+        results = [None] * 3
+        def run(i):
+            try:
+                results[i] = self.space.get('/api/space/slow')
+            except KeyboardInterrupt as ex:
+                results[i] = ex
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        # The waiting requests were sent instead of hanging
+        assert not any(thread.is_alive() for thread in threads)
+        assert len([r for r in results if isinstance(r, KeyboardInterrupt)]) == 1
+        assert len([r for r in results if r is not None and
+                    not isinstance(r, KeyboardInterrupt) and
+                    r.status_code == 200]) == 2
+
+    def test_wait_timeout(self):
+        stage = self.space.pipeline.get_stage(pipeline.SingleFlightStage)
+        stage.timeout = 0.1
+        results = [None] * 3
+        def run(i):
+            results[i] = self.space.get('/api/space/slow')
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        assert len(self.stub.requests) == 3
+        assert stage.stats()['saved'] == 0
+        assert all(resp.status_code == 200 for resp in results)
+
+    def test_sequential_not_coalesced(self):
+        self.release.set()
+        self.space.get('/api/space/slow')
+        self.space.get('/api/space/slow')
+        assert len(self.stub.requests) == 2
@@ -0,0 +1,116 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+
+from lxml import etree
+
+from jnpr.space import rest, records
+from jnpr.space.test.stub_server import StubSpace
+
+DEVICES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<devices total="3" uri="/api/space/device-management/devices">
+<device href="/api/space/device-management/devices/1" key="1">
+  <name>d1</name><ipAddr>10.0.0.1</ipAddr><connected>true</connected>
+  <cpu-load>0.25</cpu-load>
+  <managed-status/>
+  <managed-element href="/api/space/managed-domain/managed-elements/7"/>
+</device>
+<device href="/api/space/device-management/devices/2" key="2">
+  <name>d2</name><connected>false</connected>
+  <interface>ge-0/0/0</interface><interface>ge-0/0/1</interface>
+</device>
+<!-- a comment -->
+<device href="/api/space/device-management/devices/3" key="3">
+  <name>003</name><serial-number>-12</serial-number>
+</device>
+</devices>"""
+
+class TestRecords(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices', DEVICES)
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def check(self, devs):
+        assert len(devs) == 3
+        d1, d2, d3 = devs
+        assert d1.href == '/api/space/device-management/devices/1'
+        assert d1.key == 1
+        assert d1.name == 'd1'
+        assert d1.ipAddr == '10.0.0.1'
+        assert d1.connected is True
+        assert d1.cpu_load == 0.25
+        assert d1.managed_status is None
+        assert d1.managed_element.href == \
+            '/api/space/managed-domain/managed-elements/7'
+        # Absent when streamed, since d2 was not seen when d1 was built
+        assert getattr(d1, 'interface', None) is None
+
+        assert d2.connected is False
+        assert d2.interface == ['ge-0/0/0', 'ge-0/0/1']
+        assert d3.name == '003'
+        assert d3.serial_number == -12
+
+    def test_get(self):
+        devs = self.space.device_management.devices.get(records=True)
+        assert isinstance(devs, records.RecordList)
+        assert devs.total == 3
+        self.check(devs)
+        # All records share one class with all the fields seen
+        assert len(set(type(d) for d in devs)) == 1
+        assert type(devs[0]).__name__ == 'Device'
+        assert devs[2]._asdict()['cpu_load'] is None
+
+    def test_stream(self):
+        devs = list(self.space.device_management.devices.stream(records=True))
+        self.check(devs)
+
+    def test_builder(self):
+        builder = records.RecordBuilder()
+        rec = builder.build(etree.fromstring(
+            '<a xmlns="urn:x" b="1"><c-d>x</c-d><class>y</class></a>'))
+        assert rec.b == 1 and rec.c_d == 'x'
+        # Invalid field names are renamed
+        assert rec[2] == 'y'
+        assert builder.record_class('a') is type(rec)
+
+    def test_convert_lossless(self):
+        assert records.convert('12') == 12
+        assert records.convert('3.5') == 3.5
+        # Would not give back the same text
+        assert records.convert('12.10') == '12.10'
+        assert records.convert('007') == '007'
+        assert records.convert('-0') == '-0'
+        assert records.convert('1e5') == '1e5'
+
+    def test_one_type_per_field(self):
+        elems = [etree.fromstring('<a><v>%s</v><n>%d</n></a>' % (v, i))
+                 for i, v in enumerate(['15.1', '12', 'R2', 'true'])]
+        recs = records.RecordBuilder().build_all(elems)
+        assert [r.v for r in recs] == ['15.1', '12', 'R2', 'true']
+        assert [r.n for r in recs] == [0, 1, 2, 3]
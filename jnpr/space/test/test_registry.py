@@ -0,0 +1,113 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+import yaml
+
+from jnpr.space import registry
+
+class TestRegistry(object):
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.desc_dir = os.path.join(self.tmp_dir, 'descriptions')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        os.makedirs(os.path.join(self.desc_dir, 'apps', 'a1'))
+        self.write('services.yml', 'services:\n  s1: {url: /api/s1}\n')
+        self.write('apps/a1/services.yml', 'services:\n  s2: {url: /api/s2}\n')
+
+        self.saved = (registry._DESCRIPTIONS_DIR,
+                      os.environ.get('SPACE_EZ_CACHE_DIR'))
+        registry._DESCRIPTIONS_DIR = self.desc_dir
+        os.environ['SPACE_EZ_CACHE_DIR'] = self.cache_dir
+        registry.clear()
+
+    def teardown_method(self, method):
+        registry._DESCRIPTIONS_DIR = self.saved[0]
+        if self.saved[1] is None:
+            del os.environ['SPACE_EZ_CACHE_DIR']
+        else:
+            os.environ['SPACE_EZ_CACHE_DIR'] = self.saved[1]
+        registry.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.desc_dir, rel_path), 'w') as f:
+            f.write(text)
+
+    def test_shared(self):
+        first = registry.load('services.yml')
+        assert first == {'services': {'s1': {'url': '/api/s1'}}}
+        assert registry.load('services.yml') is first
+        assert registry.load('apps/a1/services.yml')['services']['s2']['url'] == '/api/s2'
+
+    def test_compiled(self):
+        registry.load('services.yml')
+        assert len(os.listdir(self.cache_dir)) == 1
+
+        # A new process would use the compiled file without parsing
+        registry.clear()
+        load = yaml.load
+        yaml.load = None
+        try:
+            assert registry.load('services.yml')['services']['s1']['url'] == '/api/s1'
+        finally:
+            yaml.load = load
+
+    def test_untrusted(self):
+        registry.load('services.yml')
+        compiled = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        assert os.stat(compiled).st_mode & 0o777 == 0o600
+
+        # Compiled files that others could have written are not loaded
+        for path, mode in ((self.cache_dir, 0o770), (compiled, 0o622)):
+            os.chmod(path, mode)
+            registry.clear()
+            load = yaml.load
+            yaml.load = None
+            try:
+                registry.load('services.yml')
+                assert False, 'the compiled file must not be used'
+            except TypeError:
+                pass
+            finally:
+                yaml.load = load
+            os.chmod(path, 0o700 if path == self.cache_dir else 0o600)
+
+    def test_stale(self):
+        registry.load('services.yml')
+        registry.clear()
+        self.write('services.yml', 'services:\n  s1: {url: /api/changed}\n')
+        assert registry.load('services.yml')['services']['s1']['url'] == '/api/changed'
+
+    def test_disabled(self):
+        os.environ['SPACE_EZ_CACHE_DIR'] = ''
+        registry.load('services.yml')
+        assert not os.path.exists(self.cache_dir)
+
+    def test_safe_loader(self):
+        self.write('services.yml', 'services: !!python/object/apply:os.getcwd []\n')
+        try:
+            registry.load('services.yml')
+            assert False, 'Python tags must not be honored'
+        except yaml.YAMLError:
+            pass
@@ -0,0 +1,77 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+from __future__ import print_function
+import json
+import os
+import subprocess
+import sys
+
+from jnpr.space.test.stub_server import StubSpace
+from jnpr.space.test.test_stream import make_devices
+
+#
+# Run in a fresh interpreter, so that nothing is imported beforehand
+#
+SCRIPT = """
+import json, sys, time
+start = time.time()
+from jnpr.space import rest
+imported = time.time()
+space = rest.Space(sys.argv[1], 'super', 'secret')
+created = time.time()
+loaded = sorted(m for m in ('requests', 'yaml', 'jinja2', 'lxml', 'future',
+                            'past', 'sqlite3')
+                if m in sys.modules)
+devices = space.device_management.devices.get()
+done = time.time()
+print(json.dumps({'import': imported - start, 'space': created - imported,
+                  'first_get': done - created, 'loaded': loaded,
+                  'count': len(devices)}))
+"""
+
+class TestStartup(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices',
+                          make_devices(10))
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def run_script(self, cache_dir):
+        env = dict(os.environ, SPACE_EZ_CACHE_DIR=str(cache_dir))
+        out = subprocess.check_output([sys.executable, '-c', SCRIPT,
+                                       self.stub.url], env=env)
+        return json.loads(out.decode('utf-8').strip().splitlines()[-1])
+
+    def test_cold_start(self, tmp_path):
+        # The first run compiles the descriptions into the cache directory
+        result = self.run_script(tmp_path)
+        assert result['loaded'] == ['yaml']
+        assert result['count'] == 10
+
+        result = self.run_script(tmp_path)
+        print('\nimport %.3fs, Space() %.3fs, first devices.get() %.3fs' %
+              (result['import'], result['space'], result['first_get']))
+
+        # Heavy dependencies are loaded only when a request is sent
+        assert result['loaded'] == []
+        assert result['count'] == 10
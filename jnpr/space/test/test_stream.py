@@ -0,0 +1,79 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import types
+
+import pytest
+
+from jnpr.space import rest, resource, xmlutil
+from jnpr.space.test.stub_server import StubSpace
+
+NUM_DEVICES = 2000
+
+def make_devices(count):
+    devs = ['<device href="/api/space/device-management/devices/%d" key="%d">'
+            '<name>d%d</name><platform>MX240</platform></device>' % (i, i, i)
+            for i in range(count)]
+    return ''.join(['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+                    '<devices total="%d" ' % count,
+                    'uri="/api/space/device-management/devices">'] +
+                   devs + ['</devices>'])
+
+class TestStream(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/device-management/devices',
+                          make_devices(NUM_DEVICES))
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def test_stream_devices(self):
+        devs = self.space.device_management.devices.stream(chunk_size=1024)
+        assert isinstance(devs, types.GeneratorType)
+        count = 0
+        for dev in devs:
+            assert isinstance(dev, resource.Resource)
+            assert dev.name == 'd%d' % count
+            assert dev.href == '/api/space/device-management/devices/%d' % count
+            count += 1
+        assert count == NUM_DEVICES
+
+    def test_stream_error(self):
+        with pytest.raises(rest.RestException) as exc:
+            list(self.space.user_management.users.stream())
+        assert exc.value.response.status_code == 404
+
+    def test_processed_elements_cleared(self):
+        xml = make_devices(500).encode('utf-8')
+        chunks = (xml[i:i + 100] for i in range(0, len(xml), 100))
+        count = 0
+        for elem in xmlutil.iter_children(chunks):
+            # Not retained in the partially parsed tree
+            assert elem.getparent() is None
+            assert elem.findtext("name") == "d%d" % count
+            count += 1
+        assert count == 500
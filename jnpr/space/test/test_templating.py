@@ -0,0 +1,100 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+from jnpr.space import rest, templating
+from jnpr.space.test.stub_server import StubSpace
+
+SYSLOG_URL = '/api/space/device-management/devices/get-syslog-events'
+TASK = '<task><id>1</id></task>'
+
+class Device(object):
+
+    def __init__(self, i):
+        self.href = '/api/space/device-management/devices/%d' % i
+
+class TestTemplating(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.routes[('POST', SYSLOG_URL)] = \
+            (202, {'Content-Type': 'application/xml'}, TASK)
+        self.devices = [Device(i) for i in range(5000)]
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def setup_method(self, method):
+        self.space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+
+    def teardown_method(self, method):
+        self.space.close()
+
+    def test_shared_environment(self):
+        mobj = self.space.device_management.devices.get_syslog_events._meta_object
+        assert mobj.request_template is \
+            templating.get_template('get_syslog_events.tpl')
+        assert mobj.request_template.environment is templating.get_environment()
+
+    def test_precompile(self):
+        tmp_dir = tempfile.mkdtemp()
+        saved = (templating._env, os.environ.get('SPACE_EZ_CACHE_DIR'))
+        os.environ['SPACE_EZ_CACHE_DIR'] = tmp_dir
+        templating._env = None
+        try:
+            count = templating.precompile()
+            tpl_dir = os.path.join(os.path.dirname(templating.__file__),
+                                   'templates')
+            assert count == len([f for f in os.listdir(tpl_dir)
+                                 if f.endswith('.tpl')])
+            assert len(os.listdir(os.path.join(tmp_dir, 'templates'))) == count
+        finally:
+            templating._env = saved[0]
+            if saved[1] is None:
+                del os.environ['SPACE_EZ_CACHE_DIR']
+            else:
+                os.environ['SPACE_EZ_CACHE_DIR'] = saved[1]
+            shutil.rmtree(tmp_dir)
+
+    def test_render_stream(self):
+        tmpl = templating.get_template('get_syslog_events.tpl')
+        chunks = list(templating.render_stream(tmpl, 4096,
+                                               devices=self.devices,
+                                               text_patterns=['up', 'down']))
+        assert len(chunks) > 10
+        assert all(isinstance(c, bytes) for c in chunks)
+        expected = tmpl.render(devices=self.devices, text_patterns=['up', 'down'])
+        assert b''.join(chunks).decode('utf-8') == expected
+
+    def test_streamed_post(self):
+        method = self.space.device_management.devices.get_syslog_events
+        result = method.post(stream_body=True, devices=self.devices,
+                             text_patterns=['up'])
+        assert result.id == 1
+
+        cmd, path, headers, body = self.stub.requests[-1]
+        assert (cmd, path) == ('POST', SYSLOG_URL)
+        assert headers.get('Transfer-Encoding') == 'chunked'
+        expected = method._meta_object.request_template.render(
+            devices=self.devices, text_patterns=['up'])
+        assert body.decode('utf-8') == expected
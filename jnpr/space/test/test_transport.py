@@ -0,0 +1,62 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import base64
+
+from jnpr.space import rest
+from jnpr.space.test.stub_server import StubSpace
+
+class TestTransport(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/test', '<test/>')
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def test_keep_alive_reuse(self):
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        for i in range(5):
+            assert space.get('/api/space/test').status_code == 200
+
+        stats = space.pool_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 4
+        space.close()
+
+    def test_basic_auth_on_each_call(self):
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+        space.get('/api/space/test')
+        space.get('/api/space/test')
+        expected = 'Basic ' + base64.b64encode(b'super:secret').decode('ascii')
+        for req in self.stub.requests:
+            assert req[2]['Authorization'] == expected
+        space.close()
+
+    def test_cookies_not_retained(self):
+        self.stub.routes[('GET', '/api/space/cookie')] = \
+            (200, {'Set-Cookie': 'JSESSIONID=abc; Path=/'}, '<test/>')
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        del self.stub.requests[:]
+        space.get('/api/space/cookie')
+        space.get('/api/space/cookie')
+        assert 'Cookie' not in self.stub.requests[1][2]
+        space.close()
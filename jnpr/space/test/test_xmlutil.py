@@ -0,0 +1,75 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import unicode_literals
+import logging
+
+from jnpr.space import rest, pipeline, xmlutil
+from jnpr.space.test.stub_server import StubSpace
+
+class _NoText(object):
+    """Wraps a response and fails if its body is decoded into text"""
+    def __init__(self, response):
+        self._response = response
+    def __getattr__(self, attr):
+        if attr == 'text':
+            raise AssertionError('Response body was decoded')
+        return getattr(self._response, attr)
+
+class _GuardStage(pipeline.Stage):
+    def after(self, request, response):
+        return _NoText(response)
+
+class TestXmlUtil(object):
+
+    def setup_class(self):
+        self.stub = StubSpace()
+        self.stub.add_xml('/api/space/test',
+                          '<?xml version="1.0" encoding="UTF-8"?>'
+                          '<test><name>café</name></test>')
+
+    def teardown_class(self):
+        self.stub.stop()
+
+    def test_no_decode_without_debug(self):
+        space = rest.Space(self.stub.url, 'super', 'secret')
+        space.pipeline.add_stage(_GuardStage(), 1)
+        logger = logging.getLogger('root')
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            obj = xmlutil.get_obj_from_response(space.get('/api/space/test'))
+            assert obj.name == 'café'
+        finally:
+            logger.setLevel(level)
+            space.close()
+
+    def test_xml2obj_bytes(self):
+        src = '<?xml version="1.0" encoding="ISO-8859-1"?>\n' \
+              '<a><b>café</b></a>'
+        obj = xmlutil.xml2obj(b'\n' + src.encode('iso-8859-1'))
+        assert obj.b == 'café'
+        assert xmlutil.xml2obj(src).b == 'café'
+
+    def test_cleanup_bytes(self):
+        src = b'<a x="1" xmlns="urn:x" junos:group="g">&lt;b/&gt;</a>'
+        assert xmlutil.cleanup(src) == b'<a x="1" xmlns="urn:x" junos:group="g"><b/></a>'
+        assert xmlutil.remove_default_namespace(src) == \
+            b'<a x="1" junos:group="g">&lt;b/&gt;</a>'
+        assert xmlutil.remove_junos_group(src) == \
+            b'<a x="1" xmlns="urn:x">&lt;b/&gt;</a>'
@@ -0,0 +1,156 @@
+#
+# DO NOT ALTER OR REMOVE COPYRIGHT NOTICES OR THIS FILE HEADER
+#
+# Copyright (c) 2015 Juniper Networks, Inc.
+# All rights reserved.
+#
+# Use is subject to license terms.
+#
+# Licensed under the Apache License, Version 2.0 (the ?License?); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+This module defines the PooledTransport class.
+"""
+from __future__ import unicode_literals
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, \
+    HTTPSConnectionPool
+
+# Certificates of Space servers are not verified
+requests.packages.urllib3.disable_warnings()
+
+class PoolStats(object):
+    """
+    Thread-safe counters for connection checkouts from a ``PooledTransport``.
+    A *hit* is a checkout that got an already established (keep-alive)
+    connection. A *miss* is a checkout that needs a new TCP (and TLS)
+    connection to be set up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        """
+        Records the outcome of one connection checkout.
+
+        :param bool hit: ``True`` if an established connection was reused.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        """
+        Returns the counters as a dict with ``hits`` and ``misses`` keys.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+def _counting_pool_class(base_class, stats):
+    """
+    Creates a sub-class of the given urllib3 connection pool class that
+    records every connection checkout into ``stats``.
+    """
+    def _get_conn(self, timeout=None):
+        conn = base_class._get_conn(self, timeout=timeout)
+        stats.record(getattr(conn, 'sock', None) is not None)
+        return conn
+
+    return type(str('Counting' + base_class.__name__),
+                (base_class,),
+                {'_get_conn': _get_conn})
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter whose connection pools count hits and misses.
+    """
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super(_CountingAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_CountingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self._stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self._stats)
+        }
+
+class PooledTransport(object):
+    """
+    Encapsulates a pool of keep-alive HTTP(S) connections to a Junos Space
+    cluster. The ``rest.Space`` class uses this for all API calls made
+    without a session based login, so that the TCP connection, the TLS
+    handshake (including the X.509 client certificate exchange, if used) and
+    the connection setup are paid once per pooled connection rather than once
+    per API call.
+
+    Credentials are attached to every request, exactly as with the
+    module-level ``requests`` functions. Cookies sent back by Space are *not*
+    retained, so that the calls remain individually authenticated.
+
+    Instances of this class are thread-safe.
+    """
+
+    def __init__(self, auth=None, cert=None, pool_size=10, num_pools=10):
+        """Creates a pool of connections.
+
+        :param tuple auth: A (user, passwd) tuple for basic authentication.
+            This defaults to ``None``.
+        :param tuple cert: X.509 certificate details for authentication. See
+            ``rest.Space`` for details. This defaults to ``None``.
+        :param int pool_size: Maximum number of idle connections kept open
+            per host. This defaults to 10. Requests made when all connections
+            of a host are busy get a new connection which is discarded (not
+            pooled) when done.
+        :param int num_pools: Maximum number of hosts for which a pool is
+            kept. This defaults to 10.
+        """
+        self.stats = PoolStats()
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.cert = cert
+        self.session.verify = False
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = _CountingAdapter(self.stats,
+                                   pool_connections=num_pools,
+                                   pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Sends a request using a pooled connection. Acts as a wrapper over
+        requests.Session.request() function.
+
+        :param str method: HTTP method (GET, POST, etc.)
+        :param str url: Full URL for the request.
+        :param kwargs: Passed on to requests.Session.request()
+
+        :returns: The response object (`requests.Response <http://docs.python-requests.org/en/latest/api/#requests.Response />`_)
+        """
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """
+        Closes all pooled connections.
+        """
+        self.session.close()
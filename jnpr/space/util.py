@@ -22,15 +22,25 @@ Defines a few util functions.
 """
 from __future__ import unicode_literals
 
+#
+# A dictionary that acts as a cache for class definitions looked up by
+# get_class_def(). Keys are fully qualified class names.
+#
+_class_defs = {}
+
 def get_class_def(class_name):
     """
     Returns the definition for the given class name.
     """
+    if class_name in _class_defs:
+        return _class_defs[class_name]
+
     parts = class_name.split('.')
     module = ".".join(parts[:-1])
     mdl = __import__(module, globals=globals())
     for comp in parts[1:]:
         mdl = getattr(mdl, comp)
+    _class_defs[class_name] = mdl
     return mdl
 
 def make_xml_name(attr_name):
@@ -53,38 +53,221 @@ def get_text_from_response(response):
     """
     return response.text
 
+def get_bytes_from_response(response):
+    """
+    Returns the body of the ``Response`` object as bytes, without decoding
+    it. Leading whitespace is dropped since lxml does not allow anything
+    before the XML declaration.
+    """
+    return response.content.lstrip()
+
 def get_xml_obj_from_response(response):
     """
-    Returns an XML object (``lxml.Element``) from the text inside the
-    ``Response`` object.
+    Returns an XML object (``lxml.Element``) parsed directly from the bytes
+    inside the ``Response`` object. The XML declaration (if any) determines
+    the encoding.
     """
-    src = get_text_from_response(response)
-    start = src.find('?>')
-    if start > 0:
-        start += 2
-    else:
-        start = 0
-    return etree.fromstring(src[start:])
+    return etree.fromstring(get_bytes_from_response(response))
+
+def get_obj_from_response(response):
+    """
+    Uses lxml.objectify to parse the bytes inside the ``Response`` object
+    and returns a Python object. This avoids decoding the body into a str
+    before parsing it. The object is memoized on the response, so that it
+    is parsed once even if several callers share the response (see
+    ``pipeline.SingleFlightStage``). Responses served from the HTTP cache
+    are fresh copies, so they are parsed again.
+
+    :returns: An instance of ```lxml.objectify.ObjectifiedElement```
+    """
+    obj = getattr(response, '_parsed_obj', None)
+    if obj is None:
+        obj = objectify.fromstring(get_bytes_from_response(response))
+        response._parsed_obj = obj
+    return obj
+
+def field_names(fields):
+    """
+    Returns the set of element names to keep for the given field names.
+    Each field is kept under its name as given and its XML equivalent. For
+    a nested field such as ``domain.name``, the whole top-level element
+    (``domain``) is kept.
+
+    :param list fields: Names of the fields.
+    """
+    names = set()
+    for field in fields:
+        name = field.split('.', 1)[0]
+        names.add(name)
+        names.add(make_xml_name(name))
+    return names
+
+_FEED_SIZE = 65536
+
+def _pull_parser(objectified, events=('start', 'end'), tag=None):
+    """
+    Helper method to create a parser for incremental parsing.
+    """
+    parser = etree.XMLPullParser(events=events, tag=tag,
+                                 remove_blank_text=objectified)
+    if objectified:
+        parser.set_element_class_lookup(
+            objectify.ObjectifyElementClassLookup())
+    return parser
+
+def _local_name(tag):
+    """
+    Helper method to return the given tag without its namespace.
+    """
+    return tag if tag[0] != '{' else tag.rpartition('}')[2]
+
+def iter_children(chunks, objectified=False, fields=None):
+    """
+    Parses an XML document incrementally, as it is fed in chunks, and yields
+    each child element of the root element as soon as it has been parsed
+    completely. Each child is detached from the root before it is yielded,
+    so that memory usage does not grow with the size of the document unless
+    the consumer retains the children.
+
+    :param chunks: An iterable of bytes, e.g. ``response.iter_content()``.
+    :param bool objectified: If ``True``, the children are parsed as
+        ``lxml.objectify.ObjectifiedElement`` objects, exactly as by
+        ``xml2obj()``. This defaults to ``False``.
+    :param list fields: If given, only the child elements with these names
+        (see ``field_names()``) are kept in each yielded element. The others
+        are dropped as soon as they have been parsed. XML attributes are
+        always kept. This defaults to ``None``.
+
+    :returns: A generator of ``lxml.etree.Element`` objects.
+    """
+    parser = _pull_parser(objectified)
+    keep = field_names(fields) if fields is not None else None
+    depth = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                elem.getparent().remove(elem)
+                yield elem
+            elif depth == 2 and keep is not None and \
+                 _local_name(elem.tag) not in keep:
+                elem.getparent().remove(elem)
+    parser.close()
+
+def parse_fields(chunks, fields, level=1, objectified=False):
+    """
+    Parses an XML document, keeping only the given fields of the elements at
+    the given level. The child elements of these elements that are not kept
+    are dropped as soon as they have been parsed. XML attributes are always
+    kept.
+
+    :param chunks: An iterable of bytes, e.g. ``[response.content]``.
+    :param list fields: Names of the fields to keep (see ``field_names()``).
+    :param int level: 0 to keep the given fields of the root element (e.g.
+        a resource), or 1 to keep them in each child of the root element
+        (e.g. the members of a collection). This defaults to 1.
+    :param bool objectified: If ``True``, the result is an
+        ``lxml.objectify.ObjectifiedElement``, exactly as by ``xml2obj()``.
+        This defaults to ``False``.
+
+    :returns: The root element.
+    """
+    keep = field_names(fields)
+    # The parser reports only the root element, so that no Python object is
+    # created for an element unless it is looked at for pruning.
+    parser = None
+    sniffer = etree.XMLPullParser(events=('start',))
+    pending = []
+    root = None
+    start = None
+    for chunk in chunks:
+        # Fed in slices, so that dropped elements never pile up
+        for pos in range(0, len(chunk), _FEED_SIZE):
+            data = chunk[pos:pos + _FEED_SIZE]
+            if parser is None:
+                pending.append(data)
+                sniffer.feed(data)
+                for _, elem in sniffer.read_events():
+                    parser = _pull_parser(objectified, ('start',), elem.tag)
+                    break
+                if parser is None:
+                    continue
+                data, pending = b''.join(pending), None
+            parser.feed(data)
+            for _, elem in parser.read_events():
+                if root is None:
+                    root = elem
+            if root is not None:
+                start = _prune(root, level, keep, start, False)
+    if parser is None:
+        # Not well-formed, or empty. Let lxml report it.
+        sniffer.close()
+        parser = _pull_parser(objectified)
+        parser.feed(b''.join(pending))
+    root = parser.close()
+    _prune(root, level, keep, start, True)
+    return root
+
+def _prune(root, level, keep, start, final):
+    """
+    Helper method for ``parse_fields()`` to drop the fields that are not
+    kept from the elements at the given level that have been parsed
+    completely, beginning with ``start``. An element is known to be complete
+    once its next sibling has been started, or if ``final`` is ``True``.
+    Returns the element to begin with next time.
+    """
+    elem = start if start is not None else next(root.iterchildren(), None)
+    while elem is not None:
+        after = elem.getnext()
+        if after is None and not final:
+            return elem
+        if level == 0:
+            parent, children = root, (elem,)
+        else:
+            parent, children = elem, list(elem.iterchildren())
+        for child in children:
+            tag = child.tag
+            if isinstance(tag, str) and tag not in keep and \
+               _local_name(tag) not in keep:
+                parent.remove(child)
+        elem = after
+    return None
+
+_JUNOS_GROUP = re.compile(r' junos:group="[^"]+"')
+_JUNOS_GROUP_BYTES = re.compile(br' junos:group="[^"]+"')
 
 def remove_junos_group(src):
     """
     Remove XML attribute junos:group from the given string.
 
-    :param str src: Source string
+    :param src: Source string
+    :type src: str or bytes
 
     :returns: String with junos:group occurrences removed.
     """
-    return re.sub(r' junos:group="[^"]+"', '', src)
+    if isinstance(src, bytes):
+        return _JUNOS_GROUP_BYTES.sub(b'', src)
+    return _JUNOS_GROUP.sub('', src)
+
+_DEFAULT_XMLNS = re.compile(r' xmlns="[^"]+"')
+_DEFAULT_XMLNS_BYTES = re.compile(br' xmlns="[^"]+"')
 
 def remove_default_namespace(src):
     """
     Remove default xmlns from the given string.
 
-    :param str src: Source string
+    :param src: Source string
+    :type src: str or bytes
 
     :returns: String with xmlns definitions removed.
     """
-    return re.sub(r' xmlns="[^"]+"', '', src)
+    if isinstance(src, bytes):
+        return _DEFAULT_XMLNS_BYTES.sub(b'', src)
+    return _DEFAULT_XMLNS.sub('', src)
 
 
 def cleanup(src):
@@ -92,10 +275,14 @@ def cleanup(src):
     Some responses from Space contains escaped form for XML special characters.
     E.g. '&lt;' for '<', etc. This method removes these escaped notations.
 
-    :param str src: Source string
+    :param src: Source string
+    :type src: str or bytes
 
     :returns: String with escaped notations replaced.
     """
+    if isinstance(src, bytes):
+        xml = src.replace(b'&lt;', b'<').replace(b'&gt;', b'>')
+        return xml.replace(b'&quot;', b'"')
     xml = src.replace('&lt;', '<').replace('&gt;', '>')
     xml = xml.replace('&quot;', '"')
     return xml
@@ -105,10 +292,15 @@ def xml2obj(src):
     Uses lxml.objectify to parse the given XML string and returns a Python
     object.
 
-    :param str src: Source XML string
+    :param src: Source XML string. If this is bytes, it is parsed as it is
+        and the XML declaration (if any) determines the encoding.
+    :type src: str or bytes
 
     :returns: An instance of ```lxml.objectify.ObjectifiedElement```
     """
+    if isinstance(src, bytes):
+        return objectify.fromstring(src.lstrip())
+
     start = src.find('?>')
     if start > 0:
         start += 2
@@ -29,12 +29,18 @@ setup(name='space-ez',
                                    'templates/*.*'],
                     'jnpr.space.test': ['logging.conf',
                                         'pkg_level_logging.conf']},
-      install_requires=['future>=0.14.3',
-                        'requests>=2.5.1',
+      python_requires='>=3.8',
+      install_requires=['requests>=2.5.1',
                         'lxml>=3.3.5',
                         'PyYAML>=3.11',
                         'pytest>=2.5.2',
                         'jinja2>=2.7.3'],
+      extras_require={'aio': ['aiohttp>=3.0'],
+                      'inventory': ['numpy>=1.15'],
+                      'export': ['pyarrow>=1.0'],
+                      # The test cases run against a live Space cluster
+                      # still use its compatibility shims
+                      'test': ['future>=0.14.3']},
       classifiers=[
                    'Development Status :: 5 - Production/Stable',
                    'Intended Audience :: Developers',
@@ -44,8 +50,13 @@ setup(name='space-ez',
                    'License :: OSI Approved :: Apache Software License',
                    'Operating System :: OS Independent',
                    'Programming Language :: Python',
-                   'Programming Language :: Python :: 2.7',
-                   'Programming Language :: Python :: 3.3',
+                   'Programming Language :: Python :: 3',
+                   'Programming Language :: Python :: 3 :: Only',
+                   'Programming Language :: Python :: 3.8',
+                   'Programming Language :: Python :: 3.9',
+                   'Programming Language :: Python :: 3.10',
+                   'Programming Language :: Python :: 3.11',
+                   'Programming Language :: Python :: 3.12',
                    'Topic :: Software Development :: Libraries',
                    'Topic :: Software Development :: Libraries :: Application Frameworks',
                    'Topic :: Software Development :: Libraries :: Python Modules',